@@ -0,0 +1,64 @@
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import to_epoch_us
+from date_validator import ConflictChecker
+import date_validator
+
+
+SIZES = [100, 1_000, 5_000]
+
+
+def random_intervals(count: int, seed: int):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    intervals = []
+    for _ in range(count):
+        start = base + timedelta(minutes=rng.randrange(365 * 24 * 60))
+        intervals.append((start, start + timedelta(hours=rng.randint(1, 72))))
+    return intervals
+
+
+def measure(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(sizes):
+    numpy = date_validator.np
+    print(f"{'кандидатов x интервалов':>24} {'по одному, мс':>15} "
+          f"{'пакет Python, мс':>18} {'пакет NumPy, мс':>17}")
+    for size in sizes:
+        existing = random_intervals(size, 1)
+        candidates = random_intervals(size, 2)
+        starts = [to_epoch_us(start) for start, _ in existing]
+        ends = [to_epoch_us(end) for _, end in existing]
+        new_starts = [to_epoch_us(start) for start, _ in candidates]
+        new_ends = [to_epoch_us(end) for _, end in candidates]
+
+        scalar_ms = measure(lambda: [
+            ConflictChecker.check_date_conflicts(existing, start, end)
+            for start, end in candidates
+        ])
+
+        date_validator.np = None
+        python_ms = measure(lambda: ConflictChecker.batch_conflicts(starts, ends, new_starts, new_ends))
+        date_validator.np = numpy
+
+        if numpy is not None:
+            numpy_ms = measure(lambda: ConflictChecker.batch_conflicts(starts, ends, new_starts, new_ends))
+            numpy_column = f"{numpy_ms:>17.1f}"
+        else:
+            numpy_column = f"{'-':>17}"
+
+        print(f"{f'{size} x {size}':>24} {scalar_ms:>15.1f} {python_ms:>18.1f} {numpy_column}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
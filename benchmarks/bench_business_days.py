@@ -0,0 +1,57 @@
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from date_validator import DateValidator, HolidayCalendar
+
+
+SIZES = [1_000, 10_000, 100_000]
+MAX_DAYS = 3 * 365
+
+
+def listed_count(start: datetime, end: datetime) -> int:
+    # Прежний способ: список всех дней диапазона и проверка каждого
+    dates = DateValidator.get_date_range_list(start, end)
+    return sum(1 for date in dates if not DateValidator.is_weekend(date))
+
+
+def random_ranges(count: int):
+    rng = random.Random(0)
+    ranges = []
+    for _ in range(count):
+        start = datetime(2024, 1, 1) + timedelta(days=rng.randrange(365))
+        ranges.append((start, start + timedelta(days=rng.randint(1, MAX_DAYS))))
+    return ranges
+
+
+def measure(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(sizes):
+    calendar = HolidayCalendar(
+        datetime(year, month, day)
+        for year in range(2024, 2029)
+        for month, day in ((1, 1), (1, 7), (2, 23), (3, 8), (5, 1), (5, 9), (6, 12), (11, 4))
+    )
+    print(f"{'диапазонов':>12} {'список дней, мс':>17} {'формула, мс':>13} {'пакет, мс':>11}")
+    for size in sizes:
+        ranges = random_ranges(size)
+        # Прежний способ медленный: замер на первой тысяче диапазонов, пересчет на весь размер
+        listed_ms = measure(lambda: [listed_count(start, end) for start, end in ranges[:1_000]])
+        listed_ms *= size / min(size, 1_000)
+        scalar_ms = measure(lambda: [
+            DateValidator.get_business_days_count(start, end, calendar) for start, end in ranges
+        ])
+        batch_ms = measure(lambda: DateValidator.get_business_days_counts(ranges, calendar))
+        print(f"{size:>12} {listed_ms:>17.1f} {scalar_ms:>13.1f} {batch_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
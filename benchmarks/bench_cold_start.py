@@ -0,0 +1,68 @@
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+from binary_snapshot import open_binary_snapshot, write_binary_snapshot
+
+
+SIZES = [10_000, 100_000, 1_000_000]
+RESOURCES = 300
+CUSTOMERS = 5_000
+
+
+def fill_system(size: int) -> BookingSystem:
+    system = BookingSystem()
+    base = datetime(2025, 1, 1)
+    for i in range(size):
+        start = base + timedelta(hours=i // RESOURCES)
+        system.create_booking(
+            resource_name=f"Конференц-зал {i % RESOURCES}",
+            start_date=start,
+            end_date=start + timedelta(hours=1),
+            customer_name=f"ООО Клиент {i % CUSTOMERS}"
+        )
+    return system
+
+
+def json_cold_start(path: str, booking_id: int) -> float:
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    system = BookingSystem()
+    system.restore_state(state)
+    system.get_booking(booking_id)
+    return time.perf_counter() - start
+
+
+def mmap_cold_start(path: str, booking_id: int) -> float:
+    start = time.perf_counter()
+    system = open_binary_snapshot(path)
+    system.get_booking(booking_id)
+    return time.perf_counter() - start
+
+
+def main(sizes):
+    print(f"{'бронирований':>14} {'JSON, с':>10} {'mmap, с':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            system = fill_system(size)
+            json_path = os.path.join(directory, f"{size}.json")
+            binary_path = os.path.join(directory, f"{size}.snap")
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(system.export_state(), f, ensure_ascii=False)
+            write_binary_snapshot(system, binary_path)
+            del system
+
+            json_time = json_cold_start(json_path, size // 2)
+            mmap_time = mmap_cold_start(binary_path, size // 2)
+            print(f"{size:>14} {json_time:>10.3f} {mmap_time:>10.4f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,68 @@
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import Booking
+from analyzer import BookingAnalytics
+
+
+SIZES = [1_000, 5_000, 20_000, 100_000, 500_000]
+PAIRWISE_LIMIT = 5_000
+RESOURCES = 200
+
+
+def make_bookings(size: int):
+    rng = random.Random(size)
+    base = datetime(2025, 1, 1)
+    bookings = []
+    for i in range(size):
+        start = base + timedelta(minutes=rng.randint(0, size * 10))
+        bookings.append(Booking(
+            id=i + 1,
+            resource_name=f"Ресурс {rng.randrange(RESOURCES)}",
+            start_date=start,
+            end_date=start + timedelta(minutes=rng.randint(30, 600)),
+            customer_name=f"Клиент {i % 1000}"
+        ))
+    return bookings
+
+
+def pairwise_conflicts(bookings):
+    conflicts_by_resource = defaultdict(int)
+    active = [b for b in bookings if b.is_active()]
+    for i, booking1 in enumerate(active):
+        for booking2 in active[i + 1:]:
+            if booking1.overlaps_with(booking2):
+                conflicts_by_resource[booking1.resource_name] += 1
+    return dict(conflicts_by_resource)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(sizes):
+    print(f"{'бронирований':>14} {'попарно, с':>12} {'sweep, с':>10} {'конфликтов':>12}")
+    for size in sizes:
+        bookings = make_bookings(size)
+        result, sweep_time = timed(BookingAnalytics.analyze_conflicts, bookings)
+
+        pairwise_column = "-"
+        if size <= PAIRWISE_LIMIT:
+            expected, pairwise_time = timed(pairwise_conflicts, bookings)
+            assert expected == result['conflicts_by_resource']
+            pairwise_column = f"{pairwise_time:.3f}"
+
+        print(f"{size:>14} {pairwise_column:>12} {sweep_time:>10.3f} "
+              f"{result['total_conflicts']:>12}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,57 @@
+import io
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analyzer import EventLog
+
+
+SIZES = [100_000, 1_000_000]
+CAPACITY = 10_000
+SAMPLING = [1, 16]
+
+
+def dict_events(size: int) -> float:
+    # Прежний способ: словарь с датой ISO на каждую операцию
+    events = deque(maxlen=CAPACITY)
+    start = time.perf_counter()
+    for i in range(size):
+        events.append({
+            'operation': "create_booking",
+            'duration': i / 1e9,
+            'timestamp': datetime.now().isoformat()
+        })
+    return (time.perf_counter() - start) * 1e9 / size
+
+
+def ring_events(size: int, sample_every: int) -> float:
+    log = EventLog(CAPACITY, sample_every)
+    start = time.perf_counter()
+    for i in range(size):
+        log.append("create_booking", i)
+    return (time.perf_counter() - start) * 1e9 / size
+
+
+def main(sizes):
+    columns = ''.join(f" {f'кольцо 1/{n}, нс':>16}" for n in SAMPLING)
+    print(f"{'операций':>10} {'словари, нс':>13}{columns} {'экспорт JSONL, мс':>19}")
+    for size in sizes:
+        dict_ns = dict_events(size)
+        ring_ns = ''.join(f" {ring_events(size, n):>16.0f}" for n in SAMPLING)
+
+        log = EventLog(CAPACITY)
+        for i in range(CAPACITY):
+            log.append("create_booking", i)
+        start = time.perf_counter()
+        log.export_jsonl(io.StringIO())
+        export_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{size:>10} {dict_ns:>13.0f}{ring_ns} {export_ms:>19.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,72 @@
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+from date_validator import ConflictChecker
+
+
+SIZES = [1_000, 10_000, 100_000]
+QUERIES = 200
+RESOURCE = "Конференц-зал А"
+
+
+def fill_system(size: int) -> BookingSystem:
+    rng = random.Random(0)
+    system = BookingSystem()
+    start = datetime(2025, 1, 1)
+    for _ in range(size):
+        start += timedelta(hours=rng.randint(0, 2))
+        end = start + timedelta(hours=rng.randint(1, 6))
+        system.create_booking(
+            resource_name=RESOURCE,
+            start_date=start,
+            end_date=end,
+            customer_name="Клиент"
+        )
+        start = end
+    return system
+
+
+def sorted_scan(system: BookingSystem, duration: timedelta, after: datetime):
+    # Прежний способ: все активные бронирования ресурса сортируются на каждый запрос
+    busy = [(b.start_date, b.end_date)
+            for b in system.get_bookings_by_resource(RESOURCE) if b.is_active()]
+    for start, _ in ConflictChecker.find_available_slots(busy, after, datetime.max, duration):
+        if start >= after:
+            return start
+    return None
+
+
+def main(sizes):
+    rng = random.Random(1)
+    print(f"{'бронирований':>14} {'сортировка, мкс':>18} {'next_free_slot, мкс':>22}")
+    for size in sizes:
+        system = fill_system(size)
+        last = system.get_all_bookings()[-1].end_date
+        queries = [
+            (timedelta(hours=rng.randint(1, 3)),
+             datetime(2025, 1, 1) + (last - datetime(2025, 1, 1)) * rng.random())
+            for _ in range(QUERIES)
+        ]
+        system.next_free_slot(RESOURCE, timedelta(hours=1), datetime(2025, 1, 1))
+
+        start = time.perf_counter_ns()
+        for duration, after in queries:
+            sorted_scan(system, duration, after)
+        scan_us = (time.perf_counter_ns() - start) / QUERIES / 1000
+
+        start = time.perf_counter_ns()
+        for duration, after in queries:
+            system.next_free_slot(RESOURCE, duration, after)
+        index_us = (time.perf_counter_ns() - start) / QUERIES / 1000
+
+        print(f"{size:>14} {scan_us:>18.1f} {index_us:>22.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
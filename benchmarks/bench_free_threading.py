@@ -0,0 +1,89 @@
+import os
+import random
+import subprocess
+import sys
+import sysconfig
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+from sharded_system import ShardedBookingSystem
+
+
+THREADS = [1, 2, 4, 8, 16, 32]
+OPERATIONS = 20_000
+RESOURCES = 256
+
+
+def worker(system, seed: int, operations: int, barrier: threading.Barrier):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    created = []
+    barrier.wait()
+    for _ in range(operations):
+        roll = rng.random()
+        if roll < 0.5 or not created:
+            start = base + timedelta(hours=rng.randrange(100_000))
+            booking = system.create_booking(
+                resource_name=f"Ресурс {rng.randrange(RESOURCES)}",
+                start_date=start,
+                end_date=start + timedelta(hours=rng.randint(1, 4)),
+                customer_name=f"Клиент {seed}"
+            )
+            if booking is not None:
+                created.append(booking.id)
+        elif roll < 0.7:
+            system.confirm_booking(rng.choice(created))
+        elif roll < 0.9:
+            system.get_booking(rng.choice(created))
+        else:
+            system.get_bookings_by_resource(f"Ресурс {rng.randrange(RESOURCES)}")
+
+
+def throughput(make_system, threads: int) -> float:
+    system = make_system()
+    barrier = threading.Barrier(threads + 1)
+    per_thread = OPERATIONS // threads
+    workers = [
+        threading.Thread(target=worker, args=(system, seed, per_thread, barrier))
+        for seed in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def run(threads_list):
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'включен' if gil else 'выключен'}")
+    print(f"{'потоков':>8} {'BookingSystem, оп/с':>20} {'шарды, оп/с':>14}")
+    for threads in threads_list:
+        single = throughput(BookingSystem, threads)
+        sharded = throughput(lambda: ShardedBookingSystem(shards=16), threads)
+        print(f"{threads:>8} {single:>20.0f} {sharded:>14.0f}")
+
+
+def main(threads_list):
+    if not sysconfig.get_config_var('Py_GIL_DISABLED') or os.environ.get('BENCH_CHILD'):
+        run(threads_list)
+        return
+
+    # Сборка без GIL: сравниваем оба режима одного интерпретатора
+    for mode in ('1', '0'):
+        subprocess.run(
+            [sys.executable, '-X', f'gil={mode}', __file__, *map(str, threads_list)],
+            env=dict(os.environ, BENCH_CHILD='1'),
+            check=True
+        )
+        print()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or THREADS)
@@ -0,0 +1,57 @@
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+LOOKUPS = 100_000
+RESOURCES = 500
+
+
+def fill_system(size: int) -> BookingSystem:
+    system = BookingSystem()
+    base = datetime(2025, 1, 1)
+    for i in range(size):
+        start = base + timedelta(hours=i // RESOURCES)
+        system.create_booking(
+            resource_name=f"Ресурс {i % RESOURCES}",
+            start_date=start,
+            end_date=start + timedelta(hours=1),
+            customer_name=f"Клиент {i % 1000}"
+        )
+    return system
+
+
+def measure(system: BookingSystem, size: int) -> dict:
+    ids = [random.randint(1, size) for _ in range(LOOKUPS)]
+
+    start = time.perf_counter_ns()
+    for booking_id in ids:
+        system.get_booking(booking_id)
+    lookup_ns = (time.perf_counter_ns() - start) / LOOKUPS
+
+    confirm_ids = random.sample(range(1, size + 1), min(size, LOOKUPS))
+    start = time.perf_counter_ns()
+    for booking_id in confirm_ids:
+        system.confirm_booking(booking_id)
+    confirm_ns = (time.perf_counter_ns() - start) / len(confirm_ids)
+
+    return {'lookup_ns': lookup_ns, 'confirm_ns': confirm_ns}
+
+
+def main(sizes):
+    print(f"{'бронирований':>14} {'get_booking, нс':>18} {'confirm_booking, нс':>22}")
+    for size in sizes:
+        system = fill_system(size)
+        result = measure(system, size)
+        print(f"{size:>14} {result['lookup_ns']:>18.1f} {result['confirm_ns']:>22.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,43 @@
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+from analyzer import PerformanceAnalyzer
+import instrumentation
+
+
+SIZES = [10_000, 100_000]
+
+
+def run(system: BookingSystem, size: int) -> float:
+    start = time.perf_counter()
+    for _ in range(size):
+        system.get_booking(1)
+    return (time.perf_counter() - start) * 1e9 / size
+
+
+def main(sizes):
+    system = BookingSystem()
+    system.create_booking("Зал", datetime(2025, 1, 1), datetime(2025, 1, 2), "Клиент")
+    print(f"{'вызовов':>10} {'без замеров, нс':>17} {'выключено, нс':>15} {'включено, нс':>14}")
+    for size in sizes:
+        plain_ns = run(system, size)
+
+        # Обертка без анализатора: так ведет себя timed() при выключенных замерах
+        original = BookingSystem.get_booking
+        BookingSystem.get_booking = instrumentation.timed()(original)
+        disabled_ns = run(system, size)
+        BookingSystem.get_booking = original
+
+        with instrumentation.instrumented(PerformanceAnalyzer()):
+            enabled_ns = run(system, size)
+
+        print(f"{size:>10} {plain_ns:>17.0f} {disabled_ns:>15.0f} {enabled_ns:>14.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
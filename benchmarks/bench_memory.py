@@ -0,0 +1,46 @@
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+
+
+SIZES = [10_000, 100_000, 1_000_000]
+RESOURCES = 300
+CUSTOMERS = 5_000
+
+
+def fill_system(system: BookingSystem, size: int):
+    base = datetime(2025, 1, 1)
+    for i in range(size):
+        start = base + timedelta(hours=i // RESOURCES)
+        system.create_booking(
+            resource_name=f"Конференц-зал {i % RESOURCES}",
+            start_date=start,
+            end_date=start + timedelta(hours=1),
+            customer_name=f"ООО Клиент {i % CUSTOMERS}"
+        )
+
+
+def measure(size: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    system = BookingSystem()
+    fill_system(system, size)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del system
+    return (after - before) / size
+
+
+def main(sizes):
+    print(f"{'бронирований':>14} {'байт на бронирование':>22}")
+    for size in sizes:
+        print(f"{size:>14} {measure(size):>22.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+from analyzer import PerformanceAnalyzer
+from metrics import MetricsExporter
+import instrumentation
+
+
+SIZES = [10, 100, 1_000]
+SCRAPES = 1_000
+
+
+def measure_us(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def main(sizes):
+    print(f"{'ресурсов':>10} {'операций':>10} {'без изменений, мкс':>20} {'после изменения, мкс':>22}")
+    for size in sizes:
+        system = BookingSystem()
+        analyzer = PerformanceAnalyzer()
+        with instrumentation.instrumented(analyzer):
+            for i in range(size):
+                system.create_booking(f"Ресурс {i}", datetime(2025, 1, 1), datetime(2025, 1, 2), "Клиент")
+            system.get_statistics()
+            system.get_all_bookings()
+        exporter = MetricsExporter(system, analyzer)
+        exporter.render()
+
+        cached_us = measure_us(exporter.render, SCRAPES)
+
+        def changed():
+            # Одна новая операция между опросами: пересчитывается только
+            # часть анализатора, часть системы берется из кеша
+            analyzer.record_operation_ns("BookingSystem.get_booking", 1_000)
+            exporter.render()
+        changed_us = measure_us(changed, SCRAPES)
+
+        print(f"{size:>10} {len(analyzer.histograms):>10} {cached_us:>20.1f} {changed_us:>22.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
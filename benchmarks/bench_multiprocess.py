@@ -0,0 +1,56 @@
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+from multiprocess_system import ProcessShardedBookingSystem
+
+
+WORKERS = [1, 2, 4, 8]
+BOOKINGS = 200_000
+BATCH = 5_000
+RESOURCES = 1_000
+
+
+def make_batches(total: int):
+    rng = random.Random(total)
+    base = datetime(2025, 1, 1)
+    batches = []
+    for offset in range(0, total, BATCH):
+        batch = []
+        for _ in range(min(BATCH, total - offset)):
+            start = base + timedelta(hours=rng.randrange(200_000))
+            batch.append({
+                'resource_name': f"Ресурс {rng.randrange(RESOURCES)}",
+                'start_date': start,
+                'end_date': start + timedelta(hours=rng.randint(1, 8)),
+                'customer_name': f"Клиент {rng.randrange(10_000)}"
+            })
+        batches.append(batch)
+    return batches
+
+
+def throughput(system, batches) -> float:
+    start = time.perf_counter()
+    for batch in batches:
+        system.create_bookings(batch)
+    system.get_statistics()
+    return sum(len(batch) for batch in batches) / (time.perf_counter() - start)
+
+
+def main(workers_list):
+    batches = make_batches(BOOKINGS)
+    print(f"Ядер: {os.cpu_count()}")
+    print(f"{'процессов':>10} {'бронирований/с':>16}")
+    print(f"{'-':>10} {throughput(BookingSystem(), batches):>16.0f}")
+    for workers in workers_list:
+        with ProcessShardedBookingSystem(workers=workers) as system:
+            print(f"{workers:>10} {throughput(system, batches):>16.0f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or WORKERS)
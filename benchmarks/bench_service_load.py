@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Tuple
+
+
+RATES = [500, 1_000, 2_000, 4_000]
+DURATION = 3.0
+CONNECTIONS = 64
+RESOURCES = 200
+SERVICE = os.path.join(os.path.dirname(__file__), '..', 'src', 'service.py')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, method: str, path: str, payload=None) -> Tuple[int, bytes]:
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+        )
+        status_line = await self.reader.readline()
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        body = await self.reader.readexactly(length)
+        return int(status_line.split(b' ', 2)[1]), body
+
+
+def next_request(rng: random.Random, created: list, pending: list):
+    # Подтверждаются только созданные и еще не подтвержденные бронирования,
+    # иначе нагрузка сводилась бы к ответам об ошибках
+    roll = rng.random()
+    if roll < 0.6 or not pending:
+        start = datetime(2025, 1, 1) + timedelta(hours=rng.randrange(50_000))
+        return 'POST', '/bookings', {
+            'resource_name': f"Ресурс {rng.randrange(RESOURCES)}",
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(hours=rng.randint(1, 4))).isoformat(),
+            'customer_name': f"Клиент {rng.randrange(1000)}"
+        }
+    if roll < 0.8:
+        position = rng.randrange(len(pending))
+        pending[position], pending[-1] = pending[-1], pending[position]
+        return 'POST', f'/bookings/{pending.pop()}/confirm', None
+    if roll < 0.95:
+        return 'GET', f'/bookings/{rng.choice(created)}', None
+    return 'GET', '/statistics', None
+
+
+async def run_rate(port: int, rate: int):
+    pool: asyncio.Queue = asyncio.Queue()
+    for _ in range(CONNECTIONS):
+        pool.put_nowait(Connection(*await asyncio.open_connection('127.0.0.1', port)))
+
+    rng = random.Random(rate)
+    created = []
+    pending = []
+    latencies = []
+    errors = 0
+
+    async def send(scheduled: float, method: str, path: str, payload):
+        nonlocal errors
+        connection = await pool.get()
+        try:
+            status, body = await connection.request(method, path, payload)
+            if status >= 500:
+                errors += 1
+            elif status == 201:
+                booking_id = json.loads(body)['id']
+                created.append(booking_id)
+                pending.append(booking_id)
+        finally:
+            pool.put_nowait(connection)
+        # Задержка считается от запланированного момента отправки, чтобы
+        # очередь на стороне клиента не скрывала деградацию сервиса.
+        latencies.append(time.perf_counter() - scheduled)
+
+    loop_start = time.perf_counter()
+    tasks = []
+    total = int(rate * DURATION)
+    for i in range(total):
+        scheduled = loop_start + i / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(scheduled, *next_request(rng, created, pending))))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - loop_start
+
+    while not pool.empty():
+        pool.get_nowait().writer.close()
+
+    latencies.sort()
+    return {
+        'achieved': total / elapsed,
+        'p50': latencies[len(latencies) // 2] * 1000,
+        'p99': latencies[int(len(latencies) * 0.99)] * 1000,
+        'errors': errors
+    }
+
+
+async def wait_for_port(port: int):
+    for _ in range(100):
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError("Сервис не запустился")
+
+
+async def main(rates):
+    port = free_port()
+    server = subprocess.Popen([sys.executable, SERVICE, str(port)], stdout=subprocess.DEVNULL)
+    try:
+        await wait_for_port(port)
+        print(f"{'цель, зап/с':>12} {'факт, зап/с':>12} {'p50, мс':>9} {'p99, мс':>9} {'ошибок':>7}")
+        for rate in rates:
+            result = await run_rate(port, rate)
+            print(f"{rate:>12} {result['achieved']:>12.0f} {result['p50']:>9.2f} "
+                  f"{result['p99']:>9.2f} {result['errors']:>7}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]] or RATES))
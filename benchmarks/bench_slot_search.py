@@ -0,0 +1,76 @@
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+from date_validator import ConflictChecker
+
+
+SIZES = [50, 200, 1_000]
+BOOKINGS_PER_RESOURCE = 100
+SLOTS = 10
+REPEATS = 20
+
+
+def fill_system(resources: int) -> BookingSystem:
+    rng = random.Random(0)
+    system = BookingSystem()
+    base = datetime(2025, 1, 1)
+    for r in range(resources):
+        start = base
+        for _ in range(BOOKINGS_PER_RESOURCE):
+            start += timedelta(hours=rng.randint(0, 3))
+            end = start + timedelta(hours=rng.randint(2, 8))
+            system.create_booking(
+                resource_name=f"Ресурс {r}",
+                start_date=start,
+                end_date=end,
+                customer_name="Клиент"
+            )
+            start = end
+    return system
+
+
+def loop_over_resources(system: BookingSystem, names, search_start, search_end, duration):
+    # Прежний способ: окна каждого ресурса отдельно, затем общая сортировка
+    slots = []
+    for name in names:
+        busy = [(b.start_date, b.end_date)
+                for b in system.get_bookings_by_resource(name) if b.is_active()]
+        for start, _ in ConflictChecker.find_available_slots(busy, search_start, search_end, duration):
+            slots.append((start, name))
+    slots.sort()
+    return slots[:SLOTS]
+
+
+def measure(func) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(REPEATS):
+        func()
+    return (time.perf_counter_ns() - start) / REPEATS / 1e6
+
+
+def main(sizes):
+    search_start = datetime(2025, 1, 10)
+    search_end = datetime(2025, 2, 10)
+    duration = timedelta(hours=3)
+
+    print(f"{'ресурсов':>10} {'цикл по ресурсам, мс':>22} {'find_earliest_slots, мс':>25}")
+    for size in sizes:
+        system = fill_system(size)
+        names = [f"Ресурс {r}" for r in range(size)]
+        loop_ms = measure(lambda: loop_over_resources(
+            system, names, search_start, search_end, duration
+        ))
+        heap_ms = measure(lambda: system.find_earliest_slots(
+            names, search_start, search_end, duration, SLOTS
+        ))
+        print(f"{size:>10} {loop_ms:>22.2f} {heap_ms:>25.2f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
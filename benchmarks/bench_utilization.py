@@ -0,0 +1,57 @@
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import Booking, ColumnarBookingStore
+from analyzer import BookingAnalytics
+
+
+SIZES = [10_000, 100_000, 1_000_000]
+RESOURCES = 200
+HISTORY_DAYS = 5 * 365
+REPORTS = 20
+
+
+def make_store(size: int) -> ColumnarBookingStore:
+    rng = random.Random(size)
+    base = datetime(2021, 1, 1)
+    store = ColumnarBookingStore()
+    for i in range(size):
+        start = base + timedelta(minutes=rng.randrange(HISTORY_DAYS * 24 * 60))
+        store.append(Booking(
+            id=i + 1,
+            resource_name=f"Ресурс {rng.randrange(RESOURCES)}",
+            start_date=start,
+            end_date=start + timedelta(minutes=rng.randint(30, 600)),
+            customer_name="Клиент"
+        ))
+    return store
+
+
+def main(sizes):
+    print(f"{'бронирований':>14} {'построение индекса, мс':>24} {'отчет за месяц, мс':>20}")
+    for size in sizes:
+        store = make_store(size)
+        windows = [
+            (datetime(2021, 1, 1) + timedelta(days=30 * i), datetime(2021, 1, 31) + timedelta(days=30 * i))
+            for i in range(REPORTS)
+        ]
+
+        start = time.perf_counter()
+        store.time_index()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for window in windows:
+            BookingAnalytics.generate_utilization_report(store, *window)
+        report_ms = (time.perf_counter() - start) * 1000 / REPORTS
+
+        print(f"{size:>14} {build_ms:>24.1f} {report_ms:>20.2f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
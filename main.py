@@ -1,13 +1,13 @@
 ﻿import sys
 import os
 from datetime import datetime, timedelta
-import time
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from booking_system import BookingSystem, BookingStatus
 from date_validator import DateValidator, ConflictChecker
 from analyzer import PerformanceAnalyzer, BookingAnalytics, ReportGenerator
+import instrumentation
 
 
 def demonstrate_booking_system():
@@ -17,6 +17,8 @@ def demonstrate_booking_system():
     
     system = BookingSystem()
     analyzer = PerformanceAnalyzer()
+    # Все вызовы BookingSystem и BookingAnalytics замеряются автоматически
+    instrumentation.enable(analyzer)
     
     print("\n1. Создание бронирований...")
     print("-" * 80)
@@ -55,8 +57,6 @@ def demonstrate_booking_system():
     ]
     
     for booking_data in test_bookings:
-        start_time = time.time()
-        
         booking = system.create_booking(
             resource_name=booking_data["resource"],
             start_date=booking_data["start"],
@@ -65,9 +65,6 @@ def demonstrate_booking_system():
             notes=f"Тестовое бронирование для {booking_data['customer']}"
         )
         
-        duration = time.time() - start_time
-        analyzer.record_operation("create_booking", duration)
-        
         if booking:
             print(f"✓ Создано: {booking}")
             system.confirm_booking(booking.id)
@@ -94,17 +91,13 @@ def demonstrate_booking_system():
     ]
     
     for booking_data in conflict_attempts:
-        start_time = time.time()
-        
-        booking = system.create_booking(
-            resource_name=booking_data["resource"],
-            start_date=booking_data["start"],
-            end_date=booking_data["end"],
-            customer_name=booking_data["customer"]
-        )
-        
-        duration = time.time() - start_time
-        analyzer.record_operation("create_booking_conflict", duration)
+        with instrumentation.measure("create_booking_conflict"):
+            booking = system.create_booking(
+                resource_name=booking_data["resource"],
+                start_date=booking_data["start"],
+                end_date=booking_data["end"],
+                customer_name=booking_data["customer"]
+            )
         
         if booking:
             print(f"✓ Создано: {booking}")
@@ -156,6 +149,8 @@ def demonstrate_booking_system():
     conflict_analysis = BookingAnalytics.analyze_conflicts(system.get_all_bookings())
     print(f"Обнаружено потенциальных конфликтов: {conflict_analysis['total_conflicts']}")
     
+    instrumentation.disable()
+    
     print("\n7. Производительность")
     print("-" * 80)
     
@@ -212,6 +207,18 @@ def demonstrate_booking_system():
         else:
             print("  Нет доступных слотов")
     
+    resources = sorted({b.resource_name for b in system.get_all_bookings()})
+    earliest = system.find_earliest_slots(
+        resources,
+        datetime(2025, 1, 10),
+        datetime(2025, 1, 20),
+        timedelta(days=1),
+        count=3
+    )
+    print(f"\nБлижайшие слоты на 1 день среди {len(resources)} ресурсов:")
+    for i, (resource, slot_start, slot_end) in enumerate(earliest, 1):
+        print(f"  {i}. {resource}: {slot_start} - {slot_end}")
+    
     print("\n" + "=" * 80)
     print("ДЕМОНСТРАЦИЯ ЗАВЕРШЕНА")
     print("=" * 80)
@@ -8,8 +8,9 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from booking_system import BookingSystem, BookingStatus
-from date_validator import DateValidator, ConflictChecker
+from date_validator import DateValidator
 from analyzer import PerformanceAnalyzer, BookingAnalytics, ReportGenerator
+import instrumentation
 
 
 class BookingSystemGUI:
@@ -18,8 +19,9 @@ class BookingSystemGUI:
         self.root.title("Система бронирования")
         self.root.geometry("1000x700")
         
-        self.booking_system = BookingSystem()
+        self.booking_system = BookingSystem(columnar=True)
         self.analyzer = PerformanceAnalyzer()
+        instrumentation.enable(self.analyzer)
         
         self.setup_ui()
         
@@ -234,9 +236,6 @@ class BookingSystemGUI:
             
             notes = self.notes_text.get("1.0", tk.END).strip()
             
-            import time
-            start_time = time.time()
-            
             booking = self.booking_system.create_booking(
                 resource_name=resource,
                 start_date=start_dt,
@@ -245,9 +244,6 @@ class BookingSystemGUI:
                 notes=notes
             )
             
-            duration = time.time() - start_time
-            self.analyzer.record_operation("create_booking", duration)
-            
             if booking:
                 self.create_message.insert(tk.END, 
                     f"✓ Бронирование успешно создано!\n"
@@ -291,17 +287,27 @@ class BookingSystemGUI:
                 )
             )
             
-            existing = self.booking_system.get_bookings_by_resource(resource)
-            active_bookings = [(b.start_date, b.end_date) for b in existing if b.is_active()]
+            if not DateValidator.is_valid_date_range(start_dt, end_dt):
+                messagebox.showwarning("Предупреждение", "Окончание должно быть позже начала!")
+                return
             
-            conflicts = ConflictChecker.check_date_conflicts(
-                active_bookings, start_dt, end_dt
-            )
+            conflicts = self.booking_system.get_busy_intervals(
+                [resource], start_dt, end_dt
+            )[resource]
             
             if conflicts:
+                slot = self.booking_system.next_free_slot(
+                    resource, end_dt - start_dt, start_dt
+                )
                 self.create_message.insert(tk.END,
                     f"⚠ Ресурс '{resource}' занят в указанное время!\n"
-                    f"  Обнаружено конфликтов: {len(conflicts)}\n\n")
+                    f"  Обнаружено конфликтов: {len(conflicts)}\n")
+                if slot is not None:
+                    self.create_message.insert(tk.END,
+                        f"  Ближайшее свободное время: "
+                        f"{slot[0].strftime('%d.%m.%Y %H:%M')} - "
+                        f"{slot[1].strftime('%d.%m.%Y %H:%M')}\n")
+                self.create_message.insert(tk.END, "\n")
             else:
                 self.create_message.insert(tk.END,
                     f"✓ Ресурс '{resource}' доступен!\n\n")
@@ -444,7 +450,7 @@ class BookingSystemGUI:
         self.stats_text.insert(tk.END, f"Процент конфликтов: {stats['conflict_rate']:.2f}%\n\n")
         
         analytics = BookingAnalytics.analyze_booking_patterns(
-            self.booking_system.get_all_bookings()
+            self.booking_system.get_columnar_store()
         )
         
         self.stats_text.insert(tk.END, "3. АНАЛИЗ ПАТТЕРНОВ БРОНИРОВАНИЯ\n")
@@ -474,11 +480,14 @@ class BookingSystemGUI:
                 self.stats_text.insert(tk.END, 
                     f"  Мин/Макс: {metrics['min']*1000:.4f} / "
                     f"{metrics['max']*1000:.4f} мс\n")
+                self.stats_text.insert(tk.END, 
+                    f"  p50/p99: {metrics['p50']*1000:.4f} / "
+                    f"{metrics['p99']*1000:.4f} мс\n")
     
     def generate_markdown_report(self):
         stats = self.booking_system.get_statistics()
         analytics = BookingAnalytics.analyze_booking_patterns(
-            self.booking_system.get_all_bookings()
+            self.booking_system.get_columnar_store()
         )
         performance = self.analyzer.get_performance_summary()
         
@@ -540,6 +549,10 @@ class BookingSystemGUI:
                     f"  Минимальное время: {metrics['min']*1000:.4f} мс\n")
                 self.report_text.insert(tk.END, 
                     f"  Максимальное время: {metrics['max']*1000:.4f} мс\n")
+                self.report_text.insert(tk.END, 
+                    f"  p50 / p90 / p99 / p99.9: {metrics['p50']*1000:.4f} / "
+                    f"{metrics['p90']*1000:.4f} / {metrics['p99']*1000:.4f} / "
+                    f"{metrics['p999']*1000:.4f} мс\n")
                 self.report_text.insert(tk.END, 
                     f"  Общее время: {metrics['total']:.4f} сек\n\n")
         else:
@@ -584,10 +597,7 @@ class BookingSystemGUI:
             }
         ]
         
-        import time
         for booking_data in demo_bookings:
-            start_time = time.time()
-            
             booking = self.booking_system.create_booking(
                 resource_name=booking_data["resource"],
                 start_date=booking_data["start"],
@@ -596,9 +606,6 @@ class BookingSystemGUI:
                 notes=booking_data["notes"]
             )
             
-            duration = time.time() - start_time
-            self.analyzer.record_operation("create_booking", duration)
-            
             if booking:
                 self.booking_system.confirm_booking(booking.id)
         
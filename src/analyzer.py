@@ -1,109 +1,501 @@
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+﻿from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
 from collections import defaultdict, Counter
+from array import array
+import heapq
 import json
+import math
+import os
+import threading
+from time import monotonic_ns, time_ns
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-class PerformanceAnalyzer:
+from booking_system import (
+    BookingStatus, ColumnarBookingStore, ACTIVE_STATUS_CODES, EPOCH, to_epoch_us
+)
+from date_validator import DateValidator
+
+
+US_PER_DAY = 86_400_000_000
+RESOLUTIONS = {'hour': 3_600_000_000, 'minute': 60_000_000}
+STATUSES = list(BookingStatus)
+PATTERN_COLUMNS = ('resources', 'customers', 'statuses', 'starts', 'ends', 'created')
+WINDOW_COLUMNS = ('starts', 'ends', 'resources', 'statuses', 'resource_names')
+
+
+# Значения до 2 ** SUB_BUCKET_BITS наносекунд хранятся точно, дальше каждый
+# интервал [2 ** k, 2 ** (k + 1)) делится на 2 ** (SUB_BUCKET_BITS - 1)
+# равных корзин: относительная ошибка не больше 1 / 2 ** (SUB_BUCKET_BITS - 1)
+SUB_BUCKET_BITS = 7
+MAX_LATENCY_NS = 3_600 * 10 ** 9
+PERCENTILES = {50: 'p50', 90: 'p90', 99: 'p99', 99.9: 'p999'}
+
+
+class LatencyHistogram:
+    # Лог-линейная гистограмма (как HDR Histogram) фиксированного размера:
+    # запись - O(1), память не растет с числом операций. Количество, сумма,
+    # минимум и максимум считаются точно, перцентили - с точностью корзины.
     
     def __init__(self):
-        self.metrics: Dict[str, List[float]] = defaultdict(list)
-        self.events: List[Dict[str, Any]] = []
+        self.buckets = array('q', [0]) * (self._bucket(MAX_LATENCY_NS) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+    
+    @staticmethod
+    def _bucket(value_ns: int) -> int:
+        magnitude = value_ns.bit_length() - SUB_BUCKET_BITS
+        if magnitude <= 0:
+            return value_ns
+        return (magnitude << (SUB_BUCKET_BITS - 1)) + (value_ns >> magnitude)
+    
+    @staticmethod
+    def _bucket_bounds(index: int) -> Tuple[int, int]:
+        if index < 1 << SUB_BUCKET_BITS:
+            return index, index
+        magnitude = (index >> (SUB_BUCKET_BITS - 1)) - 1
+        mantissa = index - (magnitude << (SUB_BUCKET_BITS - 1))
+        return mantissa << magnitude, ((mantissa + 1) << magnitude) - 1
+    
+    def record(self, value_ns: int):
+        value_ns = min(max(value_ns, 0), MAX_LATENCY_NS)
+        self.buckets[self._bucket(value_ns)] += 1
+        if not self.count or value_ns < self.min_ns:
+            self.min_ns = value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+        self.count += 1
+        self.total_ns += value_ns
+    
+    def percentiles(self, percents: Iterable[float] = PERCENTILES) -> Dict[float, int]:
+        # Перцентиль по рангу: середина корзины, в которую попадает
+        # ceil(p% * count)-е значение, в пределах наблюдаемых min и max
+        percents = sorted(percents)
+        result: Dict[float, int] = {}
+        if not self.count:
+            return {percent: 0 for percent in percents}
+        
+        targets = iter(percents)
+        percent = next(targets)
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            if not bucket_count:
+                continue
+            seen += bucket_count
+            while percent is not None and seen >= max(1, math.ceil(percent / 100 * self.count)):
+                low, high = self._bucket_bounds(index)
+                result[percent] = min(max((low + high) // 2, self.min_ns), self.max_ns)
+                percent = next(targets, None)
+            if percent is None:
+                break
+        return result
+    
+    def copy(self) -> 'LatencyHistogram':
+        copy = LatencyHistogram.__new__(LatencyHistogram)
+        copy.__dict__.update(self.__dict__)
+        copy.buckets = array('q', self.buckets)
+        return copy
+    
+    def clear(self):
+        self.__init__()
+
+
+class EventLog:
+    # Кольцевой буфер последних операций фиксированной емкости: метка
+    # monotonic_ns, код операции и длительность в параллельных массивах.
+    # Запись не создает объектов; из каждых sample_every операций
+    # сохраняется одна, имена и даты восстанавливаются только при экспорте.
+    
+    def __init__(self, capacity: int = 10_000, sample_every: int = 1):
+        if capacity < 1:
+            raise ValueError("Емкость журнала событий должна быть положительной")
+        if sample_every < 1:
+            raise ValueError("Шаг выборки событий должен быть положительным")
+        self.capacity = capacity
+        self.sample_every = sample_every
+        self.timestamps = array('q', [0]) * capacity
+        self.durations = array('q', [0]) * capacity
+        self.codes = array('I', [0]) * capacity
+        self.operations: List[str] = []
+        self._codes: Dict[str, int] = {}
+        # Разница между часами time_ns и monotonic_ns для дат в экспорте
+        self.wall_offset_ns = time_ns() - monotonic_ns()
+        self.offered = 0
+        self.written = 0
+    
+    def append(self, operation_name: str, duration_ns: int):
+        self.offered += 1
+        if self.offered % self.sample_every:
+            return
+        code = self._codes.get(operation_name)
+        if code is None:
+            code = self._codes[operation_name] = len(self.operations)
+            self.operations.append(operation_name)
+        slot = self.written % self.capacity
+        self.timestamps[slot] = monotonic_ns()
+        self.durations[slot] = duration_ns
+        self.codes[slot] = code
+        self.written += 1
+    
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+    
+    def __iter__(self) -> Iterator[Tuple[int, str, int]]:
+        # (monotonic_ns, операция, длительность в нс) от старых к новым
+        first = self.written - len(self)
+        for position in range(first, self.written):
+            slot = position % self.capacity
+            yield self.timestamps[slot], self.operations[self.codes[slot]], self.durations[slot]
+    
+    def snapshot(self) -> 'EventLog':
+        copy = EventLog.__new__(EventLog)
+        copy.__dict__.update(self.__dict__)
+        copy.timestamps = array('q', self.timestamps)
+        copy.durations = array('q', self.durations)
+        copy.codes = array('I', self.codes)
+        copy.operations = list(self.operations)
+        copy._codes = dict(self._codes)
+        return copy
+    
+    def export_jsonl(self, destination) -> int:
+        # Построчная запись в путь или открытый текстовый файл;
+        # возвращает число записанных событий
+        if isinstance(destination, (str, os.PathLike)):
+            with open(destination, 'w', encoding='utf-8') as file:
+                return self.export_jsonl(file)
+        
+        exported = 0
+        for timestamp_ns, operation_name, duration_ns in self:
+            wall = datetime.fromtimestamp((timestamp_ns + self.wall_offset_ns) / 1e9)
+            destination.write(json.dumps({
+                'operation': operation_name,
+                'duration_ns': duration_ns,
+                'monotonic_ns': timestamp_ns,
+                'timestamp': wall.isoformat()
+            }, ensure_ascii=False) + '\n')
+            exported += 1
+        return exported
+    
+    def clear(self):
+        self.offered = 0
+        self.written = 0
+
+
+class PerformanceAnalyzer:
+    
+    def __init__(self, max_events: int = 10_000, sample_every: int = 1):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.events = EventLog(max_events, sample_every)
+        # Замеры могут приходить из нескольких потоков сразу
+        self._lock = threading.Lock()
+        # Растет при каждой записи и очистке; по нему экспорт метрик
+        # понимает, что гистограммы не менялись
+        self.version = 0
     
     def record_operation(self, operation_name: str, duration: float):
-        self.metrics[operation_name].append(duration)
-        self.events.append({
-            'operation': operation_name,
-            'duration': duration,
-            'timestamp': datetime.now().isoformat()
-        })
+        self.record_operation_ns(operation_name, round(duration * 1e9))
+    
+    def record_operation_ns(self, operation_name: str, duration_ns: int):
+        with self._lock:
+            histogram = self.histograms.get(operation_name)
+            if histogram is None:
+                histogram = self.histograms[operation_name] = LatencyHistogram()
+            histogram.record(duration_ns)
+            self.events.append(operation_name, duration_ns)
+            self.version += 1
+    
+    def snapshot(self) -> Tuple[int, Dict[str, LatencyHistogram]]:
+        with self._lock:
+            return self.version, {
+                operation: histogram.copy() for operation, histogram in self.histograms.items()
+            }
+    
+    def export_events(self, destination) -> int:
+        # Под блокировкой только копируется буфер, запись идет без нее
+        with self._lock:
+            events = self.events.snapshot()
+        return events.export_jsonl(destination)
     
     def get_average_duration(self, operation_name: str) -> float:
-        durations = self.metrics.get(operation_name, [])
-        return sum(durations) / len(durations) if durations else 0.0
+        # Поля гистограммы читаются под блокировкой, чтобы запись из другого
+        # потока не попала между чтениями count и total_ns
+        with self._lock:
+            histogram = self.histograms.get(operation_name)
+            if histogram is None or not histogram.count:
+                return 0.0
+            return histogram.total_ns / histogram.count / 1e9
     
     def get_max_duration(self, operation_name: str) -> float:
-        durations = self.metrics.get(operation_name, [])
-        return max(durations) if durations else 0.0
+        with self._lock:
+            histogram = self.histograms.get(operation_name)
+            return histogram.max_ns / 1e9 if histogram is not None else 0.0
     
     def get_min_duration(self, operation_name: str) -> float:
-        durations = self.metrics.get(operation_name, [])
-        return min(durations) if durations else 0.0
+        with self._lock:
+            histogram = self.histograms.get(operation_name)
+            return histogram.min_ns / 1e9 if histogram is not None else 0.0
+    
+    def get_percentile(self, operation_name: str, percent: float) -> float:
+        # Перцентиль считается по копии корзин вне блокировки
+        with self._lock:
+            histogram = self.histograms.get(operation_name)
+            if histogram is None:
+                return 0.0
+            histogram = histogram.copy()
+        return histogram.percentiles((percent,))[percent] / 1e9
     
     def get_performance_summary(self) -> Dict[str, Dict[str, float]]:
+        # Сводка строится по копиям, снятым под блокировкой: словарь и
+        # корзины могут меняться из других потоков во время обхода
+        _, histograms = self.snapshot()
         summary = {}
-        for operation, durations in self.metrics.items():
-            if durations:
+        for operation, histogram in histograms.items():
+            if histogram.count:
                 summary[operation] = {
-                    'count': len(durations),
-                    'average': sum(durations) / len(durations),
-                    'min': min(durations),
-                    'max': max(durations),
-                    'total': sum(durations)
+                    'count': histogram.count,
+                    'average': histogram.total_ns / histogram.count / 1e9,
+                    'min': histogram.min_ns / 1e9,
+                    'max': histogram.max_ns / 1e9,
+                    'total': histogram.total_ns / 1e9
                 }
+                for percent, value in histogram.percentiles().items():
+                    summary[operation][PERCENTILES[percent]] = value / 1e9
         return summary
     
     def clear_metrics(self):
-        self.metrics.clear()
-        self.events.clear()
+        with self._lock:
+            self.histograms.clear()
+            self.events.clear()
+            self.version += 1
 
 
 class BookingAnalytics:
     
     @staticmethod
-    def analyze_booking_patterns(bookings: List[Any]) -> Dict[str, Any]:
-        if not bookings:
+    def analyze_booking_patterns(bookings: Any) -> Dict[str, Any]:
+        store = BookingAnalytics._as_columns(bookings)
+        columns = store.columns(*PATTERN_COLUMNS)
+        total = len(columns[0])
+        if not total:
             return {
                 'total_bookings': 0,
                 'message': 'Нет данных для анализа'
             }
         
-        resource_counter = Counter(b.resource_name for b in bookings)
-        most_popular_resource = resource_counter.most_common(1)[0] if resource_counter else None
+        if np is not None:
+            patterns = BookingAnalytics._numpy_patterns(store, *columns)
+        else:
+            patterns = BookingAnalytics._python_patterns(*columns)
         
-        durations = [b.duration_days() for b in bookings]
-        avg_duration = sum(durations) / len(durations) if durations else 0
+        popular_code, popular_count = patterns['most_popular_resource']
+        busiest_day, busiest_count = patterns['busiest_day']
         
-        status_counter = Counter(b.status.value for b in bookings)
-
-        creation_dates = [b.created_at.date() for b in bookings]
-        date_counter = Counter(creation_dates)
-        busiest_day = date_counter.most_common(1)[0] if date_counter else None
+        return {
+            'total_bookings': total,
+            'unique_resources': patterns['unique_resources'],
+            'unique_customers': patterns['unique_customers'],
+            'most_popular_resource': {
+                'name': store.resource_names[popular_code],
+                'count': popular_count
+            },
+            'average_duration_days': round(patterns['duration_sum'] / total, 2),
+            'min_duration_days': patterns['min_duration'],
+            'max_duration_days': patterns['max_duration'],
+            'status_distribution': {
+                STATUSES[code].value: count
+                for code, count in patterns['status_counts']
+            },
+            'busiest_day': {
+                'date': (EPOCH + timedelta(days=busiest_day)).date().isoformat(),
+                'bookings': busiest_count
+            }
+        }
+    
+    @staticmethod
+    def pattern_partials(bookings: Any) -> Dict[str, Any]:
+        # Частичные итоги одного шарда; счетчики хранят [количество, первый ID],
+        # чтобы при слиянии равенство решалось как в общем списке.
+        store = BookingAnalytics._as_columns(bookings)
+        ids, *columns = store.columns('ids', *PATTERN_COLUMNS)
+        resources: Dict[str, List[int]] = {}
+        statuses: Dict[str, List[int]] = {}
+        days: Dict[int, List[int]] = {}
+        customers = set()
+        durations = []
+        for booking_id, resource, customer, status, start, end, created in zip(ids, *columns):
+            resources.setdefault(store.resource_names[resource], [0, booking_id])[0] += 1
+            statuses.setdefault(STATUSES[status].value, [0, booking_id])[0] += 1
+            days.setdefault(created // US_PER_DAY, [0, booking_id])[0] += 1
+            customers.add(store.customer_names[customer])
+            durations.append((end - start) // US_PER_DAY)
         
         return {
-            'total_bookings': len(bookings),
-            'unique_resources': len(resource_counter),
-            'unique_customers': len(set(b.customer_name for b in bookings)),
+            'total_bookings': len(ids),
+            'resources': resources,
+            'customers': customers,
+            'statuses': statuses,
+            'days': days,
+            'duration_sum': sum(durations),
+            'min_duration': min(durations, default=None),
+            'max_duration': max(durations, default=None)
+        }
+    
+    @staticmethod
+    def merge_pattern_partials(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+        total = sum(p['total_bookings'] for p in partials)
+        if not total:
+            return {
+                'total_bookings': 0,
+                'message': 'Нет данных для анализа'
+            }
+        
+        partials = [p for p in partials if p['total_bookings']]
+        resources = BookingAnalytics._merge_counts(p['resources'] for p in partials)
+        statuses = BookingAnalytics._merge_counts(p['statuses'] for p in partials)
+        days = BookingAnalytics._merge_counts(p['days'] for p in partials)
+        customers = set().union(*(p['customers'] for p in partials))
+        
+        def leader(counts):
+            return min(counts.items(), key=lambda item: (-item[1][0], item[1][1]))
+        
+        popular_name, (popular_count, _) = leader(resources)
+        busiest_day, (busiest_count, _) = leader(days)
+        
+        return {
+            'total_bookings': total,
+            'unique_resources': len(resources),
+            'unique_customers': len(customers),
             'most_popular_resource': {
-                'name': most_popular_resource[0],
-                'count': most_popular_resource[1]
-            } if most_popular_resource else None,
-            'average_duration_days': round(avg_duration, 2),
-            'min_duration_days': min(durations) if durations else 0,
-            'max_duration_days': max(durations) if durations else 0,
-            'status_distribution': dict(status_counter),
+                'name': popular_name,
+                'count': popular_count
+            },
+            'average_duration_days': round(sum(p['duration_sum'] for p in partials) / total, 2),
+            'min_duration_days': min(p['min_duration'] for p in partials),
+            'max_duration_days': max(p['max_duration'] for p in partials),
+            'status_distribution': {
+                status: count
+                for status, (count, _) in sorted(statuses.items(), key=lambda item: item[1][1])
+            },
             'busiest_day': {
-                'date': busiest_day[0].isoformat(),
-                'bookings': busiest_day[1]
-            } if busiest_day else None
+                'date': (EPOCH + timedelta(days=busiest_day)).date().isoformat(),
+                'bookings': busiest_count
+            }
+        }
+    
+    @staticmethod
+    def _merge_counts(parts: Iterable[Dict[Any, List[int]]]) -> Dict[Any, List[int]]:
+        merged: Dict[Any, List[int]] = {}
+        for part in parts:
+            for key, (count, first_id) in part.items():
+                entry = merged.get(key)
+                if entry is None:
+                    merged[key] = [count, first_id]
+                else:
+                    entry[0] += count
+                    entry[1] = min(entry[1], first_id)
+        return merged
+    
+    @staticmethod
+    def _as_columns(bookings: Any) -> ColumnarBookingStore:
+        if isinstance(bookings, ColumnarBookingStore):
+            return bookings
+        return ColumnarBookingStore.from_bookings(bookings)
+    
+    @staticmethod
+    def _numpy_patterns(store: ColumnarBookingStore, *columns: array) -> Dict[str, Any]:
+        # Столбцы - копии из store.columns(), представления поверх них
+        # не держат буферы самого хранилища
+        resources, customers, statuses, starts, ends, created = (
+            np.frombuffer(column, dtype=column.typecode) for column in columns
+        )
+        
+        resource_counts = np.bincount(resources, minlength=len(store.resource_names))
+        customer_counts = np.bincount(customers, minlength=len(store.customer_names))
+        popular = int(np.argmax(resource_counts))
+        
+        durations = (ends - starts) // US_PER_DAY
+        
+        codes, first_rows = np.unique(statuses, return_index=True)
+        status_totals = np.bincount(statuses.astype(np.intp))
+        status_counts = [
+            (int(code), int(status_totals[code]))
+            for code in codes[np.argsort(first_rows)]
+        ]
+        
+        days, first_rows, day_counts = np.unique(
+            created // US_PER_DAY, return_index=True, return_counts=True
+        )
+        busiest = int(np.argmin(np.where(
+            day_counts == day_counts.max(), first_rows, len(created)
+        )))
+        
+        return {
+            'unique_resources': int(np.count_nonzero(resource_counts)),
+            'unique_customers': int(np.count_nonzero(customer_counts)),
+            'most_popular_resource': (popular, int(resource_counts[popular])),
+            'duration_sum': int(durations.sum()),
+            'min_duration': int(durations.min()),
+            'max_duration': int(durations.max()),
+            'status_counts': status_counts,
+            'busiest_day': (int(days[busiest]), int(day_counts[busiest]))
+        }
+    
+    @staticmethod
+    def _python_patterns(
+        resources: array,
+        customers: array,
+        statuses: array,
+        starts: array,
+        ends: array,
+        created: array
+    ) -> Dict[str, Any]:
+        resource_counter = Counter(resources)
+        durations = [
+            (end - start) // US_PER_DAY
+            for start, end in zip(starts, ends)
+        ]
+        day_counter = Counter(stamp // US_PER_DAY for stamp in created)
+        
+        return {
+            'unique_resources': len(resource_counter),
+            'unique_customers': len(set(customers)),
+            'most_popular_resource': resource_counter.most_common(1)[0],
+            'duration_sum': sum(durations),
+            'min_duration': min(durations),
+            'max_duration': max(durations),
+            'status_counts': list(Counter(statuses).items()),
+            'busiest_day': day_counter.most_common(1)[0]
         }
     
     @staticmethod
     def analyze_conflicts(bookings: List[Any]) -> Dict[str, Any]:
-        conflicts_by_resource = defaultdict(int)
-        total_conflicts = 0
+        intervals_by_resource = defaultdict(list)
+        active_bookings = (b for b in bookings if b.is_active())
+        for position, booking in enumerate(active_bookings):
+            intervals_by_resource[booking.resource_name].append(
+                (booking.start_date, booking.end_date, position)
+            )
         
-        active_bookings = [b for b in bookings if b.is_active()]
+        found = []
+        for resource, intervals in intervals_by_resource.items():
+            count, first_position = BookingAnalytics._sweep_overlaps(intervals)
+            if count:
+                found.append((first_position, resource, count))
         
-        for i, booking1 in enumerate(active_bookings):
-            for booking2 in active_bookings[i + 1:]:
-                if booking1.overlaps_with(booking2):
-                    conflicts_by_resource[booking1.resource_name] += 1
-                    total_conflicts += 1
+        # Порядок ресурсов совпадает с порядком первого обнаруженного конфликта
+        # при попарном сравнении активных бронирований.
+        found.sort()
+        conflicts_by_resource = {resource: count for _, resource, count in found}
+        total_conflicts = sum(conflicts_by_resource.values())
         
         return {
             'total_conflicts': total_conflicts,
-            'conflicts_by_resource': dict(conflicts_by_resource),
+            'conflicts_by_resource': conflicts_by_resource,
             'conflict_prone_resources': sorted(
                 conflicts_by_resource.items(),
                 key=lambda x: x[1],
@@ -111,41 +503,202 @@ class BookingAnalytics:
             )[:5] if conflicts_by_resource else []
         }
     
+    @staticmethod
+    def merge_conflict_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Шарды владеют непересекающимися наборами ресурсов
+        conflicts_by_resource = {}
+        for result in results:
+            conflicts_by_resource.update(result['conflicts_by_resource'])
+        
+        return {
+            'total_conflicts': sum(conflicts_by_resource.values()),
+            'conflicts_by_resource': conflicts_by_resource,
+            'conflict_prone_resources': sorted(
+                conflicts_by_resource.items(),
+                key=lambda x: x[1],
+                reverse=True
+            )[:5] if conflicts_by_resource else []
+        }
+    
+    @staticmethod
+    def _sweep_overlaps(intervals: List[Tuple[datetime, datetime, int]]) -> Tuple[int, int]:
+        intervals.sort()
+        open_ends: List[datetime] = []
+        pairs = 0
+        first_position = None
+        max_end = None
+        
+        for i, (start, end, position) in enumerate(intervals):
+            while open_ends and open_ends[0] <= start:
+                heapq.heappop(open_ends)
+            pairs += len(open_ends)
+            heapq.heappush(open_ends, end)
+            
+            overlaps_previous = max_end is not None and max_end > start
+            overlaps_next = i + 1 < len(intervals) and intervals[i + 1][0] < end
+            if (overlaps_previous or overlaps_next) and (
+                    first_position is None or position < first_position):
+                first_position = position
+            if max_end is None or end > max_end:
+                max_end = end
+        
+        return pairs, first_position
+    
     @staticmethod
     def generate_utilization_report(
-        bookings: List[Any],
+        bookings: Any,
         start_date: datetime,
-        end_date: datetime
+        end_date: datetime,
+        resolution: str = 'hour'
     ) -> Dict[str, Any]:
-        total_days = (end_date - start_date).days
-        if total_days <= 0:
+        if end_date <= start_date:
             return {'error': 'Некорректный период'}
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Неизвестное разрешение: {resolution}")
+        unit = RESOLUTIONS[resolution]
         
-        resources = defaultdict(list)
-        for booking in bookings:
-            if booking.is_active():
-                resources[booking.resource_name].append(booking)
+        window_start, window_end = to_epoch_us(start_date), to_epoch_us(end_date)
+        resource_names, rows = BookingAnalytics._window_rows(bookings, window_start, window_end)
+        # Строки идут в порядке начала, поэтому интервалы каждого ресурса
+        # уже отсортированы для слияния
+        intervals: Dict[int, List[Tuple[int, int]]] = {}
+        for start, end, code in rows:
+            intervals.setdefault(code, []).append((start, end))
         
+        period = window_end - window_start
         utilization = {}
-        for resource, resource_bookings in resources.items():
-            booked_days = sum(b.duration_days() for b in resource_bookings)
-            utilization[resource] = {
-                'total_bookings': len(resource_bookings),
-                'total_booked_days': booked_days,
-                'utilization_rate': round(
-                    (booked_days / total_days) * 100, 2
-                )
+        for code in sorted(intervals):
+            booked = BookingAnalytics._booked_time(intervals[code], window_start, window_end)
+            utilization[resource_names[code]] = {
+                'total_bookings': len(intervals[code]),
+                'booked_units': round(booked / unit, 2),
+                'total_booked_days': round(booked / US_PER_DAY, 2),
+                'utilization_rate': round(booked / period * 100, 2)
             }
         
         return {
-            'period_days': total_days,
-            'resources_analyzed': len(resources),
+            'period_days': (end_date - start_date).days,
+            'resolution': resolution,
+            'period_units': round(period / unit, 2),
+            'resources_analyzed': len(utilization),
+            'resource_utilization': utilization,
+            'average_utilization': round(
+                sum(u['utilization_rate'] for u in utilization.values()) / 
+                len(utilization), 2
+            ) if utilization else 0
+        }
+    
+    @staticmethod
+    def _window_rows(
+        bookings: Any,
+        window_start: int,
+        window_end: int
+    ) -> Tuple[List[str], List[Tuple[int, int, int]]]:
+        # Активные строки, пересекающие окно, в порядке начала: (начало,
+        # конец, код ресурса) и имена ресурсов по кодам. Хранилище отдает
+        # индекс вместе с копиями столбцов, и сам индекс окупается на
+        # повторных отчетах; список бронирований сначала фильтруется по
+        # окну, и сортируются только попавшие в него строки
+        if isinstance(bookings, ColumnarBookingStore):
+            index, columns = bookings.indexed_columns(*WINDOW_COLUMNS)
+            positions = index.overlapping(window_start, window_end)
+        else:
+            store = ColumnarBookingStore.from_bookings(
+                booking for booking in bookings
+                if to_epoch_us(booking.start_date) < window_end
+                and to_epoch_us(booking.end_date) > window_start
+            )
+            columns = tuple(getattr(store, name) for name in WINDOW_COLUMNS)
+            positions = sorted(range(len(store)), key=store.starts.__getitem__)
+        starts, ends, resources, statuses, resource_names = columns
+        return resource_names, [
+            (starts[row], ends[row], resources[row])
+            for row in positions
+            if statuses[row] in ACTIVE_STATUS_CODES
+        ]
+    
+    @staticmethod
+    def _booked_time(
+        intervals: List[Tuple[int, int]],
+        window_start: int,
+        window_end: int
+    ) -> int:
+        # Суммарное время в микросекундах: интервалы (по возрастанию начала)
+        # обрезаются окном, пересекающиеся сливаются, чтобы время не
+        # считалось дважды
+        booked = 0
+        merged_start = merged_end = None
+        for start, end in intervals:
+            start = max(start, window_start)
+            end = min(end, window_end)
+            if merged_end is not None and start <= merged_end:
+                merged_end = max(merged_end, end)
+                continue
+            if merged_end is not None:
+                booked += merged_end - merged_start
+            merged_start, merged_end = start, end
+        if merged_end is not None:
+            booked += merged_end - merged_start
+        return booked
+    
+    @staticmethod
+    def merge_utilization_reports(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+        for report in reports:
+            if 'error' in report:
+                return report
+        
+        utilization = {}
+        for report in reports:
+            utilization.update(report['resource_utilization'])
+        
+        return {
+            'period_days': reports[0]['period_days'],
+            'resolution': reports[0]['resolution'],
+            'period_units': reports[0]['period_units'],
+            'resources_analyzed': len(utilization),
             'resource_utilization': utilization,
             'average_utilization': round(
                 sum(u['utilization_rate'] for u in utilization.values()) / 
                 len(utilization), 2
             ) if utilization else 0
         }
+    
+    @staticmethod
+    def iter_period_utilization(
+        bookings: Any,
+        start_date: datetime,
+        end_date: datetime,
+        unit: str = 'day'
+    ) -> Iterator[Dict[str, Any]]:
+        # Загрузка ресурсов по дням, неделям или месяцам периода. Блоки
+        # выдаются по одному: в памяти только бронирования, пересекающие
+        # текущий блок, поэтому длина периода на память не влияет.
+        window_start, window_end = to_epoch_us(start_date), to_epoch_us(end_date)
+        resource_names, rows = BookingAnalytics._window_rows(bookings, window_start, window_end)
+        
+        pos, current = 0, []
+        for chunk_start, chunk_end in DateValidator.iter_date_chunks(start_date, end_date, unit):
+            lo, hi = to_epoch_us(chunk_start), to_epoch_us(chunk_end)
+            while pos < len(rows) and rows[pos][0] < hi:
+                current.append(rows[pos])
+                pos += 1
+            current = [row for row in current if row[1] > lo]
+            
+            intervals: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+            for start, end, code in current:
+                intervals[code].append((start, end))
+            booked = {
+                code: BookingAnalytics._booked_time(part, lo, hi)
+                for code, part in intervals.items()
+            }
+            yield {
+                'period_start': chunk_start,
+                'period_end': chunk_end,
+                'resource_utilization': {
+                    resource_names[code]: round(time / (hi - lo) * 100, 2)
+                    for code, time in sorted(booked.items())
+                }
+            }
 
 
 class ReportGenerator:
@@ -199,9 +752,10 @@ class ReportGenerator:
                 report += f"""
 ### {operation}
 - **Выполнено операций:** {metrics.get('count', 0)}
-- **Среднее время:** {metrics.get('average', 0):.4f} сек
-- **Минимальное время:** {metrics.get('min', 0):.4f} сек
-- **Максимальное время:** {metrics.get('max', 0):.4f} сек
+- **Среднее время:** {metrics.get('average', 0) * 1000:.3f} мс
+- **Минимальное время:** {metrics.get('min', 0) * 1000:.3f} мс
+- **Максимальное время:** {metrics.get('max', 0) * 1000:.3f} мс
+- **Перцентили (p50 / p90 / p99 / p99.9):** {metrics.get('p50', 0) * 1000:.3f} / {metrics.get('p90', 0) * 1000:.3f} / {metrics.get('p99', 0) * 1000:.3f} / {metrics.get('p999', 0) * 1000:.3f} мс
 """
         
         report += """
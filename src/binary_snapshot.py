@@ -0,0 +1,357 @@
+import mmap
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from booking_system import (
+    Booking, BookingStatus, BookingSystem, STATUS_CODES, from_epoch_us, to_epoch_us
+)
+from interval_index import IntervalIndex
+from persistence import fsync_directory
+
+
+MAGIC = b'BKSNAP01'
+VERSION = 2
+
+# magic, format version, next_id, total_attempts, conflict_count, generation,
+# record_count, status counts, offsets of sections and sizes of string tables
+HEADER = struct.Struct('<8sHxxxxxxqqqqQ4Q9Q')
+# id, start, end, max end up to this record within the resource,
+# created_at, booking version, resource, customer, notes, status
+RECORD = struct.Struct('<qqqqqqIIIB3x')
+ID_ENTRY = struct.Struct('<I')
+OFFSET = struct.Struct('<Q')
+RANGE = struct.Struct('<QQ')
+
+STATUSES = list(BookingStatus)
+ACTIVE_STATUSES = (BookingStatus.PENDING, BookingStatus.CONFIRMED)
+
+
+def write_binary_snapshot(system: BookingSystem, path: str):
+    # Счетчики и бронирования берутся одним снимком; next_id - из системы,
+    # а не по максимальному ID: у шардов ID идут с шагом, а после отмен
+    # и очистки максимальный ID может быть меньше выданных ранее
+    state = system.export_state()
+    bookings = [Booking.from_dict(data) for data in state['bookings']]
+
+    resources = sorted({b.resource_name for b in bookings})
+    customers = sorted({b.customer_name for b in bookings})
+    resource_codes = {name: i for i, name in enumerate(resources)}
+    customer_codes = {name: i for i, name in enumerate(customers)}
+    notes_codes: Dict[str, int] = {}
+    for booking in bookings:
+        notes_codes.setdefault(booking.notes, len(notes_codes))
+
+    ordered = sorted(bookings, key=lambda b: (resource_codes[b.resource_name], b.start_date))
+    records = bytearray()
+    ranges = [[0, 0] for _ in resources]
+    status_counts = [0] * len(STATUSES)
+    max_end = None
+    previous_resource = None
+    for position, booking in enumerate(ordered):
+        resource = resource_codes[booking.resource_name]
+        end = to_epoch_us(booking.end_date)
+        if resource != previous_resource:
+            ranges[resource][0] = position
+            max_end = end
+            previous_resource = resource
+        max_end = max(max_end, end)
+        ranges[resource][1] += 1
+        records += RECORD.pack(
+            booking.id,
+            to_epoch_us(booking.start_date),
+            end,
+            max_end,
+            to_epoch_us(booking.created_at),
+            booking.version,
+            resource,
+            customer_codes[booking.customer_name],
+            notes_codes[booking.notes],
+            STATUS_CODES[booking.status]
+        )
+        status_counts[STATUS_CODES[booking.status]] += 1
+
+    positions = sorted(range(len(ordered)), key=lambda p: ordered[p].id)
+    id_index = b''.join(ID_ENTRY.pack(p) for p in positions)
+    resource_dir = b''.join(RANGE.pack(first, count) for first, count in ranges)
+
+    sections = [
+        records,
+        id_index,
+        resource_dir,
+        _pack_strings(resources),
+        _pack_strings(customers),
+        _pack_strings(list(notes_codes))
+    ]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        state['next_id'],
+        state['total_attempts'],
+        state['conflict_count'],
+        state['generation'],
+        len(ordered),
+        *status_counts,
+        *offsets,
+        len(resources),
+        len(customers),
+        len(notes_codes)
+    )
+    # Текущий снимок заменяется только готовым файлом: обрыв записи не
+    # оставит усеченный файл, который потом будет открыт через mmap
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for section in sections:
+            f.write(section)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def _pack_strings(strings: List[str]) -> bytes:
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = [0]
+    for item in encoded:
+        offsets.append(offsets[-1] + len(item))
+    return b''.join(OFFSET.pack(o) for o in offsets) + b''.join(encoded)
+
+
+class _StringTable:
+    def __init__(self, buffer: mmap.mmap, offset: int, count: int):
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+        self._blob = offset + OFFSET.size * (count + 1)
+        self._cache: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> str:
+        value = self._cache.get(index)
+        if value is None:
+            start = OFFSET.unpack_from(self._buffer, self._offset + OFFSET.size * index)[0]
+            end = OFFSET.unpack_from(self._buffer, self._offset + OFFSET.size * (index + 1))[0]
+            value = self._buffer[self._blob + start:self._blob + end].decode('utf-8')
+            self._cache[index] = value
+        return value
+
+    def find(self, value: str) -> Optional[int]:
+        index = bisect_left(range(self._count), value, key=self.__getitem__)
+        if index < self._count and self[index] == value:
+            return index
+        return None
+
+
+class MappedSnapshotStorage:
+    # Снимок открывается через mmap; объекты Booking создаются только при
+    # обращении к записи. Новые бронирования и смена статусов хранятся в памяти.
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = HEADER.unpack_from(self._buffer, 0)
+        if header[0] != MAGIC or header[1] != VERSION:
+            raise ValueError(f"Неподдерживаемый формат снимка: {path}")
+        (self._counters, self._count, self._status_counts, offsets,
+         sizes) = (header[2:6], header[6], list(header[7:11]), header[11:17], header[17:20])
+        self._records, self._id_index, self._resource_dir = offsets[:3]
+        self._resources = _StringTable(self._buffer, offsets[3], sizes[0])
+        self._customers = _StringTable(self._buffer, offsets[4], sizes[1])
+        self._notes = _StringTable(self._buffer, offsets[5], sizes[2])
+
+        self._overrides: Dict[int, Tuple[BookingStatus, int]] = {}
+        self._new: Dict[int, Booking] = {}
+        self._new_active: Dict[str, IntervalIndex] = {}
+        self._new_resources: Dict[str, int] = {}
+        self._new_customers: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._count + len(self._new)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        yield
+
+    def insert(self, booking: Booking):
+        self._new[booking.id] = booking
+        self._status_counts[STATUS_CODES[booking.status]] += 1
+        if self._resources.find(booking.resource_name) is None:
+            self._new_resources[booking.resource_name] = 1
+        if self._customers.find(booking.customer_name) is None:
+            self._new_customers[booking.customer_name] = 1
+        if booking.is_active():
+            index = self._new_active.setdefault(booking.resource_name, IntervalIndex())
+            index.add(booking.start_date, booking.end_date, booking)
+
+    def update_status(self, booking_id: int, status: BookingStatus, version: int):
+        booking = self._new.get(booking_id)
+        if booking is not None:
+            old_status = booking.status
+            if booking.is_active() and status not in ACTIVE_STATUSES:
+                self._new_active[booking.resource_name].remove(booking.start_date, booking)
+            booking.status = status
+            booking.version = version
+        else:
+            position = self._find_position(booking_id)
+            if position is None:
+                return
+            old_status = self._status_at(position)
+            self._overrides[booking_id] = (status, version)
+        self._status_counts[STATUS_CODES[old_status]] -= 1
+        self._status_counts[STATUS_CODES[status]] += 1
+
+    def get(self, booking_id: int) -> Optional[Booking]:
+        booking = self._new.get(booking_id)
+        if booking is not None:
+            return booking
+        position = self._find_position(booking_id)
+        return self._materialize(position) if position is not None else None
+
+    def find_overlapping(
+        self,
+        resource_name: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Booking]:
+        found = []
+        first, count = self._resource_range(resource_name)
+        if count:
+            start_us = to_epoch_us(start_date)
+            end_us = to_epoch_us(end_date)
+            positions = range(first, first + count)
+            # Конец записей ресурса по префиксу не убывает, начало отсортировано
+            lo = first + bisect_right(positions, start_us, key=self._max_end_at)
+            hi = first + bisect_left(positions, end_us, key=self._start_at)
+            for position in range(lo, hi):
+                record = RECORD.unpack_from(self._buffer, self._record_offset(position))
+                if record[2] > start_us and self._status_at(position, record) in ACTIVE_STATUSES:
+                    found.append(self._materialize(position, record))
+
+        index = self._new_active.get(resource_name)
+        if index is not None:
+            found.extend(index.overlapping(start_date, end_date))
+            found.sort(key=lambda b: b.start_date)
+        return found
+
+    def all(self) -> List[Booking]:
+        return self._ordered(lambda position: True) + list(self._new.values())
+
+    def active(self) -> List[Booking]:
+        return (self._ordered(lambda position: self._status_at(position) in ACTIVE_STATUSES) +
+                [b for b in self._new.values() if b.is_active()])
+
+    def by_resource(self, resource_name: str) -> List[Booking]:
+        first, count = self._resource_range(resource_name)
+        bookings = [self._materialize(p) for p in range(first, first + count)]
+        bookings.sort(key=lambda b: b.id)
+        return bookings + [b for b in self._new.values() if b.resource_name == resource_name]
+
+    def status_counts(self) -> Dict[BookingStatus, int]:
+        return {status: self._status_counts[code] for code, status in enumerate(STATUSES)}
+
+    def distinct_counts(self) -> Tuple[int, int]:
+        return (len(self._resources) + len(self._new_resources),
+                len(self._customers) + len(self._new_customers))
+
+    def load_counters(self) -> Optional[Tuple[int, int, int, int]]:
+        return self._counters
+
+    def save_counters(
+        self,
+        next_id: int,
+        total_attempts: int,
+        conflict_count: int,
+        generation: int
+    ):
+        self._counters = (next_id, total_attempts, conflict_count, generation)
+
+    def clear(self):
+        self._count = 0
+        self._status_counts = [0] * len(STATUSES)
+        self._resources = _StringTable(self._buffer, 0, 0)
+        self._customers = _StringTable(self._buffer, 0, 0)
+        self._counters = None
+        self._overrides.clear()
+        self._new.clear()
+        self._new_active.clear()
+        self._new_resources.clear()
+        self._new_customers.clear()
+
+    def close(self):
+        self._buffer.close()
+        self._file.close()
+
+    def _record_offset(self, position: int) -> int:
+        return self._records + RECORD.size * position
+
+    def _position_at(self, index: int) -> int:
+        return ID_ENTRY.unpack_from(self._buffer, self._id_index + ID_ENTRY.size * index)[0]
+
+    def _id_at(self, index: int) -> int:
+        return struct.unpack_from('<q', self._buffer, self._record_offset(self._position_at(index)))[0]
+
+    def _start_at(self, position: int) -> int:
+        return struct.unpack_from('<q', self._buffer, self._record_offset(position) + 8)[0]
+
+    def _max_end_at(self, position: int) -> int:
+        return struct.unpack_from('<q', self._buffer, self._record_offset(position) + 24)[0]
+
+    def _find_position(self, booking_id: int) -> Optional[int]:
+        index = bisect_left(range(self._count), booking_id, key=self._id_at)
+        if index < self._count and self._id_at(index) == booking_id:
+            return self._position_at(index)
+        return None
+
+    def _resource_range(self, resource_name: str) -> Tuple[int, int]:
+        code = self._resources.find(resource_name)
+        if code is None:
+            return 0, 0
+        return RANGE.unpack_from(self._buffer, self._resource_dir + RANGE.size * code)
+
+    def _status_at(self, position: int, record: Optional[tuple] = None) -> BookingStatus:
+        if record is None:
+            record = RECORD.unpack_from(self._buffer, self._record_offset(position))
+        override = self._overrides.get(record[0])
+        return override[0] if override is not None else STATUSES[record[9]]
+
+    def _ordered(self, predicate) -> List[Booking]:
+        bookings = []
+        for index in range(self._count):
+            position = self._position_at(index)
+            if predicate(position):
+                bookings.append(self._materialize(position))
+        return bookings
+
+    def _materialize(self, position: int, record: Optional[tuple] = None) -> Booking:
+        if record is None:
+            record = RECORD.unpack_from(self._buffer, self._record_offset(position))
+        status, version = self._overrides.get(record[0], (STATUSES[record[9]], record[5]))
+        return Booking(
+            id=record[0],
+            resource_name=self._resources[record[6]],
+            start_date=from_epoch_us(record[1]),
+            end_date=from_epoch_us(record[2]),
+            customer_name=self._customers[record[7]],
+            status=status,
+            notes=self._notes[record[8]],
+            created_at=from_epoch_us(record[4]),
+            version=version
+        )
+
+
+def open_binary_snapshot(path: str, **system_options) -> BookingSystem:
+    return BookingSystem(storage=MappedSnapshotStorage(path), **system_options)
@@ -1,8 +1,17 @@
-﻿from datetime import datetime
-from typing import List, Optional, Dict
+﻿from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Iterable, Set, Tuple
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager, nullcontext
+from array import array
+import threading
+import weakref
 from dataclasses import dataclass, field
 from enum import Enum
 
+from date_validator import ConflictChecker
+from gap_index import FreeGapIndex
+from interval_index import IntervalIndex, TimeRangeIndex
+
 
 class BookingStatus(Enum):
     PENDING = "pending"
@@ -11,7 +20,7 @@ class BookingStatus(Enum):
     COMPLETED = "completed"
 
 
-@dataclass
+@dataclass(slots=True, weakref_slot=True)
 class Booking:
     id: int
     resource_name: str
@@ -21,6 +30,7 @@ class Booking:
     status: BookingStatus = BookingStatus.PENDING
     notes: str = ""
     created_at: datetime = field(default_factory=datetime.now)
+    version: int = 0
     
     def __post_init__(self):
         if self.start_date >= self.end_date:
@@ -49,14 +59,203 @@ class Booking:
                 f"с {self.start_date.strftime('%Y-%m-%d')} "
                 f"по {self.end_date.strftime('%Y-%m-%d')} "
                 f"[{self.status.value}]")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'resource_name': self.resource_name,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'customer_name': self.customer_name,
+            'status': self.status.value,
+            'notes': self.notes,
+            'created_at': self.created_at.isoformat(),
+            'version': self.version
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Booking':
+        return cls(
+            id=data['id'],
+            resource_name=data['resource_name'],
+            start_date=datetime.fromisoformat(data['start_date']),
+            end_date=datetime.fromisoformat(data['end_date']),
+            customer_name=data['customer_name'],
+            status=BookingStatus(data['status']),
+            notes=data.get('notes', ""),
+            created_at=datetime.fromisoformat(data['created_at']),
+            version=data.get('version', 0)
+        )
 
 
-class BookingSystem:
+@dataclass
+class BookingResult:
+    booking: Optional[Booking] = None
+    conflicts: List[int] = field(default_factory=list)
+    
+    @property
+    def created(self) -> bool:
+        return self.booking is not None
+
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+STATUS_CODES = {status: code for code, status in enumerate(BookingStatus)}
+ACTIVE_STATUS_CODES = (
+    STATUS_CODES[BookingStatus.PENDING],
+    STATUS_CODES[BookingStatus.CONFIRMED]
+)
+
+
+def to_epoch_us(date: datetime) -> int:
+    return (date - EPOCH) // MICROSECOND
+
+
+def from_epoch_us(value: int) -> datetime:
+    return EPOCH + timedelta(microseconds=value)
+
+
+class ColumnarBookingStore:
     def __init__(self):
+        # Столбцы дописываются под блокировкой; читатели получают копии
+        # через columns(), поэтому буферы живых массивов наружу не отдаются
+        # и append может их расширять
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        self.ids = array('q')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.created = array('q')
+        self.resources = array('i')
+        self.customers = array('i')
+        self.statuses = array('b')
+        self.resource_names: List[str] = []
+        self.customer_names: List[str] = []
+        self._resource_codes: Dict[str, int] = {}
+        self._customer_codes: Dict[str, int] = {}
+        self._rows: Dict[int, int] = {}
+        self._time_index: Optional[TimeRangeIndex] = None
+    
+    @classmethod
+    def from_bookings(cls, bookings: Iterable[Booking]) -> 'ColumnarBookingStore':
+        # Хранилище еще никому не видно, блокировка не нужна
+        store = cls()
+        for booking in bookings:
+            store._append(booking)
+        return store
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def append(self, booking: Booking):
+        with self._lock:
+            self._append(booking)
+    
+    def _append(self, booking: Booking):
+        self._rows[booking.id] = len(self.ids)
+        self.ids.append(booking.id)
+        self.starts.append(to_epoch_us(booking.start_date))
+        self.ends.append(to_epoch_us(booking.end_date))
+        self.created.append(to_epoch_us(booking.created_at))
+        self.resources.append(
+            self._code(booking.resource_name, self._resource_codes, self.resource_names))
+        self.customers.append(
+            self._code(booking.customer_name, self._customer_codes, self.customer_names))
+        self.statuses.append(STATUS_CODES[booking.status])
+    
+    def set_status(self, booking_id: int, status: BookingStatus):
+        with self._lock:
+            self.statuses[self._rows[booking_id]] = STATUS_CODES[status]
+    
+    def columns(self, *names: str) -> Tuple[Any, ...]:
+        # Копии столбцов одной длины: по ним можно строить numpy-представления
+        # и считать без блокировки, пока хранилище пополняется
+        with self._lock:
+            return self._copy_columns(names)
+    
+    def indexed_columns(self, *names: str) -> Tuple[TimeRangeIndex, Tuple[Any, ...]]:
+        # Индекс и копии столбцов, снятые вместе: каждая строка индекса
+        # есть в копиях, даже если хранилище тем временем очистят
+        with self._lock:
+            return self._current_index(), self._copy_columns(names)
+    
+    def _copy_columns(self, names: Iterable[str]) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name)[:] for name in names)
+    
+    def time_index(self) -> TimeRangeIndex:
+        with self._lock:
+            return self._current_index()
+    
+    def _current_index(self) -> TimeRangeIndex:
+        # Строки только добавляются, а их границы не меняются, поэтому индекс
+        # дополняется новыми строками, а не строится заново; статусы
+        # проверяются при чтении
+        index = self._time_index
+        if index is None:
+            index = self._time_index = TimeRangeIndex(self.starts, self.ends)
+        elif len(index) != len(self.ids):
+            index = self._time_index = index.extended(self.starts, self.ends)
+        return index
+    
+    def clear(self):
+        with self._lock:
+            self._reset()
+    
+    @staticmethod
+    def _code(name: str, codes: Dict[str, int], names: List[str]) -> int:
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+
+
+class BookingSystem:
+    def __init__(
+        self,
+        columnar: bool = False,
+        storage: Optional[Any] = None,
+        first_id: int = 1,
+        id_step: int = 1
+    ):
+        self._storage = storage
+        self._live: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
         self._bookings: List[Booking] = []
-        self._next_id: int = 1
+        self._bookings_by_id: Dict[int, Booking] = {}
+        self._bookings_by_resource: Dict[str, List[Booking]] = {}
+        self._symbols: Dict[str, str] = {}
+        self._resource_index: Dict[str, IntervalIndex] = {}
+        # Индексы свободных промежутков строятся при первом запросе
+        # next_free_slot по ресурсу и дальше обновляются вместе с _resource_index
+        self._gap_index: Dict[str, FreeGapIndex] = {}
+        self._status_counts: Counter = Counter()
+        self._resource_refs: Counter = Counter()
+        self._customer_refs: Counter = Counter()
+        self._columns: Optional[ColumnarBookingStore] = (
+            ColumnarBookingStore() if columnar else None
+        )
+        self._journal: Optional[Any] = None
+        self._first_id = first_id
+        self._id_step = id_step
+        self._next_id: int = first_id
         self._conflict_count: int = 0
         self._total_attempts: int = 0
+        # Поколение растет при каждом изменении; бронирование хранит
+        # поколение своего последнего изменения как версию.
+        self._generation: int = 0
+        # Блокировка ресурса сериализует проверку и вставку бронирований
+        # одного ресурса; общая блокировка берется ненадолго для ID, счетчиков
+        # и общих структур. Порядок захвата: ресурсы (по имени), затем общая.
+        self._lock = threading.RLock()
+        self._resource_locks: Dict[str, threading.Lock] = {}
+        
+        if storage is not None:
+            counters = storage.load_counters()
+            if counters is not None:
+                (self._next_id, self._total_attempts, self._conflict_count,
+                 self._generation) = counters
     
     def create_booking(
         self,
@@ -66,84 +265,594 @@ class BookingSystem:
         customer_name: str,
         notes: str = ""
     ) -> Optional[Booking]:
-        self._total_attempts += 1
+        try:
+            new_booking = Booking(
+                id=0,
+                resource_name=self._intern(resource_name),
+                start_date=start_date,
+                end_date=end_date,
+                customer_name=self._intern(customer_name),
+                notes=notes
+            )
+        except ValueError:
+            # Некорректный запрос тоже считается попыткой, как и раньше
+            with self._lock:
+                self._total_attempts += 1
+                self._save_counters()
+                ticket = self._log({'op': 'attempt', 'count': 1})
+            self._wait_durable(ticket)
+            raise
         
-        new_booking = Booking(
-            id=self._next_id,
-            resource_name=resource_name,
-            start_date=start_date,
-            end_date=end_date,
-            customer_name=customer_name,
-            notes=notes
-        )
+        with self._resource_lock(new_booking.resource_name):
+            conflicts = self.check_conflicts(new_booking)
+            with self._lock:
+                self._total_attempts += 1
+                if conflicts:
+                    self._conflict_count += 1
+                    self._save_counters()
+                    self._log({'op': 'conflict', 'count': 1})
+                    return None
+                
+                with self._transaction():
+                    new_booking.id = self._next_id
+                    new_booking.version = self._next_version()
+                    self._add_booking(new_booking)
+                    self._next_id += self._id_step
+                    self._save_counters()
+                ticket = self._log({'op': 'create', 'booking': new_booking.to_dict()})
+        self._wait_durable(ticket)
+        return new_booking
+    
+    def create_bookings(self, batch: List[Dict[str, Any]]) -> List[BookingResult]:
+        candidates = self.validate_batch(batch)
+        for candidate in candidates:
+            candidate.resource_name = self._intern(candidate.resource_name)
+            candidate.customer_name = self._intern(candidate.customer_name)
         
-        conflicts = self.check_conflicts(new_booking)
-        if conflicts:
-            self._conflict_count += 1
-            return None
+        by_resource: Dict[str, List[int]] = defaultdict(list)
+        for pos, candidate in enumerate(candidates):
+            by_resource[candidate.resource_name].append(pos)
         
-        self._bookings.append(new_booking)
-        self._next_id += 1
-        return new_booking
+        with self._resource_locks_for(by_resource):
+            results, ticket = self._create_candidates(candidates, by_resource)
+        self._wait_durable(ticket)
+        return results
+    
+    @staticmethod
+    def validate_batch(batch: List[Dict[str, Any]]) -> List[Booking]:
+        # Разбор всего пакета до каких-либо изменений. Фасады по шардам
+        # вызывают его до рассылки, чтобы ошибка во входных данных не
+        # оставила пакет примененным в одних шардах и не примененным в других
+        return [
+            Booking(
+                id=0,
+                resource_name=item['resource_name'],
+                start_date=item['start_date'],
+                end_date=item['end_date'],
+                customer_name=item['customer_name'],
+                notes=item.get('notes', "")
+            )
+            for item in batch
+        ]
+    
+    def _create_candidates(
+        self,
+        candidates: List[Booking],
+        by_resource: Dict[str, List[int]]
+    ) -> Tuple[List[BookingResult], Optional[Any]]:
+        accepted = [False] * len(candidates)
+        conflicts: List[List[Booking]] = [[] for _ in candidates]
+        for resource_name, positions in by_resource.items():
+            existing = self._active_between(
+                resource_name,
+                min(candidates[pos].start_date for pos in positions),
+                max(candidates[pos].end_date for pos in positions)
+            )
+            self._sweep_candidates(candidates, positions, existing, accepted, conflicts)
+        
+        # Счетчики меняются вместе с записью соответствующего события:
+        # снимок, сделанный посреди пакета, не должен учитывать события,
+        # которые еще будут применены из журнала при восстановлении.
+        results = []
+        ticket = None
+        with self._lock, self._transaction():
+            for pos, candidate in enumerate(candidates):
+                if accepted[pos]:
+                    candidate.id = self._next_id
+                    candidate.version = self._next_version()
+                    self._next_id += self._id_step
+                    self._total_attempts += 1
+                    self._add_booking(candidate)
+                    ticket = self._log({'op': 'create', 'booking': candidate.to_dict()})
+                    results.append(BookingResult(booking=candidate))
+                else:
+                    results.append(BookingResult(conflicts=[b.id for b in conflicts[pos]]))
+            
+            rejected = len(candidates) - sum(accepted)
+            if rejected:
+                self._total_attempts += rejected
+                self._conflict_count += rejected
+                self._log({'op': 'conflict', 'count': rejected})
+            self._save_counters()
+        return results, ticket
+    
+    @staticmethod
+    def _sweep_candidates(
+        candidates: List[Booking],
+        positions: List[int],
+        existing: List[Booking],
+        accepted: List[bool],
+        conflicts: List[List[Booking]]
+    ):
+        positions = sorted(positions, key=lambda p: candidates[p].start_date)
+        
+        j = 0
+        cluster: List[int] = []
+        cluster_end = None
+        for pos in positions:
+            candidate = candidates[pos]
+            
+            while j < len(existing) and existing[j].end_date <= candidate.start_date:
+                j += 1
+            k = j
+            while k < len(existing) and existing[k].start_date < candidate.end_date:
+                conflicts[pos].append(existing[k])
+                k += 1
+            
+            if cluster and candidate.start_date >= cluster_end:
+                BookingSystem._resolve_cluster(candidates, cluster, accepted, conflicts)
+                cluster = []
+            if not cluster or candidate.end_date > cluster_end:
+                cluster_end = candidate.end_date
+            cluster.append(pos)
+        
+        if cluster:
+            BookingSystem._resolve_cluster(candidates, cluster, accepted, conflicts)
+    
+    @staticmethod
+    def _resolve_cluster(
+        candidates: List[Booking],
+        cluster: List[int],
+        accepted: List[bool],
+        conflicts: List[List[Booking]]
+    ):
+        if len(cluster) == 1:
+            accepted[cluster[0]] = not conflicts[cluster[0]]
+            return
+        
+        # Внутри группы пересекающихся кандидатов побеждает более ранний
+        # в пакете, как при последовательных вызовах create_booking.
+        taken = IntervalIndex()
+        for pos in sorted(cluster):
+            candidate = candidates[pos]
+            overlapping = taken.overlapping(candidate.start_date, candidate.end_date)
+            if conflicts[pos] or overlapping:
+                conflicts[pos].extend(overlapping)
+                continue
+            taken.add(candidate.start_date, candidate.end_date, candidate)
+            accepted[pos] = True
+    
+    def _resource_lock(self, resource_name: str) -> threading.Lock:
+        lock = self._resource_locks.get(resource_name)
+        if lock is None:
+            with self._lock:
+                lock = self._resource_locks.setdefault(resource_name, threading.Lock())
+        return lock
+    
+    @contextmanager
+    def _resource_locks_for(self, resource_names: Iterable[str]):
+        with ExitStack() as stack:
+            for resource_name in sorted(resource_names):
+                stack.enter_context(self._resource_lock(resource_name))
+            yield
+    
+    def _intern(self, name: str) -> str:
+        return self._symbols.setdefault(name, name)
+    
+    def _transaction(self):
+        if self._storage is not None:
+            return self._storage.transaction()
+        return nullcontext()
+    
+    def _save_counters(self):
+        if self._storage is not None:
+            self._storage.save_counters(
+                self._next_id, self._total_attempts, self._conflict_count,
+                self._generation
+            )
+    
+    def _next_version(self) -> int:
+        self._generation += 1
+        return self._generation
+    
+    @property
+    def generation(self) -> int:
+        return self._generation
+    
+    def _track(self, bookings: Iterable[Booking]) -> List[Booking]:
+        return [self._live.setdefault(b.id, b) for b in bookings]
+    
+    def _add_booking(self, booking: Booking):
+        # Сначала то, что может отказать (хранилище, индексы): при ошибке
+        # бронирование не должно остаться добавленным наполовину
+        if self._storage is not None:
+            self._storage.insert(booking)
+            self._live[booking.id] = booking
+        else:
+            if booking.is_active():
+                self._index_booking(booking)
+            self._bookings.append(booking)
+            self._bookings_by_id[booking.id] = booking
+            self._bookings_by_resource.setdefault(booking.resource_name, []).append(booking)
+            self._status_counts[booking.status] += 1
+            self._resource_refs[booking.resource_name] += 1
+            self._customer_refs[booking.customer_name] += 1
+        if self._columns is not None:
+            self._columns.append(booking)
+    
+    def _set_status(self, booking: Booking, status: BookingStatus):
+        version = self._next_version()
+        if self._columns is not None:
+            self._columns.set_status(booking.id, status)
+        if self._storage is not None:
+            with self._storage.transaction():
+                self._storage.update_status(booking.id, status, version)
+                self._save_counters()
+            booking.status = status
+            booking.version = version
+            return
+        
+        was_active = booking.is_active()
+        self._status_counts[booking.status] -= 1
+        self._status_counts[status] += 1
+        booking.status = status
+        booking.version = version
+        if was_active and not booking.is_active():
+            self._unindex_booking(booking)
     
     def check_conflicts(self, booking: Booking) -> List[Booking]:
-        conflicts = []
-        for existing in self._bookings:
-            if existing.is_active() and existing.overlaps_with(booking):
-                conflicts.append(existing)
-        return conflicts
+        return self._active_between(
+            booking.resource_name, booking.start_date, booking.end_date
+        )
+    
+    def get_busy_intervals(
+        self,
+        resource_names: Iterable[str],
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, List[Tuple[datetime, datetime]]]:
+        return {
+            name: [(b.start_date, b.end_date)
+                   for b in self._active_between(name, start_date, end_date)]
+            for name in resource_names
+        }
+    
+    def find_earliest_slots(
+        self,
+        resource_names: Iterable[str],
+        search_start: datetime,
+        search_end: datetime,
+        required_duration: timedelta,
+        count: int = 1
+    ) -> List[Tuple[str, datetime, datetime]]:
+        return ConflictChecker.find_earliest_slots(
+            self.get_busy_intervals(resource_names, search_start, search_end),
+            search_start,
+            search_end,
+            required_duration,
+            count
+        )
+    
+    def _active_between(
+        self,
+        resource_name: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Booking]:
+        if self._storage is not None:
+            with self._lock:
+                return self._track(
+                    self._storage.find_overlapping(resource_name, start_date, end_date)
+                )
+        index = self._resource_index.get(resource_name)
+        if index is None:
+            return []
+        return index.overlapping(start_date, end_date)
+    
+    def _index_booking(self, booking: Booking):
+        gaps = self._gap_index.get(booking.resource_name)
+        if gaps is not None:
+            gaps.reserve(booking.start_date, booking.end_date)
+        index = self._resource_index.get(booking.resource_name)
+        if index is None:
+            index = self._resource_index[booking.resource_name] = IntervalIndex()
+        index.add(booking.start_date, booking.end_date, booking)
+    
+    def _unindex_booking(self, booking: Booking):
+        index = self._resource_index.get(booking.resource_name)
+        if index is not None and index.remove(booking.start_date, booking):
+            gaps = self._gap_index.get(booking.resource_name)
+            if gaps is not None:
+                gaps.release(booking.start_date, booking.end_date)
+    
+    def next_free_slot(
+        self,
+        resource_name: str,
+        duration: timedelta,
+        after: datetime
+    ) -> Optional[Tuple[datetime, datetime]]:
+        if self._storage is not None:
+            busy = self.get_busy_intervals([resource_name], after, datetime.max)[resource_name]
+            gap = next(ConflictChecker.iter_free_gaps(
+                ConflictChecker.merge_busy_intervals(busy), after, datetime.max, duration
+            ), None)
+            start = gap[0] if gap is not None else None
+        else:
+            with self._resource_lock(resource_name):
+                start = self._free_gaps(resource_name).next_free_slot(duration, after)
+        if start is None:
+            return None
+        return start, start + duration
+    
+    def _free_gaps(self, resource_name: str) -> FreeGapIndex:
+        gaps = self._gap_index.get(resource_name)
+        if gaps is None:
+            # Строится под общей блокировкой: clear_all и restore_state
+            # берут только ее, и индекс по старым данным не должен попасть
+            # в _gap_index после сброса
+            with self._lock:
+                gaps = self._gap_index.get(resource_name)
+                if gaps is None:
+                    gaps = FreeGapIndex()
+                    index = self._resource_index.get(resource_name)
+                    for booking in index.items() if index is not None else ():
+                        gaps.reserve(booking.start_date, booking.end_date)
+                    self._gap_index[resource_name] = gaps
+        return gaps
     
     def get_booking(self, booking_id: int) -> Optional[Booking]:
-        for booking in self._bookings:
-            if booking.id == booking_id:
+        if self._storage is not None:
+            with self._lock:
+                booking = self._live.get(booking_id)
+                if booking is None:
+                    booking = self._storage.get(booking_id)
+                    if booking is not None:
+                        booking = self._live.setdefault(booking_id, booking)
                 return booking
-        return None
+        return self._bookings_by_id.get(booking_id)
     
     def cancel_booking(self, booking_id: int) -> bool:
-        booking = self.get_booking(booking_id)
-        if booking and booking.is_active():
-            booking.status = BookingStatus.CANCELLED
-            return True
-        return False
+        return self._cancel(booking_id, None)
     
     def confirm_booking(self, booking_id: int) -> bool:
+        return self._confirm(booking_id, None)
+    
+    def compare_and_cancel(self, booking_id: int, expected_version: int) -> bool:
+        return self._cancel(booking_id, expected_version)
+    
+    def compare_and_confirm(self, booking_id: int, expected_version: int) -> bool:
+        return self._confirm(booking_id, expected_version)
+    
+    def _cancel(self, booking_id: int, expected_version: Optional[int]) -> bool:
+        booking = self.get_booking(booking_id)
+        if booking is None or not self._version_matches(booking, expected_version):
+            return False
+        with self._resource_lock(booking.resource_name), self._lock:
+            if not (self._is_current(booking) and booking.is_active() and
+                    self._version_matches(booking, expected_version)):
+                return False
+            self._set_status(booking, BookingStatus.CANCELLED)
+            ticket = self._log({'op': 'cancel', 'id': booking_id})
+        self._wait_durable(ticket)
+        return True
+    
+    def _confirm(self, booking_id: int, expected_version: Optional[int]) -> bool:
         booking = self.get_booking(booking_id)
-        if booking and booking.status == BookingStatus.PENDING:
-            booking.status = BookingStatus.CONFIRMED
-            return True
-        return False
+        if booking is None or not self._version_matches(booking, expected_version):
+            return False
+        with self._resource_lock(booking.resource_name), self._lock:
+            if not (self._is_current(booking) and booking.status == BookingStatus.PENDING and
+                    self._version_matches(booking, expected_version)):
+                return False
+            self._set_status(booking, BookingStatus.CONFIRMED)
+            ticket = self._log({'op': 'confirm', 'id': booking_id})
+        self._wait_durable(ticket)
+        return True
+    
+    def _is_current(self, booking: Booking) -> bool:
+        # Бронирование ищется до захвата блокировок; clear_all за это время
+        # мог удалить его, и менять статус старого объекта уже нельзя
+        return self.get_booking(booking.id) is booking
+    
+    @staticmethod
+    def _version_matches(booking: Booking, expected_version: Optional[int]) -> bool:
+        # Проверка до захвата блокировок отсекает устаревшие запросы сразу;
+        # под блокировкой она повторяется.
+        return expected_version is None or booking.version == expected_version
     
     def get_all_bookings(self) -> List[Booking]:
-        return self._bookings.copy()
+        with self._lock:
+            if self._storage is not None:
+                return self._track(self._storage.all())
+            return self._bookings.copy()
     
     def get_active_bookings(self) -> List[Booking]:
-        return [b for b in self._bookings if b.is_active()]
+        with self._lock:
+            if self._storage is not None:
+                return self._track(self._storage.active())
+            return [b for b in self._bookings if b.is_active()]
     
     def get_bookings_by_resource(self, resource_name: str) -> List[Booking]:
-        return [b for b in self._bookings if b.resource_name == resource_name]
+        if self._storage is not None:
+            with self._lock:
+                return self._track(self._storage.by_resource(resource_name))
+        return list(self._bookings_by_resource.get(resource_name, ()))
+    
+    def get_customers(self) -> Set[str]:
+        with self._lock:
+            if self._storage is not None:
+                return {b.customer_name for b in self._storage.all()}
+            return set(self._customer_refs)
+    
+    def get_columnar_store(self) -> ColumnarBookingStore:
+        if self._columns is not None:
+            return self._columns
+        return ColumnarBookingStore.from_bookings(self.get_all_bookings())
     
     def get_statistics(self) -> Dict[str, any]:
-        active = self.get_active_bookings()
+        with self._lock:
+            return self._statistics()
+    
+    def get_resource_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return self._resource_counts()
+    
+    @property
+    def statistics_key(self) -> Tuple[int, int]:
+        # Меняется при любом изменении статистики: поколение растет при
+        # изменении бронирований, счетчик попыток - и при конфликтах
+        return self._generation, self._total_attempts
+    
+    def get_statistics_snapshot(self) -> Tuple[Tuple[int, int], Dict[str, any], Dict[str, int]]:
+        # Ключ, статистика и активные бронирования по ресурсам одним
+        # согласованным снимком под общей блокировкой
+        with self._lock:
+            return self.statistics_key, self._statistics(), self._resource_counts()
+    
+    def _resource_counts(self) -> Dict[str, int]:
+        if self._storage is not None:
+            return self._storage.active_counts_by_resource()
+        return {name: len(index) for name, index in self._resource_index.items() if len(index)}
+    
+    def _statistics(self) -> Dict[str, any]:
+        if self._storage is not None:
+            counts = self._storage.status_counts()
+            unique_resources, unique_customers = self._storage.distinct_counts()
+        else:
+            counts = self._status_counts
+            unique_resources = len(self._resource_refs)
+            unique_customers = len(self._customer_refs)
         
         stats = {
-            'total_bookings': len(self._bookings),
-            'active_bookings': len(active),
-            'cancelled_bookings': len([b for b in self._bookings 
-                                      if b.status == BookingStatus.CANCELLED]),
-            'confirmed_bookings': len([b for b in self._bookings 
-                                       if b.status == BookingStatus.CONFIRMED]),
+            'total_bookings': sum(counts.values()),
+            'active_bookings': (counts[BookingStatus.PENDING] + 
+                               counts[BookingStatus.CONFIRMED]),
+            'cancelled_bookings': counts[BookingStatus.CANCELLED],
+            'confirmed_bookings': counts[BookingStatus.CONFIRMED],
             'total_attempts': self._total_attempts,
             'conflict_count': self._conflict_count,
             'conflict_rate': (self._conflict_count / self._total_attempts * 100 
                             if self._total_attempts > 0 else 0),
-            'unique_resources': len(set(b.resource_name for b in self._bookings)),
-            'unique_customers': len(set(b.customer_name for b in self._bookings))
+            'unique_resources': unique_resources,
+            'unique_customers': unique_customers
         }
         
         return stats
     
+    def attach_journal(self, journal: Optional[Any]):
+        self._journal = journal
+    
+    def _log(self, event: Dict[str, Any]) -> Optional[Any]:
+        # Возвращает квитанцию журнала; ждать ее нужно после снятия
+        # блокировок, чтобы один fsync подтвердил записи многих потоков
+        if self._journal is not None:
+            return self._journal.append(event)
+        return None
+    
+    @staticmethod
+    def _wait_durable(ticket: Optional[Any]):
+        if ticket is not None:
+            ticket.wait()
+    
+    def export_state(self) -> Dict[str, Any]:
+        with self._lock:
+            state = {
+                'next_id': self._next_id,
+                'total_attempts': self._total_attempts,
+                'conflict_count': self._conflict_count,
+                'generation': self._generation,
+                'bookings': [b.to_dict() for b in self.get_all_bookings()]
+            }
+            # Последняя запись журнала, уже учтенная в состоянии
+            if self._journal is not None:
+                state['journal_seq'] = self._journal.last_seq
+            return state
+    
+    def restore_state(self, state: Dict[str, Any]):
+        with self._lock, self._transaction():
+            self._reset()
+            generation = state.get('generation', 0)
+            for data in state['bookings']:
+                booking = self._restore_booking(data)
+                self._add_booking(booking)
+                generation = max(generation, booking.version)
+            self._next_id = state['next_id']
+            self._total_attempts = state['total_attempts']
+            self._conflict_count = state['conflict_count']
+            self._generation = max(self._generation, generation)
+            self._save_counters()
+    
+    def replay(self, events: Iterable[Dict[str, Any]]):
+        with self._lock, self._transaction():
+            self._replay(events)
+            self._save_counters()
+    
+    def _replay(self, events: Iterable[Dict[str, Any]]):
+        for event in events:
+            op = event['op']
+            if op == 'create':
+                booking = self._restore_booking(event['booking'])
+                self._add_booking(booking)
+                self._next_id = max(self._next_id, booking.id + self._id_step)
+                self._generation = max(self._generation, booking.version)
+                self._total_attempts += 1
+            elif op == 'attempt':
+                self._total_attempts += event['count']
+            elif op == 'conflict':
+                self._total_attempts += event['count']
+                self._conflict_count += event['count']
+            elif op in ('confirm', 'cancel'):
+                # Бронирования может не оказаться в снимке и журнале
+                # (например, после clear); такое событие пропускается
+                booking = self.get_booking(event['id'])
+                if booking is not None:
+                    status = BookingStatus.CONFIRMED if op == 'confirm' else BookingStatus.CANCELLED
+                    self._set_status(booking, status)
+            elif op == 'clear':
+                self._reset()
+            else:
+                raise ValueError(f"Неизвестная операция журнала: {op}")
+    
+    def _restore_booking(self, data: Dict[str, Any]) -> Booking:
+        booking = Booking.from_dict(data)
+        booking.resource_name = self._intern(booking.resource_name)
+        booking.customer_name = self._intern(booking.customer_name)
+        return booking
+    
     def clear_all(self):
+        with self._lock, self._transaction():
+            # Поколение не сбрасывается: иначе версия старого бронирования
+            # могла бы совпасть с версией нового под тем же ID.
+            self._reset()
+            self._save_counters()
+            ticket = self._log({'op': 'clear'})
+        self._wait_durable(ticket)
+    
+    def _reset(self):
+        if self._storage is not None:
+            self._storage.clear()
+            self._live.clear()
         self._bookings.clear()
-        self._next_id = 1
+        self._bookings_by_id.clear()
+        self._bookings_by_resource.clear()
+        self._symbols.clear()
+        self._resource_index.clear()
+        self._gap_index.clear()
+        self._status_counts.clear()
+        self._resource_refs.clear()
+        self._customer_refs.clear()
+        if self._columns is not None:
+            self._columns.clear()
+        self._next_id = self._first_id
         self._conflict_count = 0
         self._total_attempts = 0
@@ -1,7 +1,64 @@
-﻿from datetime import datetime, timedelta
-from typing import List, Tuple, Optional
+﻿import heapq
+from array import array
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple, Optional
 from dateutil.relativedelta import relativedelta
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Пакетные проверки NumPy обрабатывают кандидатов блоками, чтобы матрица
+# кандидаты x интервалы не превышала этого числа элементов
+BATCH_ELEMENTS = 1 << 20
+
+CHUNK_STEPS = {
+    'day': relativedelta(days=1),
+    'week': relativedelta(weeks=1),
+    'month': relativedelta(months=1)
+}
+
+
+class HolidayCalendar:
+    # Праздники хранятся отсортированными порядковыми номерами дней
+    # (date.toordinal). Отдельно хранятся праздники, выпавшие на будни:
+    # только они уменьшают число рабочих дней, и их число в диапазоне
+    # считается двумя бинарными поисками.
+    
+    def __init__(self, holidays: Iterable[date] = ()):
+        self._days = array('i')
+        self._weekday_days = array('i')
+        for day in holidays:
+            self.add(day)
+    
+    def __len__(self) -> int:
+        return len(self._days)
+    
+    def __contains__(self, day: date) -> bool:
+        ordinal = day.toordinal()
+        pos = bisect_left(self._days, ordinal)
+        return pos < len(self._days) and self._days[pos] == ordinal
+    
+    def add(self, day: date):
+        if day in self:
+            return
+        ordinal = day.toordinal()
+        insort(self._days, ordinal)
+        if day.weekday() < 5:
+            insort(self._weekday_days, ordinal)
+    
+    @property
+    def weekday_ordinals(self) -> array:
+        return self._weekday_days
+    
+    def count_weekday_holidays(self, first_ordinal: int, last_ordinal: int) -> int:
+        # Праздники в будни среди дней [first_ordinal, last_ordinal)
+        return (bisect_left(self._weekday_days, last_ordinal) -
+                bisect_left(self._weekday_days, first_ordinal))
+
 
 class DateValidator:
     @staticmethod
@@ -41,6 +98,54 @@ class DateValidator:
         overlap_end = min(end1, end2)
         return overlap_end - overlap_start
     
+    @staticmethod
+    def overlap_mask(
+        starts1: Sequence[int],
+        ends1: Sequence[int],
+        starts2: Sequence[int],
+        ends2: Sequence[int]
+    ) -> Any:
+        # Границы - целые числа (например, микросекунды эпохи из
+        # ColumnarBookingStore). Результат - матрица len(starts1) x len(starts2):
+        # numpy.ndarray, если NumPy установлен, иначе список списков
+        if np is not None:
+            s1, e1, s2, e2 = DateValidator._as_matrix_operands(starts1, ends1, starts2, ends2)
+            return (s1 < e2) & (s2 < e1)
+        return [
+            [start1 < end2 and start2 < end1 for start2, end2 in zip(starts2, ends2)]
+            for start1, end1 in zip(starts1, ends1)
+        ]
+    
+    @staticmethod
+    def overlap_durations(
+        starts1: Sequence[int],
+        ends1: Sequence[int],
+        starts2: Sequence[int],
+        ends2: Sequence[int]
+    ) -> Any:
+        # Как overlap_mask, но с длительностью пересечения (0 - нет пересечения)
+        if np is not None:
+            s1, e1, s2, e2 = DateValidator._as_matrix_operands(starts1, ends1, starts2, ends2)
+            return np.maximum(np.minimum(e1, e2) - np.maximum(s1, s2), 0)
+        return [
+            [max(min(end1, end2) - max(start1, start2), 0) for start2, end2 in zip(starts2, ends2)]
+            for start1, end1 in zip(starts1, ends1)
+        ]
+    
+    @staticmethod
+    def _as_matrix_operands(
+        starts1: Sequence[int],
+        ends1: Sequence[int],
+        starts2: Sequence[int],
+        ends2: Sequence[int]
+    ) -> Tuple[Any, Any, Any, Any]:
+        return (
+            np.asarray(starts1, dtype=np.int64)[:, None],
+            np.asarray(ends1, dtype=np.int64)[:, None],
+            np.asarray(starts2, dtype=np.int64)[None, :],
+            np.asarray(ends2, dtype=np.int64)[None, :]
+        )
+    
     @staticmethod
     def normalize_date(date: datetime) -> datetime:
         return date.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -52,25 +157,103 @@ class DateValidator:
                 date1.day == date2.day)
     
     @staticmethod
-    def get_date_range_list(start_date: datetime, end_date: datetime) -> List[datetime]:
-        dates = []
+    def iter_date_range(start_date: datetime, end_date: datetime) -> Iterator[datetime]:
         current = DateValidator.normalize_date(start_date)
         end = DateValidator.normalize_date(end_date)
         
         while current < end:
-            dates.append(current)
+            yield current
             current += timedelta(days=1)
-        
-        return dates
+    
+    @staticmethod
+    def get_date_range_list(start_date: datetime, end_date: datetime) -> List[datetime]:
+        return list(DateValidator.iter_date_range(start_date, end_date))
+    
+    @staticmethod
+    def chunk_start(date: datetime, unit: str = 'day') -> datetime:
+        if unit not in CHUNK_STEPS:
+            raise ValueError(f"Неизвестный размер блока: {unit}")
+        day = DateValidator.normalize_date(date)
+        if unit == 'week':
+            return day - timedelta(days=day.weekday())
+        if unit == 'month':
+            return day.replace(day=1)
+        return day
+    
+    @staticmethod
+    def iter_date_chunks(
+        start_date: datetime,
+        end_date: datetime,
+        unit: str = 'day'
+    ) -> Iterator[Tuple[datetime, datetime]]:
+        # Блоки выровнены по началу дня, недели (понедельник) или месяца;
+        # первый и последний блоки обрезаются границами периода. Пустой или
+        # обратный период не дает ни одного блока, как в get_date_range_list
+        current = DateValidator.chunk_start(start_date, unit)
+        if start_date >= end_date:
+            return
+        step = CHUNK_STEPS[unit]
+        while current < end_date:
+            following = current + step
+            yield max(current, start_date), min(following, end_date)
+            current = following
     
     @staticmethod
     def is_weekend(date: datetime) -> bool:
         return date.weekday() >= 5
     
     @staticmethod
-    def get_business_days_count(start_date: datetime, end_date: datetime) -> int:
-        dates = DateValidator.get_date_range_list(start_date, end_date)
-        return sum(1 for date in dates if not DateValidator.is_weekend(date))
+    def is_business_day(date: datetime, calendar: Optional[HolidayCalendar] = None) -> bool:
+        if DateValidator.is_weekend(date):
+            return False
+        return calendar is None or date not in calendar
+    
+    @staticmethod
+    def _weekdays_before(ordinal: int) -> int:
+        # Будних дней среди дней с номером меньше ordinal; день 1 (01.01.0001) - понедельник
+        weeks, days = divmod(ordinal - 1, 7)
+        return weeks * 5 + min(days, 5)
+    
+    @staticmethod
+    def get_business_days_count(
+        start_date: datetime,
+        end_date: datetime,
+        calendar: Optional[HolidayCalendar] = None
+    ) -> int:
+        # Дни с начала start_date до начала end_date, как в get_date_range_list
+        first = start_date.toordinal()
+        last = end_date.toordinal()
+        if last <= first:
+            return 0
+        count = DateValidator._weekdays_before(last) - DateValidator._weekdays_before(first)
+        if calendar is not None:
+            count -= calendar.count_weekday_holidays(first, last)
+        return count
+    
+    @staticmethod
+    def get_business_days_counts(
+        ranges: Sequence[Tuple[datetime, datetime]],
+        calendar: Optional[HolidayCalendar] = None
+    ) -> List[int]:
+        if np is None:
+            return [
+                DateValidator.get_business_days_count(start, end, calendar)
+                for start, end in ranges
+            ]
+        
+        first = np.fromiter((start.toordinal() for start, _ in ranges), dtype=np.int64, count=len(ranges))
+        last = np.fromiter((end.toordinal() for _, end in ranges), dtype=np.int64, count=len(ranges))
+        last = np.maximum(last, first)
+        
+        def weekdays_before(ordinals):
+            weeks, days = np.divmod(ordinals - 1, 7)
+            return weeks * 5 + np.minimum(days, 5)
+        
+        counts = weekdays_before(last) - weekdays_before(first)
+        if calendar is not None:
+            holidays = np.asarray(calendar.weekday_ordinals, dtype=np.int64)
+            counts -= np.searchsorted(holidays, last) - np.searchsorted(holidays, first)
+        return counts.tolist()
 
 
 class ConflictChecker:
@@ -86,6 +269,40 @@ class ConflictChecker:
                 conflicts.append(idx)
         return conflicts
     
+    @staticmethod
+    def batch_conflicts(
+        starts: Sequence[int],
+        ends: Sequence[int],
+        new_starts: Sequence[int],
+        new_ends: Sequence[int]
+    ) -> List[List[int]]:
+        # Для каждого кандидата - индексы пересекающихся интервалов,
+        # как check_date_conflicts, но по целочисленным границам
+        if np is None:
+            return [
+                [idx for idx, (start, end) in enumerate(zip(starts, ends))
+                 if start < new_end and new_start < end]
+                for new_start, new_end in zip(new_starts, new_ends)
+            ]
+        
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        new_starts = np.asarray(new_starts, dtype=np.int64)
+        new_ends = np.asarray(new_ends, dtype=np.int64)
+        step = max(1, BATCH_ELEMENTS // max(len(starts), 1))
+        
+        conflicts = []
+        for first in range(0, len(new_starts), step):
+            block_starts = new_starts[first:first + step, None]
+            block_ends = new_ends[first:first + step, None]
+            rows, columns = np.nonzero((starts < block_ends) & (block_starts < ends))
+            bounds = np.searchsorted(rows, np.arange(len(block_starts) + 1))
+            columns = columns.tolist()
+            conflicts.extend(
+                columns[bounds[i]:bounds[i + 1]] for i in range(len(block_starts))
+            )
+        return conflicts
+    
     @staticmethod
     def find_available_slots(
         bookings: List[Tuple[datetime, datetime]],
@@ -116,6 +333,74 @@ class ConflictChecker:
         
         return available_slots
     
+    @staticmethod
+    def merge_busy_intervals(
+        bookings: List[Tuple[datetime, datetime]]
+    ) -> List[Tuple[datetime, datetime]]:
+        merged = []
+        for start, end in sorted(bookings):
+            if merged and start <= merged[-1][1]:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+    
+    @staticmethod
+    def iter_free_gaps(
+        busy: List[Tuple[datetime, datetime]],
+        search_start: datetime,
+        search_end: datetime,
+        required_duration: timedelta
+    ) -> Iterator[Tuple[datetime, datetime]]:
+        # busy - отсортированные непересекающиеся интервалы (merge_busy_intervals)
+        current = search_start
+        for start, end in busy:
+            if end <= current:
+                continue
+            if start >= search_end:
+                break
+            if start - current >= required_duration:
+                yield (current, start)
+            current = end
+        if search_end - current >= required_duration:
+            yield (current, search_end)
+    
+    @staticmethod
+    def find_earliest_slots(
+        busy_by_resource: Dict[str, List[Tuple[datetime, datetime]]],
+        search_start: datetime,
+        search_end: datetime,
+        required_duration: timedelta,
+        count: int = 1
+    ) -> List[Tuple[str, datetime, datetime]]:
+        # В куче лежит ближайшее свободное окно каждого ресурса; следующее окно
+        # ресурса вычисляется только после выдачи текущего. При равном начале
+        # выигрывает ресурс, идущий раньше во входном словаре.
+        heap = []
+        for order, (resource, bookings) in enumerate(busy_by_resource.items()):
+            gaps = ConflictChecker.iter_free_gaps(
+                ConflictChecker.merge_busy_intervals(bookings),
+                search_start,
+                search_end,
+                required_duration
+            )
+            gap = next(gaps, None)
+            if gap is not None:
+                heap.append((gap[0], order, resource, gaps))
+        heapq.heapify(heap)
+        
+        slots = []
+        while heap and len(slots) < count:
+            start, order, resource, gaps = heap[0]
+            slots.append((resource, start, start + required_duration))
+            gap = next(gaps, None)
+            if gap is None:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (gap[0], order, resource, gaps))
+        return slots
+    
     @staticmethod
     def can_accommodate(
         bookings: List[Tuple[datetime, datetime]],
@@ -0,0 +1,153 @@
+from random import random
+from datetime import datetime, timedelta
+from typing import Iterator, Optional, Tuple
+
+
+class _Gap:
+    __slots__ = ('start', 'end', 'priority', 'left', 'right', 'max_length')
+
+    def __init__(self, start: datetime, end: datetime, priority: float):
+        self.start = start
+        self.end = end
+        self.priority = priority
+        self.left: Optional['_Gap'] = None
+        self.right: Optional['_Gap'] = None
+        self.max_length = end - start
+
+    def update(self):
+        length = self.end - self.start
+        if self.left is not None and self.left.max_length > length:
+            length = self.left.max_length
+        if self.right is not None and self.right.max_length > length:
+            length = self.right.max_length
+        self.max_length = length
+
+
+class FreeGapIndex:
+    # Свободные промежутки одного ресурса между непересекающимися активными
+    # бронированиями. Промежутки хранятся в декартовом дереве по началу, каждый
+    # узел помнит длину наибольшего промежутка своего поддерева, поэтому
+    # первый подходящий промежуток находится за O(log n) без перебора.
+    # Время до первого и после последнего бронирования - промежутки
+    # от datetime.min и до datetime.max.
+
+    def __init__(self):
+        self._root: Optional[_Gap] = None
+        self._size = 0
+        self._insert(datetime.min, datetime.max)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def reserve(self, start: datetime, end: datetime):
+        gap = self._floor(start)
+        if gap is None or gap.end < end:
+            raise ValueError("Интервал пересекается с занятым временем")
+        gap_start, gap_end = gap.start, gap.end
+        self._delete(gap_start)
+        if gap_start < start:
+            self._insert(gap_start, start)
+        if end < gap_end:
+            self._insert(end, gap_end)
+
+    def release(self, start: datetime, end: datetime):
+        before = self._floor(start, strict=True)
+        if before is not None and before.end == start:
+            start = before.start
+            self._delete(start)
+        after = self._find(end)
+        if after is not None:
+            end = after.end
+            self._delete(after.start)
+        self._insert(start, end)
+
+    def next_free_slot(self, duration: timedelta, after: datetime) -> Optional[datetime]:
+        # Сначала промежуток, в который попадает after, затем первый
+        # промежуток правее с длиной не меньше duration
+        gap = self._floor(after)
+        if gap is not None and gap.end - after >= duration:
+            return after
+        gap = self._first_fit(self._root, after, duration)
+        return gap.start if gap is not None else None
+
+    def gaps(self) -> Iterator[Tuple[datetime, datetime]]:
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.start, node.end
+            node = node.right
+
+    def _first_fit(self, node: Optional[_Gap], after: datetime, duration: timedelta) -> Optional[_Gap]:
+        if node is None or node.max_length < duration:
+            return None
+        if node.start <= after:
+            return self._first_fit(node.right, after, duration)
+        found = self._first_fit(node.left, after, duration)
+        if found is not None:
+            return found
+        if node.end - node.start >= duration:
+            return node
+        return self._first_fit(node.right, after, duration)
+
+    def _floor(self, key: datetime, strict: bool = False) -> Optional[_Gap]:
+        node, best = self._root, None
+        while node is not None:
+            if node.start < key or (not strict and node.start == key):
+                best = node
+                node = node.right
+            else:
+                node = node.left
+        return best
+
+    def _find(self, key: datetime) -> Optional[_Gap]:
+        node = self._root
+        while node is not None and node.start != key:
+            node = node.left if key < node.start else node.right
+        return node
+
+    def _insert(self, start: datetime, end: datetime):
+        left, right = self._split(self._root, start)
+        self._root = self._merge(self._merge(left, _Gap(start, end, random())), right)
+        self._size += 1
+
+    def _delete(self, start: datetime):
+        self._root = self._delete_from(self._root, start)
+        self._size -= 1
+
+    def _delete_from(self, node: Optional[_Gap], start: datetime) -> Optional[_Gap]:
+        if node.start == start:
+            return self._merge(node.left, node.right)
+        if start < node.start:
+            node.left = self._delete_from(node.left, start)
+        else:
+            node.right = self._delete_from(node.right, start)
+        node.update()
+        return node
+
+    def _split(self, node: Optional[_Gap], key: datetime) -> Tuple[Optional[_Gap], Optional[_Gap]]:
+        # Левая часть - промежутки с началом меньше key
+        if node is None:
+            return None, None
+        if node.start < key:
+            node.right, right = self._split(node.right, key)
+            node.update()
+            return node, right
+        left, node.left = self._split(node.left, key)
+        node.update()
+        return left, node
+
+    def _merge(self, left: Optional[_Gap], right: Optional[_Gap]) -> Optional[_Gap]:
+        if left is None:
+            return right
+        if right is None:
+            return left
+        if left.priority > right.priority:
+            left.right = self._merge(left.right, right)
+            left.update()
+            return left
+        right.left = self._merge(left, right.left)
+        right.update()
+        return right
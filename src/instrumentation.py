@@ -0,0 +1,95 @@
+import functools
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from analyzer import BookingAnalytics, PerformanceAnalyzer
+from booking_system import BookingSystem
+
+
+DEFAULT_TARGETS = (BookingSystem, BookingAnalytics)
+
+# Анализатор, в который пишут замеры; None - инструментирование выключено
+_analyzer: Optional[PerformanceAnalyzer] = None
+# Замененные атрибуты классов: (класс, имя, исходное значение)
+_patched: List[Tuple[type, str, Any]] = []
+
+
+def _timed_call(func: Callable, name: str) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        analyzer = _analyzer
+        if analyzer is None:
+            return func(*args, **kwargs)
+        start = perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            analyzer.record_operation_ns(name, perf_counter_ns() - start)
+    return wrapper
+
+
+def timed(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    # Декоратор: пока инструментирование выключено, обертка только
+    # проверяет глобальную переменную и вызывает функцию
+    def decorator(func: Callable) -> Callable:
+        return _timed_call(func, name or func.__qualname__)
+    return decorator
+
+
+@contextmanager
+def measure(name: str) -> Iterator[None]:
+    analyzer = _analyzer
+    if analyzer is None:
+        yield
+        return
+    start = perf_counter_ns()
+    try:
+        yield
+    finally:
+        analyzer.record_operation_ns(name, perf_counter_ns() - start)
+
+
+def enable(analyzer: PerformanceAnalyzer, targets: Iterable[type] = DEFAULT_TARGETS):
+    # Публичные методы классов заменяются обертками с замером времени;
+    # disable возвращает исходные методы, так что выключенное
+    # инструментирование не стоит ничего
+    global _analyzer
+    disable()
+    for cls in targets:
+        for name, attribute in list(vars(cls).items()):
+            if name.startswith('_'):
+                continue
+            operation = f"{cls.__name__}.{name}"
+            if isinstance(attribute, staticmethod):
+                wrapped = staticmethod(_timed_call(attribute.__func__, operation))
+            elif isinstance(attribute, classmethod):
+                wrapped = classmethod(_timed_call(attribute.__func__, operation))
+            elif callable(attribute):
+                wrapped = _timed_call(attribute, operation)
+            else:
+                continue
+            _patched.append((cls, name, attribute))
+            setattr(cls, name, wrapped)
+    _analyzer = analyzer
+
+
+def disable():
+    global _analyzer
+    _analyzer = None
+    while _patched:
+        cls, name, attribute = _patched.pop()
+        setattr(cls, name, attribute)
+
+
+def is_enabled() -> bool:
+    return _analyzer is not None
+
+
+@contextmanager
+def instrumented(analyzer: PerformanceAnalyzer, targets: Iterable[type] = DEFAULT_TARGETS) -> Iterator[PerformanceAnalyzer]:
+    enable(analyzer, targets)
+    try:
+        yield analyzer
+    finally:
+        disable()
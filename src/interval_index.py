@@ -0,0 +1,109 @@
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import accumulate
+from typing import Any, List, Sequence, Tuple
+
+
+PENDING_ROWS = 256
+
+
+class IntervalIndex:
+    # Хранит непересекающиеся интервалы одного ресурса, отсортированные по началу.
+    # Поскольку интервалы не пересекаются, концы отсортированы в том же порядке.
+
+    def __init__(self):
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        self._items: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, start: datetime, end: datetime, item: Any):
+        pos = bisect_left(self._starts, start)
+        self._starts.insert(pos, start)
+        self._ends.insert(pos, end)
+        self._items.insert(pos, item)
+
+    def remove(self, start: datetime, item: Any) -> bool:
+        pos = bisect_left(self._starts, start)
+        while pos < len(self._starts) and self._starts[pos] == start:
+            if self._items[pos] is item:
+                del self._starts[pos]
+                del self._ends[pos]
+                del self._items[pos]
+                return True
+            pos += 1
+        return False
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Any]:
+        lo = bisect_right(self._ends, start)
+        hi = bisect_left(self._starts, end, lo)
+        return self._items[lo:hi]
+
+    def items(self) -> List[Any]:
+        return self._items.copy()
+
+    def clear(self):
+        self._starts.clear()
+        self._ends.clear()
+        self._items.clear()
+
+
+class TimeRangeIndex:
+    # Неизменяемый индекс строк по времени: строки отсортированы по началу,
+    # для каждой позиции хранится максимум концов до нее включительно.
+    # Строки, пересекающие окно, лежат между первой позицией с максимумом
+    # конца после начала окна и последней позицией с началом до конца окна;
+    # строки вне этого отрезка не просматриваются. Добавленные строки идут
+    # в небольшой хвост, который просматривается целиком и вливается в
+    # отсортированную часть, когда вырастает до доли от нее.
+
+    def __init__(self, starts: Sequence[int], ends: Sequence[int]):
+        order = sorted(range(len(starts)), key=starts.__getitem__)
+        self._build([(starts[row], row, ends[row]) for row in order])
+
+    def _build(self, rows: List[Tuple[int, int, int]]):
+        self._order = array('q', (row for _, row, _ in rows))
+        self._starts = array('q', (start for start, _, _ in rows))
+        self._ends = array('q', (end for _, _, end in rows))
+        self._max_ends = array('q', accumulate(self._ends, max))
+        self._pending: Tuple[Tuple[int, int, int], ...] = ()
+
+    def __len__(self) -> int:
+        return len(self._order) + len(self._pending)
+
+    def extended(self, starts: Sequence[int], ends: Sequence[int]) -> 'TimeRangeIndex':
+        # Новый индекс со строками от len(self) до конца столбцов. Текущий
+        # не меняется, поэтому уже начатые по нему запросы остаются верными;
+        # отсортированная часть без слияния общая у обоих индексов
+        pending = self._pending + tuple(
+            (starts[row], row, ends[row]) for row in range(len(self), len(starts))
+        )
+        index = TimeRangeIndex.__new__(TimeRangeIndex)
+        if len(pending) > max(PENDING_ROWS, len(self._order) // 8):
+            index._build(list(heapq.merge(
+                zip(self._starts, self._order, self._ends), sorted(pending)
+            )))
+        else:
+            index._order, index._starts = self._order, self._starts
+            index._ends, index._max_ends = self._ends, self._max_ends
+            index._pending = pending
+        return index
+
+    def overlapping(self, start: int, end: int) -> List[int]:
+        lo = bisect_right(self._max_ends, start)
+        hi = bisect_left(self._starts, end, lo)
+        ends = self._ends
+        positions = [pos for pos in range(lo, hi) if ends[pos] > start]
+        pending = sorted(
+            (row_start, row) for row_start, row, row_end in self._pending
+            if row_start < end and row_end > start
+        )
+        if not pending:
+            return [self._order[pos] for pos in positions]
+        return [row for _, row in heapq.merge(
+            ((self._starts[pos], self._order[pos]) for pos in positions), pending
+        )]
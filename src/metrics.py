@@ -0,0 +1,129 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from analyzer import LatencyHistogram, PerformanceAnalyzer
+from booking_system import BookingSystem
+
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Границы корзин гистограммы в наносекундах: 1-2.5-5 от 1 мкс до 10 с
+BUCKET_BOUNDS_NS = [
+    mantissa * 10 ** (exponent - 1)
+    for exponent in range(3, 10)
+    for mantissa in (10, 25, 50)
+] + [10 ** 10]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _seconds(value_ns: int) -> str:
+    return repr(value_ns / 1e9)
+
+
+class MetricsExporter:
+    # Текст OpenMetrics по PerformanceAnalyzer и BookingSystem. Каждая часть
+    # берется одним снимком под блокировкой источника и кешируется, пока
+    # не изменился ключ источника (версия анализатора, поколение системы),
+    # поэтому частый опрос без изменений не стоит ничего.
+
+    def __init__(
+        self,
+        system: Optional[BookingSystem] = None,
+        analyzer: Optional[PerformanceAnalyzer] = None,
+        namespace: str = 'booking'
+    ):
+        self.system = system
+        self.analyzer = analyzer
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._analyzer_key: Optional[int] = None
+        self._analyzer_text = ''
+        self._system_key: Optional[Tuple[int, int]] = None
+        self._system_text = ''
+        self._text: Optional[str] = None
+        # Для корзины гистограммы LatencyHistogram - индекс последней ее
+        # корзины, не превышающей границу (с точностью корзины, около 1%)
+        self._bounds = [
+            (_seconds(bound), LatencyHistogram._bucket(bound)) for bound in BUCKET_BOUNDS_NS
+        ]
+
+    def render(self) -> str:
+        with self._lock:
+            changed = self._text is None
+            if self.analyzer is not None and self.analyzer.version != self._analyzer_key:
+                self._analyzer_key, histograms = self.analyzer.snapshot()
+                self._analyzer_text = self._render_operations(histograms)
+                changed = True
+            if self.system is not None and self.system.statistics_key != self._system_key:
+                self._system_key, stats, resource_counts = self.system.get_statistics_snapshot()
+                self._system_text = self._render_system(stats, resource_counts)
+                changed = True
+            if changed:
+                self._text = self._analyzer_text + self._system_text + '# EOF\n'
+            return self._text
+
+    def _family(self, lines: List[str], name: str, kind: str, help_text: str, unit: str = ''):
+        lines.append(f"# TYPE {name} {kind}")
+        if unit:
+            lines.append(f"# UNIT {name} {unit}")
+        lines.append(f"# HELP {name} {help_text}")
+
+    def _render_operations(self, histograms: Dict[str, LatencyHistogram]) -> str:
+        lines: List[str] = []
+        operations = sorted(histograms.items())
+
+        duration = f"{self.namespace}_operation_duration_seconds"
+        self._family(lines, duration, 'histogram', "Длительность операций", 'seconds')
+        for operation, histogram in operations:
+            label = f'operation="{_escape(operation)}"'
+            buckets = histogram.buckets
+            cumulative = 0
+            start = 0
+            for bound, index in self._bounds:
+                cumulative += sum(buckets[start:index + 1])
+                start = index + 1
+                lines.append(f'{duration}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{duration}_bucket{{{label},le="+Inf"}} {histogram.count}')
+            lines.append(f'{duration}_count{{{label}}} {histogram.count}')
+            lines.append(f'{duration}_sum{{{label}}} {_seconds(histogram.total_ns)}')
+
+        counter = f"{self.namespace}_operations"
+        self._family(lines, counter, 'counter', "Выполнено операций")
+        for operation, histogram in operations:
+            lines.append(f'{counter}_total{{operation="{_escape(operation)}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def _render_system(self, stats: Dict[str, any], resource_counts: Dict[str, int]) -> str:
+        lines: List[str] = []
+        prefix = self.namespace
+
+        self._family(lines, f"{prefix}_attempts", 'counter', "Попытки создать бронирование")
+        lines.append(f"{prefix}_attempts_total {stats['total_attempts']}")
+        self._family(lines, f"{prefix}_conflicts", 'counter', "Попытки, отклоненные из-за конфликта")
+        lines.append(f"{prefix}_conflicts_total {stats['conflict_count']}")
+
+        self._family(lines, f"{prefix}_bookings", 'gauge', "Бронирования по статусам")
+        pending = stats['active_bookings'] - stats['confirmed_bookings']
+        for status, count in (('pending', pending),
+                              ('confirmed', stats['confirmed_bookings']),
+                              ('cancelled', stats['cancelled_bookings'])):
+            lines.append(f'{prefix}_bookings{{status="{status}"}} {count}')
+
+        gauges = (
+            ('active_bookings', "Активные бронирования", stats['active_bookings']),
+            ('conflict_ratio', "Доля попыток с конфликтом", stats['conflict_rate'] / 100),
+            ('unique_resources', "Ресурсов с бронированиями", stats['unique_resources']),
+            ('unique_customers', "Клиентов с бронированиями", stats['unique_customers'])
+        )
+        for name, help_text, value in gauges:
+            self._family(lines, f"{prefix}_{name}", 'gauge', help_text)
+            lines.append(f"{prefix}_{name} {value}")
+
+        resource_gauge = f"{prefix}_resource_active_bookings"
+        self._family(lines, resource_gauge, 'gauge', "Активные бронирования ресурса")
+        for resource, count in sorted(resource_counts.items()):
+            lines.append(f'{resource_gauge}{{resource="{_escape(resource)}"}} {count}')
+        return '\n'.join(lines) + '\n'
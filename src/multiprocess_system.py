@@ -0,0 +1,323 @@
+import heapq
+import multiprocessing
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from analyzer import BookingAnalytics
+from booking_system import Booking, BookingResult, BookingSystem
+from date_validator import ConflictChecker
+from sharded_system import merge_statistics, resource_shard
+
+
+SYSTEM_METHODS = {
+    'create_booking', 'create_bookings', 'check_conflicts', 'get_booking',
+    'cancel_booking', 'confirm_booking', 'compare_and_cancel', 'compare_and_confirm',
+    'get_all_bookings', 'get_active_bookings',
+    'get_bookings_by_resource', 'get_busy_intervals', 'next_free_slot', 'get_statistics',
+    'get_customers', 'clear_all'
+}
+ANALYTICS_METHODS = {'pattern_partials', 'analyze_conflicts', 'generate_utilization_report'}
+
+
+def _worker_main(conn, first_id: int, id_step: int, system_options: Dict[str, Any]):
+    system = BookingSystem(first_id=first_id, id_step=id_step, **system_options)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        kind, name, args = message
+        try:
+            if kind == 'batch':
+                result = [
+                    (r.booking.id, r.booking.created_at, r.booking.version)
+                    if r.created else r.conflicts
+                    for r in system.create_bookings(*args)
+                ]
+            elif kind == 'statistics':
+                result = (system.get_statistics(), system.get_customers())
+            elif kind == 'system':
+                if name not in SYSTEM_METHODS:
+                    raise ValueError(f"Неизвестный метод: {name}")
+                result = getattr(system, name)(*args)
+            elif name not in ANALYTICS_METHODS:
+                raise ValueError(f"Неизвестный метод аналитики: {name}")
+            elif name == 'analyze_conflicts':
+                result = BookingAnalytics.analyze_conflicts(system.get_all_bookings())
+            else:
+                result = getattr(BookingAnalytics, name)(system.get_columnar_store(), *args)
+            conn.send((True, result))
+        except Exception as e:
+            conn.send((False, e))
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, context, first_id: int, id_step: int, system_options: Dict[str, Any]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, first_id, id_step, system_options),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.lock = threading.Lock()
+
+    def send(self, kind: str, name: str, args: Tuple):
+        self.conn.send((kind, name, args))
+
+    def receive(self) -> Any:
+        ok, result = self.conn.recv()
+        if not ok:
+            raise result
+        return result
+
+    def call(self, kind: str, name: str, *args) -> Any:
+        with self.lock:
+            self.send(kind, name, args)
+            return self.receive()
+
+
+class ProcessShardedBookingSystem:
+    # Каждый процесс владеет своим BookingSystem и набором ресурсов
+    # (crc32 имени, как в ShardedBookingSystem). Операции над одним ресурсом
+    # идут к владельцу; пакеты и аналитика рассылаются всем процессам сразу.
+    # Возвращаемые объекты Booking - копии, изменения вносятся только методами.
+
+    def __init__(self, workers: Optional[int] = None, start_method: Optional[str] = None,
+                 **system_options):
+        workers = workers or os.cpu_count() or 1
+        context = multiprocessing.get_context(start_method)
+        self._workers = [
+            _Worker(context, i + 1, workers, system_options)
+            for i in range(workers)
+        ]
+
+    def __enter__(self) -> 'ProcessShardedBookingSystem':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def workers(self) -> int:
+        return len(self._workers)
+
+    def _owner(self, resource_name: str) -> _Worker:
+        return self._workers[resource_shard(resource_name, len(self._workers))]
+
+    def _owner_of_id(self, booking_id: int) -> _Worker:
+        return self._workers[(booking_id - 1) % len(self._workers)]
+
+    def _gather(self, kind: str, name: str, *args) -> List[Any]:
+        # Блокировки берутся в одном порядке; запросы уходят всем процессам
+        # до ожидания ответов, поэтому процессы работают параллельно.
+        for worker in self._workers:
+            worker.lock.acquire()
+        try:
+            for worker in self._workers:
+                worker.send(kind, name, args)
+            return self._receive_all(self._workers)
+        finally:
+            for worker in self._workers:
+                worker.lock.release()
+
+    def _scatter(self, kind: str, name: str, args_by_shard: Dict[int, Tuple]) -> Dict[int, Any]:
+        # Как _gather, но только для нужных процессов и со своими аргументами
+        shards = sorted(args_by_shard)
+        workers = [self._workers[shard] for shard in shards]
+        for worker in workers:
+            worker.lock.acquire()
+        try:
+            for shard, worker in zip(shards, workers):
+                worker.send(kind, name, args_by_shard[shard])
+            return dict(zip(shards, self._receive_all(workers)))
+        finally:
+            for worker in workers:
+                worker.lock.release()
+
+    @staticmethod
+    def _receive_all(workers: List[_Worker]) -> List[Any]:
+        results, error = [], None
+        for worker in workers:
+            try:
+                results.append(worker.receive())
+            except Exception as e:
+                results.append(None)
+                error = error or e
+        if error is not None:
+            raise error
+        return results
+
+    def create_booking(
+        self,
+        resource_name: str,
+        start_date: datetime,
+        end_date: datetime,
+        customer_name: str,
+        notes: str = ""
+    ) -> Optional[Booking]:
+        return self._owner(resource_name).call(
+            'system', 'create_booking', resource_name, start_date, end_date, customer_name, notes
+        )
+
+    def create_bookings(self, batch: List[Dict[str, Any]]) -> List[BookingResult]:
+        # Пакет проверяется до рассылки, чтобы ошибка не оставила его
+        # примененным только в части процессов
+        candidates = BookingSystem.validate_batch(batch)
+        by_worker: Dict[int, List[int]] = defaultdict(list)
+        for pos, item in enumerate(batch):
+            by_worker[resource_shard(item['resource_name'], len(self._workers))].append(pos)
+
+        # Процесс возвращает только ID, время создания и версию, объект
+        # Booking собирается здесь из разобранного запроса
+        shard_results = self._scatter('batch', 'create_bookings', {
+            shard: ([batch[pos] for pos in positions],)
+            for shard, positions in by_worker.items()
+        })
+
+        results: List[Optional[BookingResult]] = [None] * len(batch)
+        for shard, part in shard_results.items():
+            for pos, result in zip(by_worker[shard], part):
+                if isinstance(result, tuple):
+                    booking = candidates[pos]
+                    booking.id, booking.created_at, booking.version = result
+                    results[pos] = BookingResult(booking=booking)
+                else:
+                    results[pos] = BookingResult(conflicts=result)
+        return results
+
+    def check_conflicts(self, booking: Booking) -> List[Booking]:
+        return self._owner(booking.resource_name).call('system', 'check_conflicts', booking)
+
+    def get_booking(self, booking_id: int) -> Optional[Booking]:
+        if booking_id < 1:
+            return None
+        return self._owner_of_id(booking_id).call('system', 'get_booking', booking_id)
+
+    def cancel_booking(self, booking_id: int) -> bool:
+        if booking_id < 1:
+            return False
+        return self._owner_of_id(booking_id).call('system', 'cancel_booking', booking_id)
+
+    def confirm_booking(self, booking_id: int) -> bool:
+        if booking_id < 1:
+            return False
+        return self._owner_of_id(booking_id).call('system', 'confirm_booking', booking_id)
+
+    def compare_and_cancel(self, booking_id: int, expected_version: int) -> bool:
+        if booking_id < 1:
+            return False
+        return self._owner_of_id(booking_id).call(
+            'system', 'compare_and_cancel', booking_id, expected_version
+        )
+
+    def compare_and_confirm(self, booking_id: int, expected_version: int) -> bool:
+        if booking_id < 1:
+            return False
+        return self._owner_of_id(booking_id).call(
+            'system', 'compare_and_confirm', booking_id, expected_version
+        )
+
+    def get_all_bookings(self) -> List[Booking]:
+        return list(heapq.merge(*self._gather('system', 'get_all_bookings'), key=lambda b: b.id))
+
+    def get_active_bookings(self) -> List[Booking]:
+        return list(heapq.merge(*self._gather('system', 'get_active_bookings'), key=lambda b: b.id))
+
+    def get_bookings_by_resource(self, resource_name: str) -> List[Booking]:
+        return self._owner(resource_name).call('system', 'get_bookings_by_resource', resource_name)
+
+    def get_busy_intervals(
+        self,
+        resource_names: Iterable[str],
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, List[Tuple[datetime, datetime]]]:
+        resource_names = list(resource_names)
+        by_worker: Dict[int, List[str]] = defaultdict(list)
+        for name in resource_names:
+            by_worker[resource_shard(name, len(self._workers))].append(name)
+
+        busy: Dict[str, List[Tuple[datetime, datetime]]] = {}
+        for part in self._scatter('system', 'get_busy_intervals', {
+            shard: (names, start_date, end_date) for shard, names in by_worker.items()
+        }).values():
+            busy.update(part)
+        return {name: busy[name] for name in resource_names}
+
+    def find_earliest_slots(
+        self,
+        resource_names: Iterable[str],
+        search_start: datetime,
+        search_end: datetime,
+        required_duration: timedelta,
+        count: int = 1
+    ) -> List[Tuple[str, datetime, datetime]]:
+        return ConflictChecker.find_earliest_slots(
+            self.get_busy_intervals(resource_names, search_start, search_end),
+            search_start,
+            search_end,
+            required_duration,
+            count
+        )
+
+    def next_free_slot(
+        self,
+        resource_name: str,
+        duration: timedelta,
+        after: datetime
+    ) -> Optional[Tuple[datetime, datetime]]:
+        return self._owner(resource_name).call(
+            'system', 'next_free_slot', resource_name, duration, after
+        )
+
+    def get_statistics(self) -> Dict[str, any]:
+        # Счетчики и клиенты каждого процесса приходят одним ответом
+        parts = self._gather('statistics', 'get_statistics')
+        return merge_statistics(
+            [statistics for statistics, _ in parts],
+            [customers for _, customers in parts]
+        )
+
+    def analyze_booking_patterns(self) -> Dict[str, Any]:
+        return BookingAnalytics.merge_pattern_partials(
+            self._gather('analytics', 'pattern_partials')
+        )
+
+    def analyze_conflicts(self) -> Dict[str, Any]:
+        return BookingAnalytics.merge_conflict_results(
+            self._gather('analytics', 'analyze_conflicts')
+        )
+
+    def generate_utilization_report(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        resolution: str = 'hour'
+    ) -> Dict[str, Any]:
+        return BookingAnalytics.merge_utilization_reports(
+            self._gather('analytics', 'generate_utilization_report', start_date, end_date, resolution)
+        )
+
+    def clear_all(self):
+        self._gather('system', 'clear_all')
+
+    def close(self):
+        for worker in self._workers:
+            with worker.lock:
+                try:
+                    worker.conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                worker.conn.close()
+        for worker in self._workers:
+            worker.process.join()
+        self._workers = []
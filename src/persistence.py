@@ -0,0 +1,291 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from booking_system import BookingSystem
+
+
+def fsync_directory(directory: str):
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CommitTicket:
+    # Квитанция записи журнала: wait() возвращается, когда запись
+    # (и все записи до нее) подтверждены fsync.
+    __slots__ = ('journal', 'seq')
+
+    def __init__(self, journal: 'BookingJournal', seq: int):
+        self.journal = journal
+        self.seq = seq
+
+    def wait(self):
+        self.journal.wait_durable(self.seq)
+
+
+class BookingJournal:
+    # Журнал пишет события в конец файла; fsync выполняет отдельный поток
+    # сразу для группы накопившихся записей (group commit). append не ждет
+    # диска и возвращает квитанцию; вызывающий ждет ее перед ответом
+    # клиенту, и потоки, ждущие одновременно, подтверждаются одним fsync.
+
+    def __init__(
+        self,
+        path: str,
+        group_commit_size: int = 256,
+        group_commit_interval: float = 0.005,
+        start_seq: int = 0
+    ):
+        self.path = path
+        self.group_commit_size = group_commit_size
+        self.group_commit_interval = group_commit_interval
+        self._discard_torn_tail(path)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._cond = threading.Condition()
+        # Файл меняют только поток fsync и truncate; append его не трогает
+        self._io_lock = threading.Lock()
+        self._pending: List[str] = []
+        self._last_seq = start_seq
+        self._durable_seq = start_seq
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._committer = threading.Thread(target=self._commit_loop, daemon=True)
+        self._committer.start()
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    def append(self, event: Dict[str, Any]) -> CommitTicket:
+        with self._cond:
+            if self._closed:
+                raise ValueError("Журнал закрыт")
+            self._last_seq += 1
+            record = dict(event, seq=self._last_seq)
+            self._pending.append(json.dumps(record, ensure_ascii=False))
+            if len(self._pending) >= self.group_commit_size:
+                self._cond.notify_all()
+            return CommitTicket(self, self._last_seq)
+
+    def wait_durable(self, seq: Optional[int] = None):
+        with self._cond:
+            target = self._last_seq if seq is None else seq
+            self._cond.notify_all()
+            while self._durable_seq < target and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise self._error
+
+    def sync(self):
+        self.wait_durable()
+
+    def truncate(self, up_to_seq: int):
+        # Хвост журнала переписывается во временный файл и подменяет журнал.
+        # Пока это идет, ждет только поток fsync: append продолжает копить
+        # записи в памяти. Записи с seq <= up_to_seq, еще не дошедшие до
+        # диска, попадут в новый файл и будут пропущены при восстановлении.
+        with self._io_lock:
+            self._file.flush()
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for event in self.read(self.path):
+                    if event['seq'] > up_to_seq:
+                        f.write(json.dumps(event, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            # Открытый файл нельзя заменить в Windows
+            self._file.close()
+            try:
+                os.replace(tmp_path, self.path)
+                fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+            finally:
+                self._file = open(self.path, 'a', encoding='utf-8')
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._committer.join()
+        self._file.close()
+
+    def _commit_loop(self):
+        while True:
+            with self._cond:
+                if not self._pending and not self._closed:
+                    self._cond.wait(self.group_commit_interval)
+                if not self._pending:
+                    if self._closed:
+                        return
+                    continue
+                batch, self._pending = self._pending, []
+                batch_seq = self._last_seq
+
+            try:
+                with self._io_lock:
+                    self._file.write('\n'.join(batch) + '\n')
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+            except OSError as e:
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+
+            with self._cond:
+                self._durable_seq = batch_seq
+                self._cond.notify_all()
+
+    @staticmethod
+    def _discard_torn_tail(path: str):
+        if not os.path.exists(path):
+            return
+        valid = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    json.loads(line)
+                except ValueError:
+                    break
+                valid += len(line)
+            size = f.seek(0, os.SEEK_END)
+        if valid < size:
+            with open(path, 'r+b') as f:
+                f.truncate(valid)
+
+    @staticmethod
+    def read(path: str) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Хвост, оборванный при сбое, не был подтвержден fsync.
+                    return
+
+
+class BookingPersistence:
+    SNAPSHOT_FILE = 'snapshot.json'
+    JOURNAL_FILE = 'journal.jsonl'
+
+    def __init__(
+        self,
+        directory: str,
+        snapshot_every: int = 10_000,
+        group_commit_size: int = 256,
+        group_commit_interval: float = 0.005
+    ):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.group_commit_size = group_commit_size
+        self.group_commit_interval = group_commit_interval
+        self.snapshot_path = os.path.join(directory, self.SNAPSHOT_FILE)
+        self.journal_path = os.path.join(directory, self.JOURNAL_FILE)
+        self._system: Optional[BookingSystem] = None
+        self._journal: Optional[BookingJournal] = None
+        self._events_since_snapshot = 0
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._snapshot_error: Optional[BaseException] = None
+
+    def open(self, **system_options) -> BookingSystem:
+        os.makedirs(self.directory, exist_ok=True)
+        system = BookingSystem(**system_options)
+
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            system.restore_state(snapshot['state'])
+            snapshot_seq = snapshot['seq']
+
+        last_seq = snapshot_seq
+        tail = []
+        for event in BookingJournal.read(self.journal_path):
+            if event['seq'] > snapshot_seq:
+                tail.append(event)
+            last_seq = max(last_seq, event['seq'])
+        system.replay(tail)
+
+        self._system = system
+        self._events_since_snapshot = len(tail)
+        self._journal = BookingJournal(
+            self.journal_path,
+            group_commit_size=self.group_commit_size,
+            group_commit_interval=self.group_commit_interval,
+            start_seq=last_seq
+        )
+        system.attach_journal(self)
+        return system
+
+    @property
+    def last_seq(self) -> int:
+        return self._journal.last_seq
+
+    def append(self, event: Dict[str, Any]) -> CommitTicket:
+        # Вызывается под блокировкой системы, поэтому снимок здесь только
+        # запускается: он пишется в отдельном потоке
+        ticket = self._journal.append(event)
+        self._events_since_snapshot += 1
+        if (self.snapshot_every and self._events_since_snapshot >= self.snapshot_every
+                and not self._snapshot_running()):
+            self._events_since_snapshot = 0
+            self._snapshot_thread = threading.Thread(target=self._background_snapshot, daemon=True)
+            self._snapshot_thread.start()
+        return ticket
+
+    def sync(self):
+        self._journal.sync()
+        if self._snapshot_error is not None:
+            error, self._snapshot_error = self._snapshot_error, None
+            raise error
+
+    def wait_snapshot(self):
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+
+    def snapshot(self):
+        with self._snapshot_lock:
+            # Состояние и номер последней учтенной записи журнала берутся
+            # под одной блокировкой системы
+            state = self._system.export_state()
+            seq = state.pop('journal_seq')
+
+            tmp_path = self.snapshot_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'seq': seq, 'state': state}, f, ensure_ascii=False,
+                          separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            fsync_directory(self.directory)
+
+            self._journal.truncate(seq)
+
+    def close(self):
+        if self._journal is not None:
+            self.wait_snapshot()
+            self._system.attach_journal(None)
+            self._journal.close()
+            self._journal = None
+
+    def _snapshot_running(self) -> bool:
+        return self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+
+    def _background_snapshot(self):
+        try:
+            self.snapshot()
+        except Exception as e:
+            self._snapshot_error = e
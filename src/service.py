@@ -0,0 +1,357 @@
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from analyzer import PerformanceAnalyzer
+from booking_system import Booking, BookingSystem
+from date_validator import DateValidator
+from metrics import CONTENT_TYPE, MetricsExporter
+import instrumentation
+
+
+REASONS = {
+    200: 'OK',
+    201: 'Created',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    409: 'Conflict',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error'
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+MAX_BODY = 1 << 20
+
+
+class BookingService:
+    # Одновременные запросы на создание копятся в течение batch_window и
+    # проверяются одним вызовом create_bookings. Изменения (пакет целиком,
+    # подтверждение, отмена) выполняются в пуле потоков: проверки,
+    # запись в SQLite и ожидание fsync журнала не блокируют цикл событий.
+
+    def __init__(
+        self,
+        system: BookingSystem,
+        persistence: Optional[Any] = None,
+        host: str = '127.0.0.1',
+        port: int = 8080,
+        batch_window: float = 0.002,
+        max_batch: int = 256,
+        analyzer: Optional[PerformanceAnalyzer] = None,
+        io_workers: int = 4
+    ):
+        self.system = system
+        # GET /metrics отдает текст OpenMetrics по системе и анализатору
+        self.metrics = MetricsExporter(system, analyzer)
+        self.persistence = persistence
+        self.host = host
+        self.port = port
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='booking-io')
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._batches: Set[asyncio.Task] = set()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        self._flush()
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        if self.persistence is not None:
+            await self._run_blocking(self.persistence.sync)
+        self._executor.shutdown(wait=True)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    # Границу тела определить нельзя: ответ и закрытие
+                    self._write_response(writer, e.status, {'error': e.message}, False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                try:
+                    status, payload = await self._dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': e.message}
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            return None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Некорректный Content-Length")
+        if length < 0:
+            raise HTTPError(400, "Некорректный Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(413, "Слишком большое тело запроса")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    def _write_response(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool):
+        if isinstance(payload, str):
+            body, content_type = payload.encode('utf-8'), CONTENT_TYPE
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        url = urlsplit(target)
+        parts = [p for p in url.path.split('/') if p]
+
+        if parts == ['bookings'] and method == 'POST':
+            return await self._create(self._parse_json(body))
+        if len(parts) == 2 and parts[0] == 'bookings' and method == 'GET':
+            booking = self.system.get_booking(self._parse_id(parts[1]))
+            if booking is None:
+                raise HTTPError(404, "Бронирование не найдено")
+            return 200, booking.to_dict()
+        if len(parts) == 3 and parts[0] == 'bookings' and method == 'POST':
+            return await self._change_status(self._parse_id(parts[1]), parts[2],
+                                             self._parse_json(body))
+        if parts == ['availability'] and method == 'GET':
+            return 200, self._availability(parse_qs(url.query))
+        if parts == ['statistics'] and method == 'GET':
+            return 200, self.system.get_statistics()
+        if parts == ['metrics'] and method == 'GET':
+            return 200, self.metrics.render()
+        if parts and parts[0] in ('bookings', 'availability', 'statistics', 'metrics'):
+            raise HTTPError(405, "Метод не поддерживается")
+        raise HTTPError(404, "Неизвестный путь")
+
+    async def _change_status(self, booking_id: int, action: str, data: Dict[str, Any]) -> Tuple[int, Any]:
+        # С полем version выполняется условное изменение: при устаревшей
+        # версии клиент получает 409 и текущую версию для повтора.
+        version = data.get('version')
+        if version is not None and not isinstance(version, int):
+            raise HTTPError(400, "Версия должна быть целым числом")
+        if action == 'confirm':
+            change = (self.system.confirm_booking if version is None else
+                      self.system.compare_and_confirm)
+        elif action == 'cancel':
+            change = (self.system.cancel_booking if version is None else
+                      self.system.compare_and_cancel)
+        else:
+            raise HTTPError(404, "Неизвестный путь")
+        if self.system.get_booking(booking_id) is None:
+            raise HTTPError(404, "Бронирование не найдено")
+
+        args = (booking_id,) if version is None else (booking_id, version)
+        changed = await self._run_blocking(change, *args)
+        booking = self.system.get_booking(booking_id)
+        return (200 if changed else 409), {
+            'id': booking_id,
+            'changed': changed,
+            'version': booking.version if booking is not None else None
+        }
+
+    async def _create(self, data: Dict[str, Any]) -> Tuple[int, Any]:
+        item = self._parse_booking(data)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+
+        result = await future
+        if result.created:
+            return 201, result.booking.to_dict()
+        return 409, {'error': "Конфликт бронирований", 'conflicts': result.conflicts}
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        # create_bookings возвращается после fsync журнала, поэтому
+        # ответы на пакет отправляются уже после записи на диск
+        try:
+            results = await self._run_blocking(self.system.create_bookings, [item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                _, future = batch[0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            # Ошибка одного запроса не должна отвечать 500 остальным
+            # клиентам пакета: запросы повторяются по одному
+            for entry in batch:
+                await self._run_single(entry)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run_single(self, entry: Tuple[Dict[str, Any], asyncio.Future]):
+        item, future = entry
+        try:
+            result, = await self._run_blocking(self.system.create_bookings, [item])
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    async def _run_blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _availability(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        try:
+            resource_name = query['resource'][0]
+            start_date = BookingService._parse_datetime(query['start'][0])
+            end_date = BookingService._parse_datetime(query['end'][0])
+        except (KeyError, ValueError):
+            raise HTTPError(400, "Нужны параметры resource, start и end в формате ISO")
+        if not DateValidator.is_valid_date_range(start_date, end_date):
+            raise HTTPError(400, "Дата окончания должна быть позже даты начала")
+
+        probe = Booking(
+            id=0,
+            resource_name=resource_name,
+            start_date=start_date,
+            end_date=end_date,
+            customer_name="Проверка доступности"
+        )
+        conflicts = self.system.check_conflicts(probe)
+        return {'available': not conflicts, 'conflicts': [b.id for b in conflicts]}
+
+    @staticmethod
+    def _parse_json(body: bytes) -> Dict[str, Any]:
+        try:
+            data = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, "Некорректный JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Ожидается JSON-объект")
+        return data
+
+    @staticmethod
+    def _parse_id(value: str) -> int:
+        try:
+            return int(value)
+        except ValueError:
+            raise HTTPError(400, "ID должен быть целым числом")
+
+    @staticmethod
+    def _parse_datetime(value: str) -> datetime:
+        # Система хранит наивное локальное время; дату со смещением нельзя
+        # сравнить с остальными, поэтому такой запрос отклоняется
+        date = datetime.fromisoformat(value)
+        if date.tzinfo is not None:
+            raise ValueError("Дата со смещением часового пояса")
+        return date
+
+    @staticmethod
+    def _parse_booking(data: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            item = {
+                'resource_name': str(data['resource_name']),
+                'start_date': BookingService._parse_datetime(data['start_date']),
+                'end_date': BookingService._parse_datetime(data['end_date']),
+                'customer_name': str(data['customer_name']),
+                'notes': str(data.get('notes', ""))
+            }
+        except (KeyError, TypeError, ValueError):
+            raise HTTPError(
+                400, "Нужны поля resource_name, start_date, end_date, customer_name; "
+                     "даты в формате ISO без часового пояса"
+            )
+        if not item['resource_name'] or not item['customer_name']:
+            raise HTTPError(400, "Название ресурса и имя клиента не могут быть пустыми")
+        if not DateValidator.is_valid_date_range(item['start_date'], item['end_date']):
+            raise HTTPError(400, "Дата окончания должна быть позже даты начала")
+        return item
+
+
+async def run_service(port: int = 8080):
+    analyzer = PerformanceAnalyzer()
+    instrumentation.enable(analyzer)
+    service = BookingService(BookingSystem(), port=port, analyzer=analyzer)
+    await service.start()
+    print(f"Сервис бронирования слушает http://{service.host}:{service.port}")
+    await service.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_service(int(sys.argv[1]) if len(sys.argv) > 1 else 8080))
@@ -0,0 +1,174 @@
+import heapq
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from booking_system import Booking, BookingResult, BookingSystem, ColumnarBookingStore
+from date_validator import ConflictChecker
+
+
+def resource_shard(resource_name: str, shards: int) -> int:
+    return zlib.crc32(resource_name.encode('utf-8')) % shards
+
+
+def merge_statistics(parts: List[Dict[str, Any]], customers: List[Set[str]]) -> Dict[str, Any]:
+    # Ресурсы шардов не пересекаются, а клиенты могут повторяться
+    def total(key: str) -> int:
+        return sum(part[key] for part in parts)
+
+    total_attempts = total('total_attempts')
+    conflict_count = total('conflict_count')
+    return {
+        'total_bookings': total('total_bookings'),
+        'active_bookings': total('active_bookings'),
+        'cancelled_bookings': total('cancelled_bookings'),
+        'confirmed_bookings': total('confirmed_bookings'),
+        'total_attempts': total_attempts,
+        'conflict_count': conflict_count,
+        'conflict_rate': (conflict_count / total_attempts * 100
+                          if total_attempts > 0 else 0),
+        'unique_resources': total('unique_resources'),
+        'unique_customers': len(set().union(*customers))
+    }
+
+
+class ShardedBookingSystem:
+    # Ресурсы распределяются по независимым шардам по crc32 имени, поэтому
+    # бронирования разных шардов не делят ни одной блокировки. ID шарда i
+    # идут с шагом shards начиная с i + 1, и по ID сразу виден его шард.
+
+    def __init__(self, shards: int = 8, **system_options):
+        if shards < 1:
+            raise ValueError("Количество шардов должно быть положительным")
+        self._shards = [
+            BookingSystem(first_id=i + 1, id_step=shards, **system_options)
+            for i in range(shards)
+        ]
+
+    @property
+    def shards(self) -> List[BookingSystem]:
+        return self._shards
+
+    def shard_for_resource(self, resource_name: str) -> BookingSystem:
+        return self._shards[self._shard_number(resource_name)]
+
+    def _shard_number(self, resource_name: str) -> int:
+        return resource_shard(resource_name, len(self._shards))
+
+    def shard_for_id(self, booking_id: int) -> BookingSystem:
+        return self._shards[(booking_id - 1) % len(self._shards)]
+
+    def create_booking(
+        self,
+        resource_name: str,
+        start_date: datetime,
+        end_date: datetime,
+        customer_name: str,
+        notes: str = ""
+    ) -> Optional[Booking]:
+        return self.shard_for_resource(resource_name).create_booking(
+            resource_name, start_date, end_date, customer_name, notes
+        )
+
+    def create_bookings(self, batch: List[Dict[str, Any]]) -> List[BookingResult]:
+        BookingSystem.validate_batch(batch)
+        by_shard: Dict[int, List[int]] = defaultdict(list)
+        for pos, item in enumerate(batch):
+            by_shard[self._shard_number(item['resource_name'])].append(pos)
+
+        results: List[Optional[BookingResult]] = [None] * len(batch)
+        for shard, positions in by_shard.items():
+            shard_results = self._shards[shard].create_bookings([batch[pos] for pos in positions])
+            for pos, result in zip(positions, shard_results):
+                results[pos] = result
+        return results
+
+    def check_conflicts(self, booking: Booking) -> List[Booking]:
+        return self.shard_for_resource(booking.resource_name).check_conflicts(booking)
+
+    def get_booking(self, booking_id: int) -> Optional[Booking]:
+        if booking_id < 1:
+            return None
+        return self.shard_for_id(booking_id).get_booking(booking_id)
+
+    def cancel_booking(self, booking_id: int) -> bool:
+        if booking_id < 1:
+            return False
+        return self.shard_for_id(booking_id).cancel_booking(booking_id)
+
+    def confirm_booking(self, booking_id: int) -> bool:
+        if booking_id < 1:
+            return False
+        return self.shard_for_id(booking_id).confirm_booking(booking_id)
+
+    def compare_and_cancel(self, booking_id: int, expected_version: int) -> bool:
+        if booking_id < 1:
+            return False
+        return self.shard_for_id(booking_id).compare_and_cancel(booking_id, expected_version)
+
+    def compare_and_confirm(self, booking_id: int, expected_version: int) -> bool:
+        if booking_id < 1:
+            return False
+        return self.shard_for_id(booking_id).compare_and_confirm(booking_id, expected_version)
+
+    def get_all_bookings(self) -> List[Booking]:
+        return list(heapq.merge(
+            *(shard.get_all_bookings() for shard in self._shards), key=lambda b: b.id
+        ))
+
+    def get_active_bookings(self) -> List[Booking]:
+        return list(heapq.merge(
+            *(shard.get_active_bookings() for shard in self._shards), key=lambda b: b.id
+        ))
+
+    def get_bookings_by_resource(self, resource_name: str) -> List[Booking]:
+        return self.shard_for_resource(resource_name).get_bookings_by_resource(resource_name)
+
+    def get_busy_intervals(
+        self,
+        resource_names: Iterable[str],
+        start_date: datetime,
+        end_date: datetime
+    ) -> Dict[str, List[Tuple[datetime, datetime]]]:
+        return {
+            name: self.shard_for_resource(name).get_busy_intervals([name], start_date, end_date)[name]
+            for name in resource_names
+        }
+
+    def find_earliest_slots(
+        self,
+        resource_names: Iterable[str],
+        search_start: datetime,
+        search_end: datetime,
+        required_duration: timedelta,
+        count: int = 1
+    ) -> List[Tuple[str, datetime, datetime]]:
+        return ConflictChecker.find_earliest_slots(
+            self.get_busy_intervals(resource_names, search_start, search_end),
+            search_start,
+            search_end,
+            required_duration,
+            count
+        )
+
+    def next_free_slot(
+        self,
+        resource_name: str,
+        duration: timedelta,
+        after: datetime
+    ) -> Optional[Tuple[datetime, datetime]]:
+        return self.shard_for_resource(resource_name).next_free_slot(resource_name, duration, after)
+
+    def get_columnar_store(self) -> ColumnarBookingStore:
+        return ColumnarBookingStore.from_bookings(self.get_all_bookings())
+
+    def get_statistics(self) -> Dict[str, any]:
+        return merge_statistics(
+            [shard.get_statistics() for shard in self._shards],
+            [shard.get_customers() for shard in self._shards]
+        )
+
+    def clear_all(self):
+        for shard in self._shards:
+            shard.clear_all()
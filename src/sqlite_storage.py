@@ -0,0 +1,202 @@
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from booking_system import Booking, BookingStatus, from_epoch_us, to_epoch_us
+
+
+ACTIVE_STATUSES = (BookingStatus.PENDING.value, BookingStatus.CONFIRMED.value)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY,
+    resource_name TEXT NOT NULL,
+    start_date INTEGER NOT NULL,
+    end_date INTEGER NOT NULL,
+    customer_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT '',
+    created_at INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_bookings_resource_period
+    ON bookings (resource_name, start_date, end_date);
+CREATE INDEX IF NOT EXISTS idx_bookings_status
+    ON bookings (status);
+CREATE INDEX IF NOT EXISTS idx_bookings_customer
+    ON bookings (customer_name);
+CREATE TABLE IF NOT EXISTS counters (
+    singleton INTEGER PRIMARY KEY CHECK (singleton = 0),
+    next_id INTEGER NOT NULL,
+    total_attempts INTEGER NOT NULL,
+    conflict_count INTEGER NOT NULL,
+    generation INTEGER NOT NULL DEFAULT 0
+);
+"""
+# Базы, созданные до появления версий бронирований
+MIGRATIONS = (
+    ('bookings', 'version', "ALTER TABLE bookings ADD COLUMN version INTEGER NOT NULL DEFAULT 0"),
+    ('counters', 'generation', "ALTER TABLE counters ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+)
+
+COLUMNS = "id, resource_name, start_date, end_date, customer_name, status, notes, created_at, version"
+
+INSERT_BOOKING = f"INSERT INTO bookings ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+UPDATE_STATUS = "UPDATE bookings SET status = ?, version = ? WHERE id = ?"
+SELECT_BY_ID = f"SELECT {COLUMNS} FROM bookings WHERE id = ?"
+SELECT_OVERLAPPING = (
+    f"SELECT {COLUMNS} FROM bookings "
+    "WHERE resource_name = ? AND start_date < ? AND end_date > ? "
+    "AND status IN (?, ?) ORDER BY start_date"
+)
+SELECT_ALL = f"SELECT {COLUMNS} FROM bookings ORDER BY id"
+SELECT_ACTIVE = f"SELECT {COLUMNS} FROM bookings WHERE status IN (?, ?) ORDER BY id"
+SELECT_BY_RESOURCE = f"SELECT {COLUMNS} FROM bookings WHERE resource_name = ? ORDER BY id"
+COUNT_BY_STATUS = "SELECT status, COUNT(*) FROM bookings GROUP BY status"
+COUNT_ACTIVE_BY_RESOURCE = (
+    "SELECT resource_name, COUNT(*) FROM bookings WHERE status IN (?, ?) GROUP BY resource_name"
+)
+COUNT_DISTINCT = (
+    "SELECT (SELECT COUNT(DISTINCT resource_name) FROM bookings), "
+    "(SELECT COUNT(DISTINCT customer_name) FROM bookings)"
+)
+SELECT_COUNTERS = "SELECT next_id, total_attempts, conflict_count, generation FROM counters"
+SAVE_COUNTERS = (
+    "INSERT OR REPLACE INTO counters "
+    "(singleton, next_id, total_attempts, conflict_count, generation) "
+    "VALUES (0, ?, ?, ?, ?)"
+)
+
+
+class SQLiteStorage:
+    # Запросы хранятся константами: sqlite3 кэширует подготовленные
+    # выражения по тексту SQL, поэтому повторные вызовы не компилируются заново.
+
+    def __init__(self, path: str = ":memory:", cached_statements: int = 128):
+        self.path = path
+        self._conn = sqlite3.connect(
+            path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=cached_statements
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        for table, column, statement in MIGRATIONS:
+            columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+            if column not in columns:
+                self._conn.execute(statement)
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        if self._depth == 0:
+            self._conn.execute("BEGIN")
+        self._depth += 1
+        try:
+            yield
+        except BaseException:
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("ROLLBACK")
+            raise
+        self._depth -= 1
+        if self._depth == 0:
+            self._conn.execute("COMMIT")
+
+    def insert(self, booking: Booking):
+        self._conn.execute(INSERT_BOOKING, self._to_row(booking))
+
+    def update_status(self, booking_id: int, status: BookingStatus, version: int):
+        self._conn.execute(UPDATE_STATUS, (status.value, version, booking_id))
+
+    def get(self, booking_id: int) -> Optional[Booking]:
+        row = self._conn.execute(SELECT_BY_ID, (booking_id,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def find_overlapping(
+        self,
+        resource_name: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[Booking]:
+        rows = self._conn.execute(SELECT_OVERLAPPING, (
+            resource_name,
+            to_epoch_us(end_date),
+            to_epoch_us(start_date),
+            *ACTIVE_STATUSES
+        ))
+        return [self._from_row(row) for row in rows]
+
+    def all(self) -> List[Booking]:
+        return [self._from_row(row) for row in self._conn.execute(SELECT_ALL)]
+
+    def active(self) -> List[Booking]:
+        rows = self._conn.execute(SELECT_ACTIVE, ACTIVE_STATUSES)
+        return [self._from_row(row) for row in rows]
+
+    def by_resource(self, resource_name: str) -> List[Booking]:
+        rows = self._conn.execute(SELECT_BY_RESOURCE, (resource_name,))
+        return [self._from_row(row) for row in rows]
+
+    def status_counts(self) -> Dict[BookingStatus, int]:
+        counts = {status: 0 for status in BookingStatus}
+        for status, count in self._conn.execute(COUNT_BY_STATUS):
+            counts[BookingStatus(status)] = count
+        return counts
+
+    def distinct_counts(self) -> Tuple[int, int]:
+        return self._conn.execute(COUNT_DISTINCT).fetchone()
+
+    def active_counts_by_resource(self) -> Dict[str, int]:
+        return dict(self._conn.execute(COUNT_ACTIVE_BY_RESOURCE, ACTIVE_STATUSES))
+
+    def load_counters(self) -> Optional[Tuple[int, int, int, int]]:
+        return self._conn.execute(SELECT_COUNTERS).fetchone()
+
+    def save_counters(
+        self,
+        next_id: int,
+        total_attempts: int,
+        conflict_count: int,
+        generation: int
+    ):
+        self._conn.execute(SAVE_COUNTERS, (next_id, total_attempts, conflict_count, generation))
+
+    def clear(self):
+        with self.transaction():
+            self._conn.execute("DELETE FROM bookings")
+            self._conn.execute("DELETE FROM counters")
+
+    def close(self):
+        self._conn.close()
+
+    @staticmethod
+    def _to_row(booking: Booking) -> tuple:
+        return (
+            booking.id,
+            booking.resource_name,
+            to_epoch_us(booking.start_date),
+            to_epoch_us(booking.end_date),
+            booking.customer_name,
+            booking.status.value,
+            booking.notes,
+            to_epoch_us(booking.created_at),
+            booking.version
+        )
+
+    @staticmethod
+    def _from_row(row: tuple) -> Booking:
+        return Booking(
+            id=row[0],
+            resource_name=row[1],
+            start_date=from_epoch_us(row[2]),
+            end_date=from_epoch_us(row[3]),
+            customer_name=row[4],
+            status=BookingStatus(row[5]),
+            notes=row[6],
+            created_at=from_epoch_us(row[7]),
+            version=row[8]
+        )
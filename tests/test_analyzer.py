@@ -0,0 +1,560 @@
+﻿import pytest
+from datetime import datetime, timedelta
+from collections import defaultdict, Counter
+import json
+import math
+import random
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import Booking, BookingStatus, BookingSystem, ColumnarBookingStore, to_epoch_us
+from analyzer import BookingAnalytics, EventLog, LatencyHistogram, PerformanceAnalyzer, ReportGenerator
+import analyzer
+
+
+def make_booking(booking_id, resource, start, end, status=BookingStatus.PENDING):
+    return Booking(
+        id=booking_id,
+        resource_name=resource,
+        start_date=start,
+        end_date=end,
+        customer_name=f"Клиент {booking_id}",
+        status=status
+    )
+
+
+def pairwise_conflicts(bookings):
+    conflicts_by_resource = defaultdict(int)
+    active = [b for b in bookings if b.is_active()]
+    for i, booking1 in enumerate(active):
+        for booking2 in active[i + 1:]:
+            if booking1.overlaps_with(booking2):
+                conflicts_by_resource[booking1.resource_name] += 1
+    return dict(conflicts_by_resource)
+
+
+def merged_booked_time(bookings, lo, hi):
+    # Эталон: объединение обрезанных окном интервалов активных бронирований
+    clipped = defaultdict(list)
+    for booking in bookings:
+        if booking.is_active() and booking.start_date < hi and booking.end_date > lo:
+            clipped[booking.resource_name].append(
+                (max(booking.start_date, lo), min(booking.end_date, hi))
+            )
+    booked = {}
+    for resource, intervals in clipped.items():
+        covered, merged_end = timedelta(0), None
+        for start, end in sorted(intervals):
+            if merged_end is not None and start < merged_end:
+                start = merged_end
+            if end > start:
+                covered += end - start
+                merged_end = end
+        booked[resource] = (covered, len(intervals))
+    return booked
+
+
+class TestConflictAnalysis:
+    
+    def test_no_bookings(self):
+        result = BookingAnalytics.analyze_conflicts([])
+        
+        assert result['total_conflicts'] == 0
+        assert result['conflicts_by_resource'] == {}
+        assert result['conflict_prone_resources'] == []
+    
+    def test_counts_overlapping_pairs(self):
+        base = datetime(2025, 1, 1)
+        bookings = [
+            make_booking(1, "Зал А", base, base + timedelta(hours=4)),
+            make_booking(2, "Зал А", base + timedelta(hours=1), base + timedelta(hours=2)),
+            make_booking(3, "Зал А", base + timedelta(hours=3), base + timedelta(hours=5)),
+            make_booking(4, "Зал А", base + timedelta(hours=5), base + timedelta(hours=6)),
+            make_booking(5, "Зал Б", base, base + timedelta(hours=4)),
+            make_booking(6, "Зал Б", base, base + timedelta(hours=4),
+                         status=BookingStatus.CANCELLED),
+        ]
+        
+        result = BookingAnalytics.analyze_conflicts(bookings)
+        
+        assert result['total_conflicts'] == 2
+        assert result['conflicts_by_resource'] == {"Зал А": 2}
+        assert result['conflict_prone_resources'] == [("Зал А", 2)]
+    
+    def test_matches_pairwise_comparison(self):
+        rng = random.Random(7)
+        base = datetime(2025, 1, 1)
+        bookings = []
+        for i in range(300):
+            start = base + timedelta(hours=rng.randint(0, 200))
+            bookings.append(make_booking(
+                i + 1,
+                f"Ресурс {rng.randint(0, 8)}",
+                start,
+                start + timedelta(hours=rng.randint(1, 12)),
+                status=rng.choice(list(BookingStatus))
+            ))
+        
+        expected = pairwise_conflicts(bookings)
+        result = BookingAnalytics.analyze_conflicts(bookings)
+        
+        assert list(result['conflicts_by_resource'].items()) == list(expected.items())
+        assert result['total_conflicts'] == sum(expected.values())
+        assert result['conflict_prone_resources'] == sorted(
+            expected.items(), key=lambda x: x[1], reverse=True
+        )[:5]
+
+
+def reference_patterns(bookings):
+    resource_counter = Counter(b.resource_name for b in bookings)
+    name, count = resource_counter.most_common(1)[0]
+    durations = [b.duration_days() for b in bookings]
+    day, day_count = Counter(b.created_at.date() for b in bookings).most_common(1)[0]
+    return {
+        'total_bookings': len(bookings),
+        'unique_resources': len(resource_counter),
+        'unique_customers': len(set(b.customer_name for b in bookings)),
+        'most_popular_resource': {'name': name, 'count': count},
+        'average_duration_days': round(sum(durations) / len(durations), 2),
+        'min_duration_days': min(durations),
+        'max_duration_days': max(durations),
+        'status_distribution': dict(Counter(b.status.value for b in bookings)),
+        'busiest_day': {'date': day.isoformat(), 'bookings': day_count}
+    }
+
+
+def random_bookings(count, seed):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    bookings = []
+    for i in range(count):
+        start = base + timedelta(hours=rng.randint(0, 2000))
+        booking = make_booking(
+            i + 1,
+            f"Ресурс {rng.randint(0, 6)}",
+            start,
+            start + timedelta(hours=rng.randint(1, 200)),
+            status=rng.choice(list(BookingStatus))
+        )
+        booking.created_at = base - timedelta(hours=rng.randint(0, 100))
+        bookings.append(booking)
+    return bookings
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def columnar_backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(analyzer, 'np', None)
+    return request.param
+
+
+class TestColumnarAnalytics:
+    
+    def test_patterns_match_object_analysis(self, columnar_backend):
+        bookings = random_bookings(500, seed=3)
+        
+        result = BookingAnalytics.analyze_booking_patterns(bookings)
+        
+        assert result == reference_patterns(bookings)
+        assert (list(result['status_distribution']) ==
+                list(reference_patterns(bookings)['status_distribution']))
+    
+    def test_patterns_from_system_store(self, columnar_backend):
+        system = BookingSystem(columnar=True)
+        for i in range(40):
+            system.create_booking(
+                resource_name=f"Зал {i % 4}",
+                start_date=datetime(2025, 1, 1) + timedelta(days=i),
+                end_date=datetime(2025, 1, 2) + timedelta(days=i + i % 3),
+                customer_name=f"Клиент {i % 5}"
+            )
+        system.confirm_booking(1)
+        system.cancel_booking(2)
+        
+        store = system.get_columnar_store()
+        
+        assert len(store) == 40
+        assert (BookingAnalytics.analyze_booking_patterns(store) ==
+                reference_patterns(system.get_all_bookings()))
+    
+    def test_utilization_sums_exact_window_time(self):
+        bookings = random_bookings(300, seed=5)
+        period_start = datetime(2025, 1, 20, 7, 30)
+        period_end = datetime(2025, 3, 1, 18, 10)
+        period = period_end - period_start
+        booked = merged_booked_time(bookings, period_start, period_end)
+        
+        for resolution, unit in (('hour', timedelta(hours=1)), ('minute', timedelta(minutes=1))):
+            result = BookingAnalytics.generate_utilization_report(
+                bookings, period_start, period_end, resolution
+            )
+            
+            assert result['period_days'] == 40
+            assert result['period_units'] == round(period / unit, 2)
+            assert set(result['resource_utilization']) == set(booked)
+            for resource, (covered, count) in booked.items():
+                assert result['resource_utilization'][resource] == {
+                    'total_bookings': count,
+                    'booked_units': round(covered / unit, 2),
+                    'total_booked_days': round(covered / timedelta(days=1), 2),
+                    'utilization_rate': round(covered / period * 100, 2)
+                }
+    
+    def test_partial_units_are_not_rounded_up(self):
+        bookings = [
+            make_booking(1, "Зал А", datetime(2025, 1, 1, 9, 10), datetime(2025, 1, 1, 9, 20)),
+            make_booking(2, "Зал А", datetime(2025, 1, 1, 9, 40), datetime(2025, 1, 1, 10, 10)),
+        ]
+        
+        result = BookingAnalytics.generate_utilization_report(
+            bookings, datetime(2025, 1, 1), datetime(2025, 1, 2)
+        )
+        
+        assert result['resource_utilization']["Зал А"]['booked_units'] == round(40 / 60, 2)
+        assert result['resource_utilization']["Зал А"]['utilization_rate'] == round(40 / 1440 * 100, 2)
+    
+    def test_utilization_uses_window_only(self):
+        bookings = [
+            make_booking(1, "Зал А", datetime(2024, 1, 1), datetime(2024, 12, 1)),
+            make_booking(2, "Зал А", datetime(2025, 1, 1, 9), datetime(2025, 1, 1, 13)),
+            make_booking(3, "Зал А", datetime(2025, 1, 1, 12), datetime(2025, 1, 1, 15)),
+            make_booking(4, "Зал Б", datetime(2025, 1, 1, 22), datetime(2025, 1, 3)),
+        ]
+        
+        result = BookingAnalytics.generate_utilization_report(
+            bookings, datetime(2025, 1, 1), datetime(2025, 1, 2)
+        )
+        
+        assert result['period_units'] == 24
+        assert result['resource_utilization'] == {
+            "Зал А": {'total_bookings': 2, 'booked_units': 6,
+                      'total_booked_days': 0.25, 'utilization_rate': 25.0},
+            "Зал Б": {'total_bookings': 1, 'booked_units': 2,
+                      'total_booked_days': 0.08, 'utilization_rate': 8.33},
+        }
+        with pytest.raises(ValueError):
+            BookingAnalytics.generate_utilization_report(
+                bookings, datetime(2025, 1, 1), datetime(2025, 1, 2), 'second'
+            )
+    
+    def test_time_index_follows_store(self):
+        system = BookingSystem(columnar=True)
+        period = (datetime(2025, 1, 1), datetime(2025, 1, 2))
+        system.create_booking("Зал А", datetime(2025, 1, 1, 9), datetime(2025, 1, 1, 12), "Клиент")
+        store = system.get_columnar_store()
+        
+        first = BookingAnalytics.generate_utilization_report(store, *period)
+        index = store.time_index()
+        assert store.time_index() is index
+        
+        system.create_booking("Зал А", datetime(2025, 1, 1, 14), datetime(2025, 1, 1, 15), "Клиент")
+        system.cancel_booking(1)
+        second = BookingAnalytics.generate_utilization_report(store, *period)
+        
+        assert store.time_index() is not index
+        assert len(index) == 1
+        assert len(store.time_index()) == 2
+        assert first['resource_utilization']["Зал А"]['booked_units'] == 3
+        assert second['resource_utilization']["Зал А"]['booked_units'] == 1
+    
+    def test_time_index_extends_with_appended_rows(self):
+        rng = random.Random(21)
+        store = ColumnarBookingStore()
+        previous = store.time_index()
+        for booking_id in range(1, 1200):
+            start = datetime(2025, 1, 1) + timedelta(minutes=rng.randrange(20_000))
+            store.append(make_booking(booking_id, "Зал", start, start + timedelta(minutes=rng.randint(1, 900))))
+            if booking_id % 97 == 0:
+                index = store.time_index()
+                assert len(index) == booking_id
+                assert len(previous) == booking_id - 97
+                previous = index
+                lo = rng.randrange(20_000) * 60_000_000 + to_epoch_us(datetime(2025, 1, 1))
+                hi = lo + rng.randint(1, 3000) * 60_000_000
+                expected = sorted(
+                    (row for row in range(len(store)) if store.starts[row] < hi and store.ends[row] > lo),
+                    key=lambda row: store.starts[row]
+                )
+                assert index.overlapping(lo, hi) == expected
+    
+    def test_store_cleared_during_report(self, monkeypatch):
+        store = ColumnarBookingStore.from_bookings(random_bookings(200, seed=8))
+        period = (datetime(2025, 1, 1), datetime(2025, 3, 1))
+        expected = BookingAnalytics.generate_utilization_report(store, *period)
+        expected_periods = list(BookingAnalytics.iter_period_utilization(store, *period, 'week'))
+        
+        def clearing(method):
+            def wrapper(*args):
+                result = method(*args)
+                store.clear()
+                return result
+            return wrapper
+        
+        for name in ('time_index', 'indexed_columns'):
+            monkeypatch.setattr(store, name, clearing(getattr(store, name)))
+        assert BookingAnalytics.generate_utilization_report(store, *period) == expected
+        
+        for booking in random_bookings(200, seed=8):
+            store.append(booking)
+        assert list(BookingAnalytics.iter_period_utilization(store, *period, 'week')) == expected_periods
+    
+    def test_store_grows_while_analyzed(self):
+        system = BookingSystem(columnar=True)
+        store = system.get_columnar_store()
+        stop = threading.Event()
+        errors = []
+        
+        def analyze():
+            while not stop.is_set():
+                try:
+                    BookingAnalytics.analyze_booking_patterns(store)
+                    BookingAnalytics.pattern_partials(store)
+                except Exception as e:
+                    errors.append(e)
+                    return
+        
+        reader = threading.Thread(target=analyze)
+        reader.start()
+        try:
+            for day in range(3000):
+                system.create_booking(
+                    "Зал", datetime(2025, 1, 1) + timedelta(hours=day),
+                    datetime(2025, 1, 1) + timedelta(hours=day + 1), "Клиент"
+                )
+        finally:
+            stop.set()
+            reader.join()
+        
+        assert errors == []
+        assert BookingAnalytics.analyze_booking_patterns(store)['total_bookings'] == 3000
+    
+    def test_empty_input(self, columnar_backend):
+        assert BookingAnalytics.analyze_booking_patterns([]) == {
+            'total_bookings': 0,
+            'message': 'Нет данных для анализа'
+        }
+        report = BookingAnalytics.generate_utilization_report(
+            [], datetime(2025, 1, 1), datetime(2025, 2, 1)
+        )
+        assert report['resources_analyzed'] == 0
+        assert report['average_utilization'] == 0
+
+
+class TestShardMerging:
+    
+    @staticmethod
+    def partition(bookings, shards):
+        parts = [[] for _ in range(shards)]
+        for booking in bookings:
+            parts[int(booking.resource_name.split()[-1]) % shards].append(booking)
+        return parts
+    
+    def test_merged_patterns_match_whole(self):
+        bookings = random_bookings(500, seed=11)
+        
+        merged = BookingAnalytics.merge_pattern_partials([
+            BookingAnalytics.pattern_partials(part)
+            for part in self.partition(bookings, 3)
+        ])
+        expected = BookingAnalytics.analyze_booking_patterns(bookings)
+        
+        assert merged == expected
+        assert list(merged['status_distribution']) == list(expected['status_distribution'])
+    
+    def test_merged_conflicts_and_utilization_match_whole(self):
+        bookings = random_bookings(300, seed=12)
+        parts = self.partition(bookings, 4)
+        period = (datetime(2025, 1, 1), datetime(2025, 4, 1))
+        
+        conflicts = BookingAnalytics.merge_conflict_results(
+            [BookingAnalytics.analyze_conflicts(part) for part in parts]
+        )
+        utilization = BookingAnalytics.merge_utilization_reports(
+            [BookingAnalytics.generate_utilization_report(part, *period) for part in parts]
+        )
+        
+        expected = BookingAnalytics.analyze_conflicts(bookings)
+        assert conflicts['conflicts_by_resource'] == expected['conflicts_by_resource']
+        assert conflicts['total_conflicts'] == expected['total_conflicts']
+        assert utilization == BookingAnalytics.generate_utilization_report(bookings, *period)
+    
+    def test_merge_empty_partials(self):
+        assert BookingAnalytics.merge_pattern_partials(
+            [BookingAnalytics.pattern_partials([])]
+        ) == {'total_bookings': 0, 'message': 'Нет данных для анализа'}
+
+
+class TestPeriodUtilization:
+    
+    def test_matches_direct_overlap(self):
+        bookings = random_bookings(300, seed=13)
+        start = datetime(2025, 1, 10, 6)
+        end = datetime(2025, 3, 20)
+        
+        for unit in ('day', 'week', 'month'):
+            periods = list(BookingAnalytics.iter_period_utilization(bookings, start, end, unit))
+            
+            assert periods[0]['period_start'] == start
+            assert periods[-1]['period_end'] == end
+            for period in periods:
+                lo, hi = period['period_start'], period['period_end']
+                booked = merged_booked_time(bookings, lo, hi)
+                assert period['resource_utilization'] == {
+                    name: round(time / (hi - lo) * 100, 2)
+                    for name, (time, _) in booked.items()
+                }
+    
+    def test_overlapping_bookings_are_counted_once(self):
+        bookings = [
+            make_booking(1, "Зал А", datetime(2025, 1, 1, 0), datetime(2025, 1, 1, 18)),
+            make_booking(2, "Зал А", datetime(2025, 1, 1, 6), datetime(2025, 1, 1, 12)),
+        ]
+        
+        periods = list(BookingAnalytics.iter_period_utilization(
+            bookings, datetime(2025, 1, 1), datetime(2025, 1, 2)
+        ))
+        
+        assert periods[0]['resource_utilization'] == {"Зал А": 75.0}
+    
+    def test_empty_and_reversed_periods(self):
+        bookings = [make_booking(1, "Зал А", datetime(2025, 1, 5), datetime(2025, 1, 6))]
+        start = datetime(2025, 1, 5, 12)
+        
+        assert list(BookingAnalytics.iter_period_utilization(
+            bookings, start, datetime(2025, 1, 5, 6))) == []
+        assert list(BookingAnalytics.iter_period_utilization(bookings, start, start)) == []
+    
+    def test_streams_long_periods(self):
+        bookings = random_bookings(50, seed=14)
+        periods = BookingAnalytics.iter_period_utilization(
+            bookings, datetime(2025, 1, 1), datetime(2125, 1, 1)
+        )
+        
+        first = next(periods)
+        assert first['period_end'] == datetime(2025, 1, 2)
+        assert sum(1 for _ in periods) == (datetime(2125, 1, 1) - datetime(2025, 1, 2)).days
+
+
+class TestLatencyHistogram:
+    
+    def test_percentiles_within_bucket_error(self):
+        rng = random.Random(22)
+        values = [int(rng.lognormvariate(12, 2)) for _ in range(20_000)]
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+        
+        values.sort()
+        result = histogram.percentiles()
+        for percent, value in result.items():
+            exact = values[max(1, math.ceil(percent / 100 * len(values))) - 1]
+            assert abs(value - exact) <= exact / 64
+        assert histogram.count == len(values)
+        assert histogram.total_ns == sum(values)
+        assert (histogram.min_ns, histogram.max_ns) == (values[0], values[-1])
+    
+    def test_bucket_bounds_cover_values(self):
+        for value in [0, 1, 127, 128, 129, 255, 256, 10 ** 6, 10 ** 9 + 7]:
+            low, high = LatencyHistogram._bucket_bounds(LatencyHistogram._bucket(value))
+            assert low <= value <= high
+    
+    def test_analyzer_memory_is_bounded(self):
+        analyzer = PerformanceAnalyzer(max_events=100)
+        for i in range(5_000):
+            analyzer.record_operation("create_booking", (i % 100 + 1) / 1e6)
+        
+        assert len(analyzer.events) == 100
+        assert len(analyzer.histograms["create_booking"].buckets) == len(LatencyHistogram().buckets)
+        
+        summary = analyzer.get_performance_summary()["create_booking"]
+        assert summary['count'] == 5_000
+        assert summary['min'] == pytest.approx(1e-6)
+        assert summary['max'] == pytest.approx(1e-4)
+        assert summary['average'] == pytest.approx(50.5e-6)
+        assert summary['p50'] == pytest.approx(50e-6, rel=0.01)
+        assert summary['p99'] == pytest.approx(99e-6, rel=0.01)
+        assert analyzer.get_percentile("create_booking", 90) == pytest.approx(90e-6, rel=0.01)
+        
+        report = ReportGenerator.generate_markdown_report({}, {}, analyzer.get_performance_summary())
+        assert "p50 / p90 / p99 / p99.9" in report
+        
+        analyzer.clear_metrics()
+        assert analyzer.get_performance_summary() == {}
+        assert analyzer.get_average_duration("create_booking") == 0.0
+
+    
+    def test_summary_while_recording(self):
+        analyzer = PerformanceAnalyzer(max_events=10)
+        stop = threading.Event()
+        
+        def record():
+            i = 0
+            while not stop.is_set():
+                analyzer.record_operation_ns(f"op{i % 50}", i % 1000 + 1)
+                i += 1
+                if i % 200 == 0:
+                    analyzer.clear_metrics()
+        
+        writer = threading.Thread(target=record)
+        writer.start()
+        try:
+            for _ in range(50):
+                for stats in analyzer.get_performance_summary().values():
+                    assert stats['min'] <= stats['p50'] <= stats['max']
+                for getter in (analyzer.get_min_duration, analyzer.get_max_duration,
+                               analyzer.get_average_duration):
+                    assert 0.0 <= getter("op1") <= 1e-6
+        finally:
+            stop.set()
+            writer.join()
+
+
+class TestEventLog:
+    
+    def test_ring_buffer_keeps_latest_in_order(self):
+        log = EventLog(capacity=4)
+        for i in range(10):
+            log.append(f"op{i % 3}", i)
+        
+        records = list(log)
+        assert len(log) == 4
+        assert [duration for _, _, duration in records] == [6, 7, 8, 9]
+        assert [name for _, name, _ in records] == ["op0", "op1", "op2", "op0"]
+        assert [timestamp for timestamp, _, _ in records] == sorted(timestamp for timestamp, _, _ in records)
+        assert log.operations == ["op0", "op1", "op2"]
+    
+    def test_sampling_keeps_every_nth_event(self):
+        analyzer = PerformanceAnalyzer(max_events=100, sample_every=10)
+        for i in range(1, 101):
+            analyzer.record_operation_ns("create_booking", i)
+        
+        assert [duration for _, _, duration in analyzer.events] == list(range(10, 101, 10))
+        assert analyzer.events.offered == 100
+        assert analyzer.histograms["create_booking"].count == 100
+    
+    def test_export_jsonl(self, tmp_path):
+        analyzer = PerformanceAnalyzer(max_events=3)
+        for i in range(5):
+            analyzer.record_operation("create_booking", (i + 1) / 1000)
+        
+        path = tmp_path / "events.jsonl"
+        assert analyzer.export_events(str(path)) == 3
+        lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+        assert [line['duration_ns'] for line in lines] == [3_000_000, 4_000_000, 5_000_000]
+        assert {line['operation'] for line in lines} == {"create_booking"}
+        assert abs(datetime.fromisoformat(lines[-1]['timestamp']) - datetime.now()) < timedelta(minutes=1)
+        
+        analyzer.clear_metrics()
+        assert len(analyzer.events) == 0
+        assert analyzer.export_events(str(path)) == 0
+    
+    def test_invalid_parameters(self):
+        with pytest.raises(ValueError):
+            EventLog(capacity=0)
+        with pytest.raises(ValueError):
+            EventLog(sample_every=0)
@@ -0,0 +1,168 @@
+import pytest
+import random
+from datetime import datetime, timedelta
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import Booking, BookingSystem, BookingStatus
+from binary_snapshot import MappedSnapshotStorage, open_binary_snapshot, write_binary_snapshot
+import binary_snapshot
+
+
+def make_system(size: int, seed: int = 0) -> BookingSystem:
+    rng = random.Random(seed)
+    system = BookingSystem()
+    base = datetime(2025, 1, 1)
+    for i in range(size):
+        start = base + timedelta(minutes=rng.randrange(0, 5000))
+        system.create_booking(
+            resource_name=f"Зал {rng.randrange(5)}",
+            start_date=start,
+            end_date=start + timedelta(minutes=rng.randint(30, 600), microseconds=i),
+            customer_name=f"Клиент {rng.randrange(20)}",
+            notes=rng.choice(["", "Проектор", "Кофе-брейк"])
+        )
+    for booking in system.get_all_bookings():
+        if booking.id % 3 == 0:
+            system.cancel_booking(booking.id)
+        elif booking.id % 3 == 1:
+            system.confirm_booking(booking.id)
+    return system
+
+
+class TestBinarySnapshot:
+
+    @pytest.fixture
+    def snapshot_path(self, tmp_path):
+        return str(tmp_path / "bookings.snap")
+
+    def test_round_trip(self, snapshot_path):
+        source = make_system(300)
+        write_binary_snapshot(source, snapshot_path)
+
+        system = open_binary_snapshot(snapshot_path)
+
+        assert ([b.to_dict() for b in system.get_all_bookings()] ==
+                [b.to_dict() for b in source.get_all_bookings()])
+        assert ([b.id for b in system.get_active_bookings()] ==
+                [b.id for b in source.get_active_bookings()])
+        assert ([b.id for b in system.get_bookings_by_resource("Зал 2")] ==
+                [b.id for b in source.get_bookings_by_resource("Зал 2")])
+        assert system.get_statistics() == source.get_statistics()
+        assert system.generation == source.generation
+        assert system.get_booking(10_000) is None
+
+    def test_bookings_are_materialized_lazily(self, snapshot_path):
+        source = make_system(100)
+        write_binary_snapshot(source, snapshot_path)
+        storage = MappedSnapshotStorage(snapshot_path)
+        system = BookingSystem(storage=storage)
+
+        assert len(storage) == len(source.get_all_bookings())
+        assert len(system._live) == 0
+
+        booking = system.get_booking(3)
+        assert booking.to_dict() == source.get_booking(3).to_dict()
+        assert system.get_booking(3) is booking
+        assert len(system._live) == 1
+
+    def test_conflicts_match_in_memory(self, snapshot_path):
+        source = make_system(400, seed=7)
+        write_binary_snapshot(source, snapshot_path)
+        system = open_binary_snapshot(snapshot_path)
+
+        rng = random.Random(1)
+        for _ in range(200):
+            start = datetime(2025, 1, 1) + timedelta(minutes=rng.randrange(-100, 5200))
+            probe = Booking(
+                id=0,
+                resource_name=f"Зал {rng.randrange(6)}",
+                start_date=start,
+                end_date=start + timedelta(minutes=rng.randint(1, 300)),
+                customer_name="Клиент"
+            )
+            assert ([b.id for b in system.check_conflicts(probe)] ==
+                    [b.id for b in source.check_conflicts(probe)])
+
+    def test_changes_on_top_of_snapshot(self, snapshot_path):
+        source = make_system(50)
+        write_binary_snapshot(source, snapshot_path)
+        system = open_binary_snapshot(snapshot_path)
+
+        created_at = datetime(2025, 2, 1)
+        for target in (source, system):
+            assert target.cancel_booking(2) is True
+            assert target.confirm_booking(5) is True
+            created = target.create_booking(
+                resource_name="Новый зал",
+                start_date=datetime(2025, 3, 1),
+                end_date=datetime(2025, 3, 2),
+                customer_name="Новый клиент"
+            )
+            created.created_at = created_at
+            target.cancel_booking(created.id)
+            rebooked = target.create_booking(
+                resource_name="Новый зал",
+                start_date=datetime(2025, 3, 1),
+                end_date=datetime(2025, 3, 2),
+                customer_name="Клиент 1"
+            )
+            rebooked.created_at = created_at
+
+        assert system.get_booking(2).status == BookingStatus.CANCELLED
+        assert system.get_booking(rebooked.id).id == len(source.get_all_bookings())
+        assert ([b.to_dict() for b in system.get_all_bookings()] ==
+                [b.to_dict() for b in source.get_all_bookings()])
+        assert system.get_statistics() == source.get_statistics()
+
+    def test_clear_all(self, snapshot_path):
+        write_binary_snapshot(make_system(20), snapshot_path)
+        system = open_binary_snapshot(snapshot_path)
+
+        system.clear_all()
+
+        assert system.get_all_bookings() == []
+        assert system.get_booking(1) is None
+        assert system.get_statistics()['unique_resources'] == 0
+
+    def test_next_id_comes_from_system(self, snapshot_path):
+        source = BookingSystem(first_id=2, id_step=4)
+        for day in range(3):
+            source.create_booking("Зал", datetime(2025, 1, 1 + day), datetime(2025, 1, 2 + day), "Клиент")
+        source.cancel_booking(10)
+        write_binary_snapshot(source, snapshot_path)
+
+        system = open_binary_snapshot(snapshot_path, first_id=2, id_step=4)
+        booking = system.create_booking("Зал", datetime(2025, 2, 1), datetime(2025, 2, 2), "Клиент")
+        assert booking.id == 14
+
+        source.clear_all()
+        write_binary_snapshot(source, snapshot_path)
+        system = open_binary_snapshot(snapshot_path, first_id=2, id_step=4)
+        assert system.create_booking("Зал", datetime(2025, 2, 1), datetime(2025, 2, 2), "Клиент").id == 2
+
+    def test_rewrite_replaces_file_atomically(self, snapshot_path, monkeypatch):
+        source = make_system(20)
+        write_binary_snapshot(source, snapshot_path)
+        with open(snapshot_path, 'rb') as f:
+            original = f.read()
+
+        def failing_replace(src, dst):
+            raise OSError("сбой")
+
+        monkeypatch.setattr(binary_snapshot.os, 'replace', failing_replace)
+        with pytest.raises(OSError):
+            write_binary_snapshot(make_system(40, seed=1), snapshot_path)
+
+        with open(snapshot_path, 'rb') as f:
+            assert f.read() == original
+        assert len(open_binary_snapshot(snapshot_path).get_all_bookings()) == len(source.get_all_bookings())
+
+    def test_rejects_unknown_format(self, snapshot_path):
+        with open(snapshot_path, 'wb') as f:
+            f.write(b'\0' * 256)
+
+        with pytest.raises(ValueError):
+            MappedSnapshotStorage(snapshot_path)
@@ -2,6 +2,7 @@
 from datetime import datetime, timedelta
 import sys
 import os
+import threading
 
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -146,6 +147,20 @@ class TestBooking:
         assert booking1.overlaps_with(booking2) is False
 
 
+    def test_booking_has_no_instance_dict(self):
+        booking = Booking(
+            id=1,
+            resource_name="Ресурс",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 5),
+            customer_name="Клиент"
+        )
+        
+        assert not hasattr(booking, '__dict__')
+        with pytest.raises(AttributeError):
+            booking.unknown_field = 1
+
+
 class TestBookingSystem:
     
     @pytest.fixture
@@ -271,3 +286,263 @@ class TestBookingSystem:
         assert stats['total_attempts'] == 2
         assert stats['conflict_count'] == 1
         assert stats['conflict_rate'] == 50.0
+    
+    def test_cancelled_booking_frees_slot(self, system):
+        booking = system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 10),
+            customer_name="Клиент 1"
+        )
+        
+        system.cancel_booking(booking.id)
+        
+        booking2 = system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 5),
+            end_date=datetime(2025, 1, 15),
+            customer_name="Клиент 2"
+        )
+        
+        assert booking2 is not None
+    
+    def test_check_conflicts_only_target_resource(self, system):
+        for day in range(1, 20, 2):
+            system.create_booking(
+                resource_name="Зал А",
+                start_date=datetime(2025, 1, day),
+                end_date=datetime(2025, 1, day + 1),
+                customer_name="Клиент"
+            )
+            system.create_booking(
+                resource_name="Зал Б",
+                start_date=datetime(2025, 1, day),
+                end_date=datetime(2025, 1, day + 1),
+                customer_name="Клиент"
+            )
+        
+        probe = Booking(
+            id=0,
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 4, 12),
+            end_date=datetime(2025, 1, 7, 12),
+            customer_name="Клиент"
+        )
+        
+        conflicts = system.check_conflicts(probe)
+        assert [b.start_date for b in conflicts] == [
+            datetime(2025, 1, 5),
+            datetime(2025, 1, 7)
+        ]
+        assert all(b.resource_name == "Зал А" for b in conflicts)
+    
+    def test_get_booking_by_id(self, system):
+        bookings = [
+            system.create_booking(
+                resource_name="Зал А",
+                start_date=datetime(2025, 1, day),
+                end_date=datetime(2025, 1, day + 1),
+                customer_name="Клиент"
+            )
+            for day in range(1, 10)
+        ]
+        
+        for booking in bookings:
+            assert system.get_booking(booking.id) is booking
+        
+        system.clear_all()
+        assert system.get_booking(bookings[0].id) is None
+    
+    def test_statistics_follow_status_transitions(self, system):
+        for i in range(6):
+            system.create_booking(
+                resource_name=f"Зал {i % 2}",
+                start_date=datetime(2025, 1, i + 1),
+                end_date=datetime(2025, 1, i + 2),
+                customer_name=f"Клиент {i % 3}"
+            )
+        
+        system.confirm_booking(1)
+        system.confirm_booking(2)
+        system.cancel_booking(2)
+        system.cancel_booking(3)
+        system.cancel_booking(3)
+        
+        stats = system.get_statistics()
+        bookings = system.get_all_bookings()
+        
+        assert stats['total_bookings'] == 6
+        assert stats['active_bookings'] == len(system.get_active_bookings()) == 4
+        assert stats['confirmed_bookings'] == 1
+        assert stats['cancelled_bookings'] == 2
+        assert stats['unique_resources'] == len({b.resource_name for b in bookings}) == 2
+        assert stats['unique_customers'] == len({b.customer_name for b in bookings}) == 3
+        
+        system.clear_all()
+        stats = system.get_statistics()
+        assert stats['total_bookings'] == 0
+        assert stats['active_bookings'] == 0
+        assert stats['unique_customers'] == 0
+    
+    def test_create_bookings_batch(self, system):
+        existing = system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 5),
+            customer_name="Клиент 0"
+        )
+        
+        results = system.create_bookings([
+            {"resource_name": "Зал А", "start_date": datetime(2025, 1, 3),
+             "end_date": datetime(2025, 1, 6), "customer_name": "Клиент 1"},
+            {"resource_name": "Зал А", "start_date": datetime(2025, 1, 10),
+             "end_date": datetime(2025, 1, 12), "customer_name": "Клиент 2"},
+            {"resource_name": "Зал А", "start_date": datetime(2025, 1, 5),
+             "end_date": datetime(2025, 1, 11), "customer_name": "Клиент 3"},
+            {"resource_name": "Зал Б", "start_date": datetime(2025, 1, 3),
+             "end_date": datetime(2025, 1, 6), "customer_name": "Клиент 4",
+             "notes": "Проектор"},
+        ])
+        
+        assert [r.created for r in results] == [False, True, False, True]
+        assert results[0].conflicts == [existing.id]
+        assert results[2].conflicts == [results[1].booking.id]
+        assert results[1].booking.id == 2
+        assert results[3].booking.id == 3
+        assert results[3].booking.notes == "Проектор"
+        
+        stats = system.get_statistics()
+        assert stats['total_attempts'] == 5
+        assert stats['conflict_count'] == 2
+        assert stats['total_bookings'] == 3
+    
+    def test_create_bookings_matches_sequential_calls(self, system):
+        batch = [
+            {
+                "resource_name": f"Зал {i % 3}",
+                "start_date": datetime(2025, 1, 1) + timedelta(hours=(i * 7) % 50),
+                "end_date": datetime(2025, 1, 1) + timedelta(hours=(i * 7) % 50 + 1 + i % 5),
+                "customer_name": f"Клиент {i}"
+            }
+            for i in range(60)
+        ]
+        
+        sequential = BookingSystem()
+        expected = [sequential.create_booking(**item) for item in batch]
+        results = system.create_bookings(batch)
+        
+        assert ([r.booking.id if r.created else None for r in results] ==
+                [b.id if b else None for b in expected])
+        assert system.get_statistics() == sequential.get_statistics()
+    
+    def test_create_bookings_invalid_item(self, system):
+        with pytest.raises(ValueError):
+            system.create_bookings([
+                {"resource_name": "Зал А", "start_date": datetime(2025, 1, 1),
+                 "end_date": datetime(2025, 1, 2), "customer_name": "Клиент"},
+                {"resource_name": "Зал А", "start_date": datetime(2025, 1, 5),
+                 "end_date": datetime(2025, 1, 2), "customer_name": "Клиент"},
+            ])
+        
+        assert system.get_all_bookings() == []
+        assert system.get_statistics()['total_attempts'] == 0
+    
+    def test_names_are_interned(self, system):
+        first = system.create_booking(
+            resource_name="".join(["Зал ", "А"]),
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 2),
+            customer_name="".join(["Клиент ", "1"])
+        )
+        second = system.create_booking(
+            resource_name="".join(["Зал ", "А"]),
+            start_date=datetime(2025, 1, 2),
+            end_date=datetime(2025, 1, 3),
+            customer_name="".join(["Клиент ", "1"])
+        )
+        
+        assert first.resource_name is second.resource_name
+        assert first.customer_name is second.customer_name
+    
+    def test_versions_follow_changes(self, system):
+        first = system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 2),
+            customer_name="Клиент"
+        )
+        second = system.create_booking(
+            resource_name="Зал Б",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 2),
+            customer_name="Клиент"
+        )
+        
+        assert (first.version, second.version) == (1, 2)
+        system.confirm_booking(first.id)
+        assert first.version == 3
+        assert system.generation == 3
+        assert Booking.from_dict(first.to_dict()).version == 3
+    
+    def test_compare_and_set_status(self, system):
+        booking = system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 2),
+            customer_name="Клиент"
+        )
+        seen = booking.version
+        
+        assert system.compare_and_confirm(booking.id, seen) is True
+        assert system.compare_and_cancel(booking.id, seen) is False
+        assert booking.status == BookingStatus.CONFIRMED
+        assert system.compare_and_cancel(booking.id, booking.version) is True
+        assert system.compare_and_confirm(booking.id, booking.version) is False
+        assert system.compare_and_cancel(999, 1) is False
+    
+    def test_compare_and_set_has_single_winner(self, system):
+        booking = system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 2),
+            customer_name="Клиент"
+        )
+        seen = booking.version
+        barrier = threading.Barrier(8)
+        outcomes = []
+        
+        def writer(i):
+            barrier.wait()
+            if i % 2:
+                outcomes.append(system.compare_and_confirm(booking.id, seen))
+            else:
+                outcomes.append(system.compare_and_cancel(booking.id, seen))
+        
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert outcomes.count(True) == 1
+        assert booking.version == seen + 1
+    
+    def test_generation_survives_clear(self, system):
+        booking = system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 2),
+            customer_name="Клиент"
+        )
+        stale_version = booking.version
+        
+        system.clear_all()
+        reused = system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 2),
+            customer_name="Клиент"
+        )
+        
+        assert reused.id == booking.id
+        assert system.compare_and_cancel(reused.id, stale_version) is False
@@ -0,0 +1,132 @@
+import pytest
+import random
+import sys
+import os
+import threading
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+from sqlite_storage import SQLiteStorage
+
+
+RESOURCES = 4
+ATTEMPTS_PER_THREAD = 300
+
+
+@pytest.fixture(autouse=True)
+def frequent_switches():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def hammer(system: BookingSystem, threads: int):
+    barrier = threading.Barrier(threads)
+    created = []
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        barrier.wait()
+        for i in range(ATTEMPTS_PER_THREAD):
+            start = datetime(2025, 1, 1) + timedelta(hours=rng.randrange(500))
+            booking = system.create_booking(
+                resource_name=f"Зал {rng.randrange(RESOURCES)}",
+                start_date=start,
+                end_date=start + timedelta(hours=rng.randint(1, 6)),
+                customer_name=f"Клиент {seed}"
+            )
+            if booking is not None:
+                created.append(booking)
+                if i % 5 == 0:
+                    system.cancel_booking(booking.id)
+                elif i % 5 == 1:
+                    system.confirm_booking(booking.id)
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return created
+
+
+def assert_consistent(system: BookingSystem, created, attempts: int):
+    assert sorted(b.id for b in created) == list(range(1, len(created) + 1))
+
+    for i in range(RESOURCES):
+        active = sorted(
+            (b for b in system.get_bookings_by_resource(f"Зал {i}") if b.is_active()),
+            key=lambda b: b.start_date
+        )
+        for first, second in zip(active, active[1:]):
+            assert first.end_date <= second.start_date
+
+    stats = system.get_statistics()
+    assert stats['total_attempts'] == attempts
+    assert stats['total_bookings'] == len(created)
+    assert stats['conflict_count'] == stats['total_attempts'] - len(created)
+    assert stats['active_bookings'] == len(system.get_active_bookings())
+
+
+class TestConcurrency:
+
+    @pytest.mark.parametrize("threads", [1, 2, 4, 8, 16])
+    def test_no_double_booking(self, threads):
+        system = BookingSystem()
+        created = hammer(system, threads)
+        assert_consistent(system, created, threads * ATTEMPTS_PER_THREAD)
+
+    def test_no_double_booking_with_storage(self):
+        system = BookingSystem(storage=SQLiteStorage())
+        created = hammer(system, 4)
+        assert_consistent(system, created, 4 * ATTEMPTS_PER_THREAD)
+
+    @pytest.mark.parametrize("action", ['cancel_booking', 'confirm_booking'])
+    def test_status_change_after_clear(self, action):
+        system = BookingSystem()
+        booking = system.create_booking("Зал", datetime(2025, 1, 1), datetime(2025, 1, 2), "Клиент")
+        get_booking = system.get_booking
+
+        def lookup_then_clear(booking_id):
+            # clear_all успевает выполниться между поиском и захватом блокировок
+            found = get_booking(booking_id)
+            system.get_booking = get_booking
+            system.clear_all()
+            return found
+
+        system.get_booking = lookup_then_clear
+        assert getattr(system, action)(booking.id) is False
+
+        stats = system.get_statistics()
+        assert (stats['active_bookings'], stats['cancelled_bookings'], stats['confirmed_bookings']) == (0, 0, 0)
+
+    def test_concurrent_batches(self):
+        system = BookingSystem()
+        barrier = threading.Barrier(4)
+        results = []
+
+        def worker(seed: int):
+            rng = random.Random(seed)
+            batch = []
+            for _ in range(100):
+                start = datetime(2025, 1, 1) + timedelta(hours=rng.randrange(300))
+                batch.append({
+                    "resource_name": f"Зал {rng.randrange(RESOURCES)}",
+                    "start_date": start,
+                    "end_date": start + timedelta(hours=rng.randint(1, 6)),
+                    "customer_name": f"Клиент {seed}"
+                })
+            barrier.wait()
+            results.extend(system.create_bookings(batch))
+
+        workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(4)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        created = [r.booking for r in results if r.created]
+        assert_consistent(system, created, 400)
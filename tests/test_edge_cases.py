@@ -1,4 +1,5 @@
 ﻿import pytest
+import random
 from datetime import datetime, timedelta
 import sys
 import os
@@ -6,7 +7,8 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from booking_system import Booking, BookingSystem, BookingStatus
-from date_validator import DateValidator, ConflictChecker
+from date_validator import DateValidator, ConflictChecker, HolidayCalendar
+import date_validator
 
 
 class TestEdgeCases:
@@ -300,3 +302,268 @@ class TestDateValidatorEdgeCases:
         )
         assert len(slots) == 1
         assert slots[0] == (datetime(2025, 1, 5), datetime(2025, 1, 10))
+
+
+def brute_force_slots(busy_by_resource, search_start, search_end, duration, step):
+    # Слот начинается там, где свободное окно следует за занятым шагом
+    # или за началом поиска
+    def free(resource, start, end):
+        return not any(DateValidator.dates_overlap(start, end, busy_start, busy_end)
+                       for busy_start, busy_end in busy_by_resource[resource])
+    
+    slots = []
+    for resource in busy_by_resource:
+        current = search_start
+        while current + duration <= search_end:
+            if free(resource, current, current + duration) and (
+                    current == search_start or not free(resource, current - step, current)):
+                slots.append((current, resource))
+            current += step
+    return slots
+
+
+class TestEarliestSlots:
+    
+    def test_merges_overlapping_bookings(self):
+        busy = [
+            (datetime(2025, 1, 3), datetime(2025, 1, 6)),
+            (datetime(2025, 1, 1), datetime(2025, 1, 4)),
+            (datetime(2025, 1, 6), datetime(2025, 1, 7)),
+        ]
+        
+        assert ConflictChecker.merge_busy_intervals(busy) == [
+            (datetime(2025, 1, 1), datetime(2025, 1, 7))
+        ]
+        assert list(ConflictChecker.iter_free_gaps(
+            ConflictChecker.merge_busy_intervals(busy),
+            datetime(2025, 1, 2),
+            datetime(2025, 1, 10),
+            timedelta(days=1)
+        )) == [(datetime(2025, 1, 7), datetime(2025, 1, 10))]
+    
+    def test_earliest_across_resources(self):
+        busy_by_resource = {
+            "Зал А": [(datetime(2025, 1, 1), datetime(2025, 1, 5))],
+            "Зал Б": [(datetime(2025, 1, 1), datetime(2025, 1, 3)),
+                      (datetime(2025, 1, 4), datetime(2025, 1, 10))],
+            "Зал В": [(datetime(2025, 1, 1), datetime(2025, 1, 10))],
+        }
+        
+        slots = ConflictChecker.find_earliest_slots(
+            busy_by_resource,
+            datetime(2025, 1, 1),
+            datetime(2025, 1, 10),
+            timedelta(days=1),
+            count=3
+        )
+        
+        assert slots == [
+            ("Зал Б", datetime(2025, 1, 3), datetime(2025, 1, 4)),
+            ("Зал А", datetime(2025, 1, 5), datetime(2025, 1, 6)),
+        ]
+    
+    def test_matches_brute_force(self):
+        rng = random.Random(5)
+        base = datetime(2025, 1, 1)
+        busy_by_resource = {}
+        for i in range(20):
+            busy = []
+            for _ in range(rng.randint(0, 8)):
+                start = base + timedelta(hours=rng.randrange(100))
+                busy.append((start, start + timedelta(hours=rng.randint(1, 12))))
+            busy_by_resource[f"Ресурс {i}"] = busy
+        
+        search_start = base + timedelta(hours=10)
+        search_end = base + timedelta(hours=90)
+        duration = timedelta(hours=4)
+        slots = ConflictChecker.find_earliest_slots(
+            busy_by_resource, search_start, search_end, duration, count=30
+        )
+        
+        order = {name: i for i, name in enumerate(busy_by_resource)}
+        expected = sorted(
+            brute_force_slots(busy_by_resource, search_start, search_end, duration, timedelta(hours=1)),
+            key=lambda slot: (slot[0], order[slot[1]])
+        )[:30]
+        assert [(start, resource) for resource, start, _ in slots] == expected
+    
+    def test_system_searches_resource_pool(self):
+        system = BookingSystem()
+        for i in range(5):
+            system.create_booking(
+                resource_name=f"Зал {i}",
+                start_date=datetime(2025, 1, 1),
+                end_date=datetime(2025, 1, 2) + timedelta(days=i),
+                customer_name="Клиент"
+            )
+        system.cancel_booking(1)
+        
+        slots = system.find_earliest_slots(
+            [f"Зал {i}" for i in range(5)],
+            datetime(2025, 1, 1),
+            datetime(2025, 1, 10),
+            timedelta(days=2),
+            count=3
+        )
+        
+        assert slots == [
+            ("Зал 0", datetime(2025, 1, 1), datetime(2025, 1, 3)),
+            ("Зал 1", datetime(2025, 1, 3), datetime(2025, 1, 5)),
+            ("Зал 2", datetime(2025, 1, 4), datetime(2025, 1, 6)),
+        ]
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def batch_backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(date_validator, 'np', None)
+    return request.param
+
+
+def as_lists(matrix):
+    return matrix.tolist() if hasattr(matrix, 'tolist') else matrix
+
+
+class TestBatchOverlaps:
+    
+    @staticmethod
+    def random_intervals(rng, count):
+        base = datetime(2025, 1, 1)
+        intervals = []
+        for _ in range(count):
+            start = base + timedelta(hours=rng.randrange(500))
+            intervals.append((start, start + timedelta(hours=rng.randint(1, 48))))
+        return intervals
+    
+    @staticmethod
+    def epoch(intervals):
+        to_us = lambda date: (date - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+        return [to_us(start) for start, _ in intervals], [to_us(end) for _, end in intervals]
+    
+    def test_matches_scalar_checks(self, batch_backend):
+        rng = random.Random(18)
+        candidates = self.random_intervals(rng, 40)
+        existing = self.random_intervals(rng, 60)
+        candidate_starts, candidate_ends = self.epoch(candidates)
+        starts, ends = self.epoch(existing)
+        
+        mask = as_lists(DateValidator.overlap_mask(candidate_starts, candidate_ends, starts, ends))
+        durations = as_lists(DateValidator.overlap_durations(candidate_starts, candidate_ends, starts, ends))
+        
+        for i, (new_start, new_end) in enumerate(candidates):
+            for j, (start, end) in enumerate(existing):
+                assert mask[i][j] == DateValidator.dates_overlap(new_start, new_end, start, end)
+                overlap = DateValidator.get_overlap_duration(new_start, new_end, start, end)
+                expected = overlap // timedelta(microseconds=1) if overlap is not None else 0
+                assert durations[i][j] == expected
+    
+    def test_batch_conflicts(self, batch_backend, monkeypatch):
+        # Маленький блок заставляет NumPy-ветку пройти несколько блоков
+        monkeypatch.setattr(date_validator, 'BATCH_ELEMENTS', 100)
+        rng = random.Random(19)
+        candidates = self.random_intervals(rng, 50)
+        existing = self.random_intervals(rng, 30)
+        
+        conflicts = ConflictChecker.batch_conflicts(*self.epoch(existing), *self.epoch(candidates))
+        
+        assert conflicts == [
+            ConflictChecker.check_date_conflicts(existing, new_start, new_end)
+            for new_start, new_end in candidates
+        ]
+        assert ConflictChecker.batch_conflicts([], [], [1, 5], [3, 9]) == [[], []]
+        assert ConflictChecker.batch_conflicts([1], [3], [], []) == []
+
+
+def listed_business_days(start, end, holidays=()):
+    return sum(
+        1 for day in DateValidator.get_date_range_list(start, end)
+        if not DateValidator.is_weekend(day) and day.date() not in holidays
+    )
+
+
+class TestBusinessDays:
+    
+    @staticmethod
+    def random_ranges(count, seed):
+        rng = random.Random(seed)
+        ranges = []
+        for _ in range(count):
+            start = datetime(2024, 1, 1) + timedelta(hours=rng.randrange(800 * 24))
+            ranges.append((start, start + timedelta(hours=rng.randrange(-48, 60 * 24))))
+        return ranges
+    
+    def test_matches_day_by_day_count(self):
+        holidays = {datetime(2024, 1, 1).date(), datetime(2024, 5, 9).date(),
+                    datetime(2024, 6, 15).date(), datetime(2025, 1, 7).date()}
+        calendar = HolidayCalendar(holidays)
+        
+        for start, end in self.random_ranges(300, seed=20):
+            assert DateValidator.get_business_days_count(start, end) == listed_business_days(start, end)
+            assert (DateValidator.get_business_days_count(start, end, calendar) ==
+                    listed_business_days(start, end, holidays))
+    
+    def test_calendar(self):
+        calendar = HolidayCalendar([datetime(2025, 5, 9), datetime(2025, 5, 10)])
+        calendar.add(datetime(2025, 5, 9))
+        
+        assert len(calendar) == 2
+        assert datetime(2025, 5, 10) in calendar
+        assert datetime(2025, 5, 11) not in calendar
+        assert not DateValidator.is_business_day(datetime(2025, 5, 9), calendar)
+        assert DateValidator.is_business_day(datetime(2025, 5, 8), calendar)
+        assert DateValidator.get_business_days_count(
+            datetime(2025, 5, 5), datetime(2025, 5, 12), calendar
+        ) == 4
+    
+    def test_batch_counts(self, batch_backend):
+        ranges = self.random_ranges(200, seed=21)
+        calendar = HolidayCalendar([datetime(2024, 3, 8), datetime(2024, 11, 4), datetime(2025, 2, 24)])
+        
+        assert DateValidator.get_business_days_counts(ranges) == [
+            DateValidator.get_business_days_count(start, end) for start, end in ranges
+        ]
+        assert DateValidator.get_business_days_counts(ranges, calendar) == [
+            DateValidator.get_business_days_count(start, end, calendar) for start, end in ranges
+        ]
+        assert DateValidator.get_business_days_counts([]) == []
+
+
+class TestDateChunks:
+    
+    def test_iter_date_range_is_lazy(self):
+        days = DateValidator.iter_date_range(datetime(2025, 1, 1, 15), datetime(9999, 1, 1))
+        
+        assert next(days) == datetime(2025, 1, 1)
+        assert next(days) == datetime(2025, 1, 2)
+        assert (list(DateValidator.iter_date_range(datetime(2025, 1, 30), datetime(2025, 2, 2))) ==
+                DateValidator.get_date_range_list(datetime(2025, 1, 30), datetime(2025, 2, 2)))
+    
+    def test_week_and_month_chunks(self):
+        start = datetime(2025, 1, 29, 12)
+        end = datetime(2025, 3, 4)
+        
+        weeks = list(DateValidator.iter_date_chunks(start, end, 'week'))
+        months = list(DateValidator.iter_date_chunks(start, end, 'month'))
+        
+        assert weeks[0] == (start, datetime(2025, 2, 3))
+        assert weeks[1] == (datetime(2025, 2, 3), datetime(2025, 2, 10))
+        assert weeks[-1] == (datetime(2025, 3, 3), end)
+        assert months == [
+            (start, datetime(2025, 2, 1)),
+            (datetime(2025, 2, 1), datetime(2025, 3, 1)),
+            (datetime(2025, 3, 1), end)
+        ]
+        for chunks in (weeks, months):
+            assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+    
+    def test_unknown_unit(self):
+        with pytest.raises(ValueError):
+            list(DateValidator.iter_date_chunks(datetime(2025, 1, 1), datetime(2025, 2, 1), 'year'))
+    
+    def test_empty_and_reversed_periods_have_no_chunks(self):
+        start = datetime(2025, 1, 5, 12)
+        for unit in ('day', 'week', 'month'):
+            assert list(DateValidator.iter_date_chunks(start, datetime(2025, 1, 5, 6), unit)) == []
+            assert list(DateValidator.iter_date_chunks(start, start, unit)) == []
@@ -0,0 +1,149 @@
+import pytest
+import random
+import sys
+import os
+import threading
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+import booking_system
+from gap_index import FreeGapIndex
+from sharded_system import ShardedBookingSystem
+from sqlite_storage import SQLiteStorage
+
+
+BASE = datetime(2025, 1, 1)
+
+
+def brute_force_slot(busy, duration, after):
+    # Перебор по часам: все интервалы в тестах выровнены по часу
+    current = after
+    while any(start < current + duration and current < end for start, end in busy):
+        current += timedelta(hours=1)
+    return current
+
+
+class TestFreeGapIndex:
+
+    def test_reserve_and_release(self):
+        index = FreeGapIndex()
+        index.reserve(BASE, BASE + timedelta(days=1))
+        index.reserve(BASE + timedelta(days=2), BASE + timedelta(days=3))
+        index.reserve(BASE + timedelta(days=1), BASE + timedelta(days=2))
+
+        assert list(index.gaps()) == [
+            (datetime.min, BASE),
+            (BASE + timedelta(days=3), datetime.max)
+        ]
+
+        index.release(BASE + timedelta(days=1), BASE + timedelta(days=2))
+        assert len(index) == 3
+        assert index.next_free_slot(timedelta(hours=12), BASE - timedelta(hours=12)) == BASE - timedelta(hours=12)
+        assert index.next_free_slot(timedelta(hours=12), BASE) == BASE + timedelta(days=1)
+        assert index.next_free_slot(timedelta(days=1), BASE + timedelta(hours=1)) == BASE + timedelta(days=1)
+        assert index.next_free_slot(timedelta(days=2), BASE + timedelta(hours=1)) == BASE + timedelta(days=3)
+
+        with pytest.raises(ValueError):
+            index.reserve(BASE + timedelta(hours=12), BASE + timedelta(days=1, hours=12))
+
+    def test_matches_brute_force(self):
+        rng = random.Random(17)
+        index = FreeGapIndex()
+        busy = []
+        for _ in range(2000):
+            if busy and rng.random() < 0.3:
+                interval = busy.pop(rng.randrange(len(busy)))
+                index.release(*interval)
+            else:
+                start = BASE + timedelta(hours=rng.randrange(1000))
+                end = start + timedelta(hours=rng.randint(1, 10))
+                if all(end <= s or e <= start for s, e in busy):
+                    busy.append((start, end))
+                    index.reserve(start, end)
+
+            after = BASE + timedelta(hours=rng.randrange(1000))
+            duration = timedelta(hours=rng.randint(1, 12))
+            assert index.next_free_slot(duration, after) == brute_force_slot(busy, duration, after)
+
+        assert len(index) == len(list(index.gaps()))
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'sharded'])
+def system(request):
+    if request.param == 'sqlite':
+        return BookingSystem(storage=SQLiteStorage(':memory:'))
+    if request.param == 'sharded':
+        return ShardedBookingSystem(shards=3)
+    return BookingSystem()
+
+
+class TestNextFreeSlot:
+
+    def test_follows_creates_and_cancels(self, system):
+        day = timedelta(days=1)
+        bookings = [
+            system.create_booking(
+                resource_name="Зал А",
+                start_date=BASE + i * day,
+                end_date=BASE + (i + 1) * day,
+                customer_name="Клиент"
+            )
+            for i in range(5)
+        ]
+
+        assert system.next_free_slot("Зал А", day, BASE) == (BASE + 5 * day, BASE + 6 * day)
+        assert system.next_free_slot("Зал Б", day, BASE) == (BASE, BASE + day)
+
+        system.cancel_booking(bookings[2].id)
+        system.cancel_booking(bookings[3].id)
+        assert system.next_free_slot("Зал А", 2 * day, BASE) == (BASE + 2 * day, BASE + 4 * day)
+
+        system.create_booking(
+            resource_name="Зал А",
+            start_date=BASE + 2 * day,
+            end_date=BASE + 3 * day,
+            customer_name="Клиент"
+        )
+        assert system.next_free_slot("Зал А", day, BASE) == (BASE + 3 * day, BASE + 4 * day)
+        assert system.next_free_slot("Зал А", 2 * day, BASE) == (BASE + 5 * day, BASE + 7 * day)
+
+        system.clear_all()
+        assert system.next_free_slot("Зал А", day, BASE) == (BASE, BASE + day)
+
+    def test_clear_during_index_build(self, monkeypatch):
+        system = BookingSystem()
+        day = timedelta(days=1)
+        for i in range(3):
+            system.create_booking("Зал А", BASE + i * day, BASE + (i + 1) * day, "Клиент")
+        clearing = []
+
+        class ClearingGapIndex(FreeGapIndex):
+            def reserve(self, start, end):
+                if not clearing:
+                    clearing.append(threading.Thread(target=system.clear_all))
+                    clearing[0].start()
+                    clearing[0].join(0.1)
+                super().reserve(start, end)
+
+        monkeypatch.setattr(booking_system, 'FreeGapIndex', ClearingGapIndex)
+        system.next_free_slot("Зал А", day, BASE)
+        clearing[0].join()
+
+        assert system.next_free_slot("Зал А", day, BASE) == (BASE, BASE + day)
+        booking = system.create_booking("Зал А", BASE, BASE + day, "Клиент")
+        assert booking.id == 1
+        assert [b.id for b in system.get_all_bookings()] == [1]
+
+    def test_failed_index_update_leaves_no_booking(self):
+        system = BookingSystem()
+        system.next_free_slot("Зал А", timedelta(hours=1), BASE)
+        system._gap_index["Зал А"].reserve(BASE, BASE + timedelta(days=1))
+
+        with pytest.raises(ValueError):
+            system.create_booking("Зал А", BASE, BASE + timedelta(hours=2), "Клиент")
+
+        assert system.get_all_bookings() == []
+        assert system.get_statistics()['active_bookings'] == 0
+        assert system.create_booking("Зал Б", BASE, BASE + timedelta(hours=2), "Клиент").id == 1
@@ -0,0 +1,79 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+from analyzer import PerformanceAnalyzer, BookingAnalytics
+import instrumentation
+
+
+BASE = datetime(2025, 1, 1)
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = PerformanceAnalyzer()
+    yield analyzer
+    instrumentation.disable()
+
+
+class TestInstrumentation:
+
+    def test_records_system_and_analytics_calls(self, analyzer):
+        instrumentation.enable(analyzer)
+        system = BookingSystem()
+        booking = system.create_booking("Зал", BASE, BASE + timedelta(hours=2), "Клиент")
+        assert system.create_booking("Зал", BASE, BASE + timedelta(hours=1), "Клиент") is None
+        system.confirm_booking(booking.id)
+        BookingAnalytics.analyze_booking_patterns(system.get_all_bookings())
+
+        summary = analyzer.get_performance_summary()
+        assert summary["BookingSystem.create_booking"]["count"] == 2
+        assert summary["BookingSystem.confirm_booking"]["count"] == 1
+        assert summary["BookingAnalytics.analyze_booking_patterns"]["count"] == 1
+        assert summary["BookingSystem.create_booking"]["min"] > 0
+
+    def test_disable_restores_original_methods(self, analyzer):
+        create_booking = vars(BookingSystem)["create_booking"]
+        analyze = vars(BookingAnalytics)["analyze_booking_patterns"]
+
+        instrumentation.enable(analyzer)
+        instrumentation.enable(analyzer)
+        assert vars(BookingSystem)["create_booking"] is not create_booking
+        assert isinstance(vars(BookingAnalytics)["analyze_booking_patterns"], staticmethod)
+
+        instrumentation.disable()
+        assert vars(BookingSystem)["create_booking"] is create_booking
+        assert vars(BookingAnalytics)["analyze_booking_patterns"] is analyze
+        assert not instrumentation.is_enabled()
+
+        BookingSystem().create_booking("Зал", BASE, BASE + timedelta(hours=1), "Клиент")
+        assert analyzer.histograms == {}
+
+    def test_exceptions_are_recorded_and_propagated(self, analyzer):
+        system = BookingSystem()
+        with instrumentation.instrumented(analyzer):
+            with pytest.raises(ValueError):
+                system.create_booking("Зал", BASE, BASE - timedelta(hours=1), "Клиент")
+        assert analyzer.histograms["BookingSystem.create_booking"].count == 1
+        assert not instrumentation.is_enabled()
+
+    def test_decorator_and_measure(self, analyzer):
+        @instrumentation.timed("custom")
+        def work(value):
+            return value * 2
+
+        assert work(2) == 4
+        with instrumentation.measure("block"):
+            pass
+        assert analyzer.histograms == {}
+
+        with instrumentation.instrumented(analyzer, targets=()):
+            assert work(3) == 6
+            with instrumentation.measure("block"):
+                pass
+        assert analyzer.histograms["custom"].count == 1
+        assert analyzer.histograms["block"].count == 1
@@ -0,0 +1,123 @@
+import asyncio
+import sys
+import os
+import urllib.request
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analyzer import PerformanceAnalyzer
+from booking_system import BookingSystem
+from metrics import CONTENT_TYPE, MetricsExporter
+from service import BookingService
+from sqlite_storage import SQLiteStorage
+
+
+BASE = datetime(2025, 1, 1)
+
+
+def parse_samples(text: str):
+    # Разбор строк-значений: {(имя, метки): значение}
+    assert text.endswith('# EOF\n')
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith('#'):
+            continue
+        key, _, value = line.rpartition(' ')
+        name, _, labels = key.partition('{')
+        samples[(name, labels.rstrip('}'))] = float(value)
+    return samples
+
+
+def fill_system(system: BookingSystem):
+    first = system.create_booking("Зал А", BASE, BASE + timedelta(hours=2), "Клиент 1")
+    system.create_booking("Зал А", BASE + timedelta(hours=3), BASE + timedelta(hours=4), "Клиент 2")
+    system.create_booking("Зал Б", BASE, BASE + timedelta(hours=1), "Клиент 1")
+    assert system.create_booking("Зал А", BASE, BASE + timedelta(hours=1), "Клиент 3") is None
+    system.confirm_booking(first.id)
+    system.cancel_booking(first.id + 2)
+
+
+class TestMetricsExporter:
+
+    def test_histograms_and_counters(self):
+        analyzer = PerformanceAnalyzer()
+        for duration_ns in [500, 3_000, 3_000, 40_000, 2 * 10 ** 10]:
+            analyzer.record_operation_ns("create_booking", duration_ns)
+        analyzer.record_operation_ns('name "with" quotes', 1)
+
+        samples = parse_samples(MetricsExporter(analyzer=analyzer).render())
+        bucket = 'booking_operation_duration_seconds_bucket'
+        label = 'operation="create_booking"'
+        assert samples[(bucket, label + ',le="1e-06"')] == 1
+        assert samples[(bucket, label + ',le="5e-06"')] == 3
+        assert samples[(bucket, label + ',le="5e-05"')] == 4
+        assert samples[(bucket, label + ',le="10.0"')] == 4
+        assert samples[(bucket, label + ',le="+Inf"')] == 5
+        assert samples[('booking_operation_duration_seconds_count', label)] == 5
+        assert samples[('booking_operations_total', label)] == 5
+        assert samples[('booking_operations_total', 'operation="name \\"with\\" quotes"')] == 1
+
+        counts = [value for (name, labels), value in samples.items()
+                  if name == bucket and labels.startswith(label)]
+        assert counts == sorted(counts)
+
+    def test_system_gauges_in_memory_and_storage(self, tmp_path):
+        for system in (BookingSystem(), BookingSystem(storage=SQLiteStorage(str(tmp_path / "db.sqlite")))):
+            fill_system(system)
+            samples = parse_samples(MetricsExporter(system).render())
+            assert samples[('booking_attempts_total', '')] == 4
+            assert samples[('booking_conflicts_total', '')] == 1
+            assert samples[('booking_conflict_ratio', '')] == 0.25
+            assert samples[('booking_active_bookings', '')] == 2
+            assert samples[('booking_bookings', 'status="pending"')] == 1
+            assert samples[('booking_bookings', 'status="confirmed"')] == 1
+            assert samples[('booking_bookings', 'status="cancelled"')] == 1
+            assert samples[('booking_resource_active_bookings', 'resource="Зал А"')] == 2
+            assert ('booking_resource_active_bookings', 'resource="Зал Б"') not in samples
+
+    def test_render_is_cached_until_change(self):
+        system = BookingSystem()
+        analyzer = PerformanceAnalyzer()
+        exporter = MetricsExporter(system, analyzer)
+
+        first = exporter.render()
+        assert exporter.render() is first
+
+        system.create_booking("Зал А", BASE, BASE + timedelta(hours=1), "Клиент")
+        second = exporter.render()
+        assert parse_samples(second)[('booking_active_bookings', '')] == 1
+
+        # Конфликт не меняет поколение, но меняет счетчик попыток
+        system.create_booking("Зал А", BASE, BASE + timedelta(hours=1), "Клиент")
+        third = exporter.render()
+        assert parse_samples(third)[('booking_conflicts_total', '')] == 1
+        assert exporter.render() is third
+
+        analyzer.record_operation("create_booking", 0.001)
+        assert exporter.render() is not third
+
+    def test_scrape_service_endpoint(self):
+        analyzer = PerformanceAnalyzer()
+        analyzer.record_operation("create_booking", 0.002)
+        system = BookingSystem()
+        fill_system(system)
+
+        def scrape(port: int):
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+                return response.status, response.headers['Content-Type'], response.read().decode('utf-8')
+
+        async def main():
+            service = BookingService(system, port=0, analyzer=analyzer)
+            await service.start()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(None, scrape, service.port)
+            finally:
+                await service.stop()
+
+        status, content_type, body = asyncio.run(main())
+        assert status == 200
+        assert content_type == CONTENT_TYPE
+        samples = parse_samples(body)
+        assert samples[('booking_operations_total', 'operation="create_booking"')] == 1
+        assert samples[('booking_resource_active_bookings', 'resource="Зал А"')] == 2
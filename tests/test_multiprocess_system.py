@@ -0,0 +1,133 @@
+import pytest
+import random
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analyzer import BookingAnalytics
+from booking_system import BookingSystem, BookingStatus
+from multiprocess_system import ProcessShardedBookingSystem
+
+
+def make_batch(size: int, seed: int = 0):
+    rng = random.Random(seed)
+    batch = []
+    for _ in range(size):
+        start = datetime(2025, 1, 1) + timedelta(days=rng.randrange(60))
+        batch.append({
+            "resource_name": f"Зал {rng.randrange(10)}",
+            "start_date": start,
+            "end_date": start + timedelta(days=rng.randint(1, 4)),
+            "customer_name": f"Клиент {rng.randrange(25)}"
+        })
+    return batch
+
+
+@pytest.fixture(scope="module")
+def systems():
+    batch = make_batch(400)
+    single = BookingSystem()
+    with ProcessShardedBookingSystem(workers=3) as sharded:
+        sharded_results = sharded.create_bookings(batch[:200])
+        single_results = single.create_bookings(batch[:200])
+        for item in batch[200:]:
+            sharded.create_booking(**item)
+            single.create_booking(**item)
+        yield single, sharded, single_results, sharded_results
+
+
+class TestProcessShardedBookingSystem:
+
+    def test_results_match_single_process(self, systems):
+        single, sharded, single_results, sharded_results = systems
+        assert ([r.created for r in sharded_results] ==
+                [r.created for r in single_results])
+
+        for i in range(10):
+            resource = f"Зал {i}"
+            assert ([(b.start_date, b.end_date) for b in sharded.get_bookings_by_resource(resource)] ==
+                    [(b.start_date, b.end_date) for b in single.get_bookings_by_resource(resource)])
+
+        resources = [f"Зал {i}" for i in range(10)]
+        search = (datetime(2025, 1, 1), datetime(2025, 3, 1), timedelta(days=2))
+        assert (sharded.find_earliest_slots(resources, *search, count=15) ==
+                single.find_earliest_slots(resources, *search, count=15))
+
+    def test_routing_by_id(self, systems):
+        _, sharded, _, _ = systems
+        bookings = sharded.get_all_bookings()
+        ids = [b.id for b in bookings]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+
+        target = bookings[1]
+        assert sharded.get_booking(target.id).to_dict() == target.to_dict()
+        assert sharded.get_booking(0) is None
+        if target.is_active():
+            assert sharded.cancel_booking(target.id) is True
+            assert sharded.get_booking(target.id).status == BookingStatus.CANCELLED
+            assert sharded.confirm_booking(target.id) is False
+
+    def test_statistics_and_analytics_are_merged(self):
+        batch = make_batch(300, seed=3)
+        single = BookingSystem()
+        single.create_bookings(batch)
+        with ProcessShardedBookingSystem(workers=4) as sharded:
+            sharded.create_bookings(batch)
+
+            single_stats = single.get_statistics()
+            sharded_stats = sharded.get_statistics()
+            for key in ('total_bookings', 'active_bookings', 'total_attempts',
+                        'conflict_count', 'unique_resources', 'unique_customers'):
+                assert sharded_stats[key] == single_stats[key]
+
+            patterns = sharded.analyze_booking_patterns()
+            expected = BookingAnalytics.analyze_booking_patterns(single.get_all_bookings())
+            for key in ('total_bookings', 'unique_resources', 'unique_customers',
+                        'most_popular_resource', 'average_duration_days',
+                        'status_distribution'):
+                assert patterns[key] == expected[key]
+
+            period = (datetime(2025, 1, 1), datetime(2025, 3, 1))
+            utilization = sharded.generate_utilization_report(*period)
+            expected = BookingAnalytics.generate_utilization_report(single.get_all_bookings(), *period)
+            assert utilization == expected
+            assert sharded.analyze_conflicts()['total_conflicts'] == 0
+
+    def test_errors_are_reraised(self):
+        with ProcessShardedBookingSystem(workers=2) as sharded:
+            with pytest.raises(ValueError):
+                sharded.create_booking(
+                    resource_name="",
+                    start_date=datetime(2025, 1, 1),
+                    end_date=datetime(2025, 1, 2),
+                    customer_name="Клиент"
+                )
+            sharded.clear_all()
+            assert sharded.get_statistics()['total_attempts'] == 0
+
+    def test_invalid_batch_is_not_partly_applied(self):
+        batch = make_batch(30)
+        batch[-1] = dict(batch[-1], customer_name="")
+        with ProcessShardedBookingSystem(workers=3) as sharded:
+            with pytest.raises(ValueError):
+                sharded.create_bookings(batch)
+            assert sharded.get_all_bookings() == []
+            assert sharded.get_statistics()['total_attempts'] == 0
+
+    def test_statistics_take_one_round_trip(self, monkeypatch):
+        with ProcessShardedBookingSystem(workers=2) as sharded:
+            sharded.create_bookings(make_batch(20))
+            calls = []
+            gather = sharded._gather
+
+            def counting_gather(kind, name, *args):
+                calls.append((kind, name))
+                return gather(kind, name, *args)
+
+            monkeypatch.setattr(sharded, '_gather', counting_gather)
+            stats = sharded.get_statistics()
+            assert len(calls) == 1
+            assert stats['total_attempts'] == 20
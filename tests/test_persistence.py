@@ -0,0 +1,233 @@
+import pytest
+import json
+from datetime import datetime, timedelta
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingStatus
+from persistence import BookingJournal, BookingPersistence
+import persistence
+
+
+def fill(system, count, resource="Зал А"):
+    bookings = []
+    for i in range(count):
+        bookings.append(system.create_booking(
+            resource_name=resource,
+            start_date=datetime(2025, 1, 1) + timedelta(days=i),
+            end_date=datetime(2025, 1, 2) + timedelta(days=i),
+            customer_name=f"Клиент {i}"
+        ))
+    return bookings
+
+
+def state_of(system):
+    return (
+        [b.to_dict() for b in system.get_all_bookings()],
+        system.get_statistics(),
+        system.generation
+    )
+
+
+class TestBookingPersistence:
+    
+    def test_recover_from_journal(self, tmp_path):
+        storage = BookingPersistence(str(tmp_path), snapshot_every=0)
+        system = storage.open()
+        bookings = fill(system, 5)
+        system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1, 12),
+            end_date=datetime(2025, 1, 1, 13),
+            customer_name="Конфликт"
+        )
+        system.confirm_booking(bookings[0].id)
+        system.cancel_booking(bookings[1].id)
+        system.create_bookings([
+            {"resource_name": "Зал Б", "start_date": datetime(2025, 1, 1),
+             "end_date": datetime(2025, 1, 3), "customer_name": "Пакет"},
+            {"resource_name": "Зал Б", "start_date": datetime(2025, 1, 2),
+             "end_date": datetime(2025, 1, 4), "customer_name": "Пакет"},
+        ])
+        expected = state_of(system)
+        storage.close()
+        
+        recovered = BookingPersistence(str(tmp_path)).open()
+        
+        assert state_of(recovered) == expected
+        assert recovered.get_booking(bookings[0].id).status == BookingStatus.CONFIRMED
+        assert recovered.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 2),
+            customer_name="Клиент"
+        ) is None
+    
+    def test_periodic_snapshot_compacts_journal(self, tmp_path):
+        storage = BookingPersistence(str(tmp_path), snapshot_every=4)
+        system = storage.open()
+        bookings = fill(system, 10)
+        system.cancel_booking(bookings[3].id)
+        expected = state_of(system)
+        storage.close()
+        
+        # Снимки пишутся в фоне, поэтому момент последнего снимка не
+        # фиксирован; в журнале остаются ровно записи после него
+        with open(storage.snapshot_path, 'r', encoding='utf-8') as f:
+            snapshot_seq = json.load(f)['seq']
+        journal = list(BookingJournal.read(storage.journal_path))
+        assert snapshot_seq >= 4
+        assert [event['seq'] for event in journal] == list(range(snapshot_seq + 1, 12))
+        
+        recovered_storage = BookingPersistence(str(tmp_path), snapshot_every=4)
+        recovered = recovered_storage.open()
+        assert state_of(recovered) == expected
+        
+        new_booking = fill(recovered, 1, resource="Зал Б")[0]
+        assert new_booking.id == 11
+        recovered_storage.close()
+    
+    def test_batch_counters_match_snapshot(self, tmp_path):
+        storage = BookingPersistence(str(tmp_path), snapshot_every=1)
+        system = storage.open()
+        fill(system, 2)
+        system.create_bookings([
+            {"resource_name": "Зал А", "start_date": datetime(2025, 1, 1, 12) + timedelta(days=i),
+             "end_date": datetime(2025, 1, 1, 13) + timedelta(days=i), "customer_name": "Пакет"}
+            for i in range(4)
+        ])
+        storage.wait_snapshot()
+        expected = state_of(system)
+        storage.close()
+        
+        recovered = BookingPersistence(str(tmp_path)).open()
+        assert state_of(recovered) == expected
+        assert recovered.get_statistics()['total_attempts'] == 6
+        assert recovered.get_statistics()['conflict_count'] == 2
+    
+    def test_create_waits_for_commit(self, tmp_path):
+        storage = BookingPersistence(
+            str(tmp_path), snapshot_every=0,
+            group_commit_size=1000, group_commit_interval=60
+        )
+        system = storage.open()
+        booking = fill(system, 1)[0]
+        
+        journal = list(BookingJournal.read(storage.journal_path))
+        assert [event['booking']['id'] for event in journal] == [booking.id]
+        storage.close()
+    
+    def test_replay_skips_unknown_booking(self, tmp_path):
+        storage = BookingPersistence(str(tmp_path), snapshot_every=0)
+        system = storage.open()
+        booking = fill(system, 1)[0]
+        storage.close()
+        
+        with open(storage.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'op': 'cancel', 'id': 999, 'seq': 2}) + '\n')
+            f.write(json.dumps({'op': 'confirm', 'id': booking.id, 'seq': 3}) + '\n')
+        
+        recovered = BookingPersistence(str(tmp_path)).open()
+        assert recovered.get_booking(booking.id).status == BookingStatus.CONFIRMED
+        assert recovered.get_booking(999) is None
+    
+    def test_invalid_request_counts_as_attempt(self, tmp_path):
+        storage = BookingPersistence(str(tmp_path), snapshot_every=0)
+        system = storage.open()
+        fill(system, 1)
+        with pytest.raises(ValueError):
+            system.create_booking("Зал А", datetime(2025, 2, 2), datetime(2025, 2, 1), "Клиент")
+        assert system.get_statistics()['total_attempts'] == 2
+        expected = state_of(system)
+        storage.close()
+        
+        recovered = BookingPersistence(str(tmp_path)).open()
+        assert state_of(recovered) == expected
+    
+    def test_clear_all_is_journaled(self, tmp_path):
+        storage = BookingPersistence(str(tmp_path), snapshot_every=0)
+        system = storage.open()
+        fill(system, 3)
+        system.clear_all()
+        fill(system, 1)
+        storage.close()
+        
+        recovered = BookingPersistence(str(tmp_path)).open()
+        assert len(recovered.get_all_bookings()) == 1
+        assert recovered.get_statistics()['total_attempts'] == 1
+    
+    def test_torn_tail_is_discarded(self, tmp_path):
+        storage = BookingPersistence(str(tmp_path), snapshot_every=0)
+        system = storage.open()
+        fill(system, 3)
+        storage.close()
+        
+        with open(storage.journal_path, 'a', encoding='utf-8') as f:
+            f.write('{"op": "create", "booking": {"id"')
+        
+        storage = BookingPersistence(str(tmp_path), snapshot_every=0)
+        system = storage.open()
+        assert len(system.get_all_bookings()) == 3
+        fill(system, 1, resource="Зал Б")
+        storage.close()
+        
+        recovered = BookingPersistence(str(tmp_path)).open()
+        assert len(recovered.get_all_bookings()) == 4
+
+
+class TestBookingJournal:
+    
+    def test_group_commit_batches_fsync(self, tmp_path, monkeypatch):
+        calls = []
+        real_fsync = os.fsync
+        
+        def counting_fsync(fd):
+            calls.append(fd)
+            real_fsync(fd)
+        
+        monkeypatch.setattr(persistence.os, 'fsync', counting_fsync)
+        
+        journal = BookingJournal(
+            str(tmp_path / "journal.jsonl"),
+            group_commit_size=100,
+            group_commit_interval=10
+        )
+        for i in range(500):
+            journal.append({'op': 'confirm', 'id': i})
+        journal.sync()
+        journal.close()
+        
+        assert len(calls) <= 10
+        events = list(BookingJournal.read(str(tmp_path / "journal.jsonl")))
+        assert [e['seq'] for e in events] == list(range(1, 501))
+    
+    def test_ticket_waits_for_fsync(self, tmp_path):
+        path = str(tmp_path / "journal.jsonl")
+        journal = BookingJournal(path, group_commit_size=1000, group_commit_interval=60)
+        tickets = [journal.append({'op': 'confirm', 'id': i}) for i in range(3)]
+        tickets[-1].wait()
+        
+        assert [t.seq for t in tickets] == [1, 2, 3]
+        assert [e['seq'] for e in BookingJournal.read(path)] == [1, 2, 3]
+        journal.close()
+    
+    def test_truncate_keeps_later_records(self, tmp_path):
+        path = str(tmp_path / "journal.jsonl")
+        journal = BookingJournal(path)
+        for i in range(5):
+            journal.append({'op': 'confirm', 'id': i})
+        journal.sync()
+        journal.truncate(3)
+        journal.append({'op': 'clear'}).wait()
+        journal.close()
+        
+        assert [e['seq'] for e in BookingJournal.read(path)] == [4, 5, 6]
+    
+    def test_append_after_close(self, tmp_path):
+        journal = BookingJournal(str(tmp_path / "journal.jsonl"))
+        journal.close()
+        
+        with pytest.raises(ValueError):
+            journal.append({'op': 'clear'})
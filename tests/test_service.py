@@ -0,0 +1,258 @@
+import asyncio
+import json
+import sys
+import threading
+import os
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem
+from persistence import BookingJournal, BookingPersistence
+from service import BookingService
+
+
+async def request(port: int, method: str, path: str, payload=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    return status, json.loads(body)
+
+
+def booking_payload(resource: str, start: datetime, hours: int = 2, customer: str = "Клиент"):
+    return {
+        'resource_name': resource,
+        'start_date': start.isoformat(),
+        'end_date': (start + timedelta(hours=hours)).isoformat(),
+        'customer_name': customer
+    }
+
+
+def run_with_service(scenario, system=None, **options):
+    async def main():
+        service = BookingService(system or BookingSystem(), port=0, **options)
+        await service.start()
+        try:
+            return await scenario(service)
+        finally:
+            await service.stop()
+    return asyncio.run(main())
+
+
+class TestBookingService:
+
+    def test_create_lookup_and_status_changes(self):
+        async def scenario(service):
+            start = datetime(2025, 1, 1, 10)
+            status, created = await request(service.port, 'POST', '/bookings',
+                                            booking_payload("Зал А", start))
+            assert status == 201
+            booking_id = created['id']
+
+            status, conflict = await request(service.port, 'POST', '/bookings',
+                                             booking_payload("Зал А", start + timedelta(hours=1)))
+            assert status == 409
+            assert conflict['conflicts'] == [booking_id]
+
+            status, found = await request(service.port, 'GET', f'/bookings/{booking_id}')
+            assert status == 200
+            assert found == created
+
+            assert (await request(service.port, 'POST', f'/bookings/{booking_id}/confirm'))[0] == 200
+            assert (await request(service.port, 'POST', f'/bookings/{booking_id}/confirm'))[0] == 409
+            assert (await request(service.port, 'POST', f'/bookings/{booking_id}/cancel'))[0] == 200
+
+            status, stats = await request(service.port, 'GET', '/statistics')
+            assert stats['cancelled_bookings'] == 1
+            assert stats['conflict_count'] == 1
+
+        run_with_service(scenario)
+
+    def test_conditional_status_change(self):
+        async def scenario(service):
+            _, created = await request(service.port, 'POST', '/bookings',
+                                       booking_payload("Зал А", datetime(2025, 1, 1)))
+            path = f"/bookings/{created['id']}"
+
+            status, confirmed = await request(service.port, 'POST', f'{path}/confirm',
+                                              {'version': created['version']})
+            assert status == 200
+            assert confirmed['version'] > created['version']
+
+            status, stale = await request(service.port, 'POST', f'{path}/cancel',
+                                          {'version': created['version']})
+            assert status == 409
+            assert stale == {'id': created['id'], 'changed': False, 'version': confirmed['version']}
+
+            status, _ = await request(service.port, 'POST', f'{path}/cancel',
+                                      {'version': stale['version']})
+            assert status == 200
+
+        run_with_service(scenario)
+
+    def test_availability(self):
+        async def scenario(service):
+            start = datetime(2025, 1, 1, 10)
+            _, created = await request(service.port, 'POST', '/bookings',
+                                       booking_payload("Зал А", start))
+
+            status, busy = await request(service.port, 'GET', '/availability?' + urlencode({
+                'resource': "Зал А",
+                'start': start.isoformat(),
+                'end': (start + timedelta(hours=1)).isoformat()
+            }))
+            assert status == 200
+            assert busy == {'available': False, 'conflicts': [created['id']]}
+
+            _, free = await request(service.port, 'GET', '/availability?' + urlencode({
+                'resource': "Зал А",
+                'start': (start + timedelta(hours=2)).isoformat(),
+                'end': (start + timedelta(hours=3)).isoformat()
+            }))
+            assert free['available'] is True
+
+        run_with_service(scenario)
+
+    def test_invalid_requests(self):
+        async def scenario(service):
+            start = datetime(2025, 1, 1)
+            assert (await request(service.port, 'POST', '/bookings', {'resource_name': "Зал"}))[0] == 400
+            assert (await request(service.port, 'POST', '/bookings',
+                                  booking_payload("Зал", start, hours=-1)))[0] == 400
+            assert (await request(service.port, 'GET', '/bookings/abc'))[0] == 400
+            assert (await request(service.port, 'GET', '/bookings/42'))[0] == 404
+            assert (await request(service.port, 'DELETE', '/statistics'))[0] == 405
+            assert (await request(service.port, 'GET', '/unknown'))[0] == 404
+            assert (await request(service.port, 'POST', '/bookings/42/confirm'))[0] == 404
+            assert (await request(service.port, 'POST', '/bookings/42/cancel', {'version': 1}))[0] == 404
+
+        run_with_service(scenario)
+
+    def test_rejects_timestamps_with_offset(self):
+        async def scenario(service):
+            payload = booking_payload("Зал А", datetime(2025, 1, 2, 10))
+            payload['start_date'] += '+00:00'
+            assert (await request(service.port, 'POST', '/bookings', payload))[0] == 400
+            assert (await request(service.port, 'GET', '/availability?' + urlencode({
+                'resource': "Зал А",
+                'start': '2025-01-02T10:00:00+03:00',
+                'end': '2025-01-02T11:00:00+03:00'
+            })))[0] == 400
+
+        run_with_service(scenario)
+
+    def test_failed_batch_is_retried_per_item(self):
+        system = BookingSystem()
+        batch_sizes = []
+        create_bookings = system.create_bookings
+
+        def failing_create_bookings(batch):
+            batch_sizes.append(len(batch))
+            if any(item['customer_name'] == "Сбой" for item in batch):
+                raise RuntimeError("сбой")
+            return create_bookings(batch)
+
+        system.create_bookings = failing_create_bookings
+
+        async def scenario(service):
+            start = datetime(2025, 1, 1, 10)
+            responses = await asyncio.gather(*(
+                request(service.port, 'POST', '/bookings',
+                        booking_payload(f"Зал {i}", start, customer="Сбой" if i == 2 else "Клиент"))
+                for i in range(5)
+            ))
+            assert [status for status, _ in responses] == [201, 201, 500, 201, 201]
+
+        run_with_service(scenario, system=system, batch_window=0.05)
+        assert batch_sizes[0] == 5
+
+    def test_invalid_content_length(self):
+        async def raw_status(port: int, length: str) -> int:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(
+                f"POST /bookings HTTP/1.1\r\nHost: localhost\r\n"
+                f"Content-Length: {length}\r\n\r\n".encode('latin-1')
+            )
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return int(response.split(b' ', 2)[1])
+
+        async def scenario(service):
+            assert await raw_status(service.port, 'abc') == 400
+            assert await raw_status(service.port, '-5') == 400
+            assert await raw_status(service.port, str(10 ** 9)) == 413
+
+        run_with_service(scenario)
+
+    def test_changes_run_off_the_event_loop(self):
+        system = BookingSystem()
+        threads = []
+        for name in ('create_bookings', 'confirm_booking'):
+            method = getattr(system, name)
+
+            def recording(*args, method=method):
+                threads.append(threading.current_thread().name)
+                return method(*args)
+
+            setattr(system, name, recording)
+
+        async def scenario(service):
+            status, created = await request(service.port, 'POST', '/bookings',
+                                            booking_payload("Зал А", datetime(2025, 1, 1)))
+            assert status == 201
+            assert (await request(service.port, 'POST', f"/bookings/{created['id']}/confirm"))[0] == 200
+
+        run_with_service(scenario, system=system)
+        assert len(threads) == 2
+        assert all(name.startswith('booking-io') for name in threads)
+
+    def test_concurrent_creates_are_batched(self):
+        system = BookingSystem()
+        batch_sizes = []
+        create_bookings = system.create_bookings
+
+        def counting_create_bookings(batch):
+            batch_sizes.append(len(batch))
+            return create_bookings(batch)
+
+        system.create_bookings = counting_create_bookings
+
+        async def scenario(service):
+            start = datetime(2025, 1, 1, 10)
+            responses = await asyncio.gather(*(
+                request(service.port, 'POST', '/bookings',
+                        booking_payload("Зал А", start, customer=f"Клиент {i}"))
+                for i in range(40)
+            ))
+            statuses = [status for status, _ in responses]
+            assert statuses.count(201) == 1
+            assert statuses.count(409) == 39
+
+        run_with_service(scenario, system=system, batch_window=0.05)
+        assert sum(batch_sizes) == 40
+        assert len(batch_sizes) < 40
+
+    def test_responses_wait_for_durable_journal(self, tmp_path):
+        persistence = BookingPersistence(str(tmp_path), group_commit_interval=0.05)
+        system = persistence.open()
+
+        async def scenario(service):
+            status, created = await request(service.port, 'POST', '/bookings',
+                                            booking_payload("Зал А", datetime(2025, 1, 1)))
+            assert status == 201
+            events = list(BookingJournal.read(persistence.journal_path))
+            assert [e['op'] for e in events] == ['create']
+            assert events[0]['booking']['id'] == created['id']
+
+        run_with_service(scenario, system=system, persistence=persistence)
+        persistence.close()
@@ -0,0 +1,135 @@
+import pytest
+import random
+import sys
+import os
+import threading
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import BookingSystem, BookingStatus
+from sharded_system import ShardedBookingSystem
+
+
+def make_batch(size: int, seed: int = 0):
+    rng = random.Random(seed)
+    batch = []
+    for _ in range(size):
+        start = datetime(2025, 1, 1) + timedelta(hours=rng.randrange(200))
+        batch.append({
+            "resource_name": f"Зал {rng.randrange(12)}",
+            "start_date": start,
+            "end_date": start + timedelta(hours=rng.randint(1, 8)),
+            "customer_name": f"Клиент {rng.randrange(30)}"
+        })
+    return batch
+
+
+class TestShardedBookingSystem:
+
+    @pytest.fixture
+    def system(self):
+        return ShardedBookingSystem(shards=4)
+
+    def test_ids_are_unique_and_routable(self, system):
+        bookings = [
+            system.create_booking(
+                resource_name=f"Зал {i}",
+                start_date=datetime(2025, 1, 1),
+                end_date=datetime(2025, 1, 2),
+                customer_name="Клиент"
+            )
+            for i in range(20)
+        ]
+
+        ids = [b.id for b in bookings]
+        assert len(set(ids)) == 20
+        for booking in bookings:
+            assert system.get_booking(booking.id) is booking
+        assert system.get_booking(0) is None
+        assert system.get_booking(10_000) is None
+        assert [b.id for b in system.get_all_bookings()] == sorted(ids)
+
+    def test_same_resource_conflicts(self, system):
+        first = system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 10),
+            customer_name="Клиент 1"
+        )
+        assert system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 5),
+            end_date=datetime(2025, 1, 15),
+            customer_name="Клиент 2"
+        ) is None
+
+        assert system.cancel_booking(first.id) is True
+        assert system.confirm_booking(first.id) is False
+        assert system.get_booking(first.id).status == BookingStatus.CANCELLED
+        assert [b.id for b in system.get_bookings_by_resource("Зал А")] == [first.id]
+
+    def test_matches_single_system(self, system):
+        batch = make_batch(300)
+        single = BookingSystem()
+
+        sharded_results = system.create_bookings(batch[:150])
+        single_results = single.create_bookings(batch[:150])
+        for item in batch[150:]:
+            system.create_booking(**item)
+            single.create_booking(**item)
+
+        assert ([r.created for r in sharded_results] ==
+                [r.created for r in single_results])
+        assert system.get_statistics() == single.get_statistics()
+        for i in range(12):
+            resource = f"Зал {i}"
+            assert ([(b.start_date, b.customer_name) for b in system.get_bookings_by_resource(resource)] ==
+                    [(b.start_date, b.customer_name) for b in single.get_bookings_by_resource(resource)])
+
+        resources = [f"Зал {i}" for i in range(12)]
+        search = (datetime(2025, 1, 1), datetime(2025, 1, 10), timedelta(hours=3))
+        assert (system.find_earliest_slots(resources, *search, count=20) ==
+                single.find_earliest_slots(resources, *search, count=20))
+
+    def test_concurrent_creates(self, system):
+        barrier = threading.Barrier(8)
+
+        def worker(seed: int):
+            barrier.wait()
+            for item in make_batch(200, seed):
+                booking = system.create_booking(**item)
+                if booking is not None and booking.id % 2:
+                    system.confirm_booking(booking.id)
+
+        workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        for i in range(12):
+            active = sorted(system.get_bookings_by_resource(f"Зал {i}"), key=lambda b: b.start_date)
+            for first, second in zip(active, active[1:]):
+                assert first.end_date <= second.start_date
+        stats = system.get_statistics()
+        assert stats['total_attempts'] == 1600
+        assert stats['total_bookings'] == len(system.get_all_bookings())
+
+    def test_invalid_batch_is_not_partly_applied(self, system):
+        batch = make_batch(40)
+        batch[-1] = dict(batch[-1], end_date=batch[-1]['start_date'] - timedelta(hours=1))
+
+        with pytest.raises(ValueError):
+            system.create_bookings(batch)
+
+        assert system.get_all_bookings() == []
+        assert system.get_statistics()['total_attempts'] == 0
+
+    def test_clear_all(self, system):
+        system.create_bookings(make_batch(50))
+
+        system.clear_all()
+
+        assert system.get_all_bookings() == []
+        assert system.get_statistics()['total_attempts'] == 0
@@ -0,0 +1,155 @@
+import pytest
+from datetime import datetime, timedelta
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from booking_system import Booking, BookingSystem, BookingStatus
+from sqlite_storage import SQLiteStorage
+
+
+class TestSQLiteStorage:
+    
+    @pytest.fixture
+    def system(self):
+        return BookingSystem(storage=SQLiteStorage())
+    
+    def test_create_and_conflict(self, system):
+        booking = system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 10),
+            customer_name="Клиент 1",
+            notes="Проектор"
+        )
+        conflict = system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 5),
+            end_date=datetime(2025, 1, 15),
+            customer_name="Клиент 2"
+        )
+        
+        assert booking.id == 1
+        assert conflict is None
+        assert system.get_booking(1) is booking
+        assert system.get_booking(1).notes == "Проектор"
+        
+        probe = Booking(
+            id=0,
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 9),
+            end_date=datetime(2025, 1, 12),
+            customer_name="Клиент"
+        )
+        assert [b.id for b in system.check_conflicts(probe)] == [1]
+    
+    def test_status_changes_and_queries(self, system):
+        for i in range(4):
+            system.create_booking(
+                resource_name=f"Зал {i % 2}",
+                start_date=datetime(2025, 1, 1 + i),
+                end_date=datetime(2025, 1, 2 + i),
+                customer_name=f"Клиент {i % 3}"
+            )
+        
+        assert system.confirm_booking(1) is True
+        assert system.cancel_booking(2) is True
+        assert system.cancel_booking(2) is False
+        assert system.confirm_booking(2) is False
+        
+        assert [b.id for b in system.get_active_bookings()] == [1, 3, 4]
+        assert [b.id for b in system.get_bookings_by_resource("Зал 0")] == [1, 3]
+        assert system.get_booking(2).status == BookingStatus.CANCELLED
+        
+        stats = system.get_statistics()
+        assert stats['total_bookings'] == 4
+        assert stats['active_bookings'] == 3
+        assert stats['confirmed_bookings'] == 1
+        assert stats['cancelled_bookings'] == 1
+        assert stats['unique_resources'] == 2
+        assert stats['unique_customers'] == 3
+    
+    def test_bulk_matches_in_memory(self, system):
+        batch = [
+            {
+                "resource_name": f"Зал {i % 3}",
+                "start_date": datetime(2025, 1, 1) + timedelta(hours=(i * 7) % 50),
+                "end_date": datetime(2025, 1, 1) + timedelta(hours=(i * 7) % 50 + 1 + i % 5),
+                "customer_name": f"Клиент {i}"
+            }
+            for i in range(60)
+        ]
+        
+        in_memory = BookingSystem()
+        expected = in_memory.create_bookings(batch)
+        results = system.create_bookings(batch)
+        
+        assert ([(r.created, r.conflicts) for r in results] ==
+                [(r.created, r.conflicts) for r in expected])
+        assert system.get_statistics() == in_memory.get_statistics()
+    
+    def test_reopen_file_database(self, tmp_path):
+        path = str(tmp_path / "bookings.db")
+        storage = SQLiteStorage(path)
+        system = BookingSystem(storage=storage)
+        first = system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1, 9, 30),
+            end_date=datetime(2025, 1, 1, 12, 0, 0, 500),
+            customer_name="Клиент"
+        )
+        system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1, 10),
+            end_date=datetime(2025, 1, 1, 11),
+            customer_name="Клиент"
+        )
+        system.confirm_booking(first.id)
+        storage.close()
+        
+        reopened = BookingSystem(storage=SQLiteStorage(path))
+        booking = reopened.get_booking(first.id)
+        
+        assert booking.to_dict() == first.to_dict()
+        assert reopened.generation == system.generation
+        stats = reopened.get_statistics()
+        assert stats['total_attempts'] == 2
+        assert stats['conflict_count'] == 1
+        
+        second = reopened.create_booking(
+            resource_name="Зал Б",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 2),
+            customer_name="Клиент"
+        )
+        assert second.id == 2
+    
+    def test_clear_all(self, system):
+        system.create_booking(
+            resource_name="Зал А",
+            start_date=datetime(2025, 1, 1),
+            end_date=datetime(2025, 1, 2),
+            customer_name="Клиент"
+        )
+        
+        system.clear_all()
+        
+        assert system.get_all_bookings() == []
+        assert system.get_statistics()['total_attempts'] == 0
+    
+    def test_failed_transaction_rolls_back(self):
+        storage = SQLiteStorage()
+        system = BookingSystem(storage=storage)
+        with pytest.raises(RuntimeError):
+            with storage.transaction():
+                storage.insert(Booking(
+                    id=1,
+                    resource_name="Зал А",
+                    start_date=datetime(2025, 1, 1),
+                    end_date=datetime(2025, 1, 2),
+                    customer_name="Клиент"
+                ))
+                raise RuntimeError()
+        
+        assert system.get_all_bookings() == []